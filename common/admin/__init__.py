@@ -1,6 +1,7 @@
 from .lookup_tables import BottomTypeAdmin, CoverTypeAdmin
 from .spatial_models import (
     Grid5Admin,
+    Grid5LatticeAdmin,
     LakeAdmin,
     LakeManagementUnitTypeAdmin,
     ManagementUnitAdmin,
@@ -4,6 +4,7 @@ from django.utils.translation import gettext_lazy as _
 
 from ..models import (
     Grid5,
+    Grid5Lattice,
     Lake,
     LakeManagementUnitType,
     ManagementUnit,
@@ -155,3 +156,21 @@ class Grid5Admin(geoadmin.ModelAdmin):
             "lake__centroid_ontario",
         )
         return queryset
+
+
+@geoadmin.register(Grid5Lattice)
+class Grid5LatticeAdmin(geoadmin.ModelAdmin):
+    list_display = ("lake", "origin_lon", "origin_lat", "cell_size", "nrows", "ncols")
+    list_select_related = ("lake",)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        queryset = queryset.select_related("lake").defer(
+            "lake__geom",
+            "lake__envelope",
+            "lake__centroid",
+            "lake__geom_ontario",
+            "lake__envelope_ontario",
+            "lake__centroid_ontario",
+        )
+        return queryset
@@ -0,0 +1,123 @@
+"""
+=============================================================
+~/uglmu_common/common/api/biodata.py
+
+ Description:
+
+  Batch endpoints that validate the biological data of a set of fish
+  (e.g. an FN125 table) against the FN012 limits of their species,
+  and convert fork lengths to total lengths (or vice versa) with the
+  flen-tlen regression of each species (see common.biodata).
+
+=============================================================
+"""
+
+import numpy as np
+from django.conf import settings
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from ..biodata import BIODATA_FLAGS, convert_lengths, validate_biodata
+
+# the maximum number of fish that can be validated in a single request
+BIODATA_BATCH_MAX_FISH = getattr(settings, "COMMON_BIODATA_BATCH_MAX_FISH", 100000)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def validate_biodata_batch(request):
+    """This function accepts post requests containing the biological
+    data of a batch of fish as columns (arrays of the same length):
+
+    {"id": [1, 2, 3],
+     "spc": ["081", "081", "334"],
+     "flen": [450, 510, null],
+     "tlen": [480, 540, 320],
+     "rwt": [1200, null, 410]
+    }
+
+    Only spc is required - missing columns and null values are not
+    validated.  The response contains the number of fish and, for each
+    check that failed for at least one fish, the ids of the fish that
+    failed it (or their positions in the arrays if id is not
+    provided):
+
+    {"count": 3, "flags": {"flen_high": [2], "k_low_warn": [3]}}
+
+    The available flags are flen_low, flen_high, tlen_low, tlen_high,
+    rwt_low, rwt_high, k_low_error, k_low_warn, k_high_error,
+    k_high_warn and unknown_spc.
+
+    """
+
+    data = request.data
+    spc = data.get("spc")
+    if not isinstance(spc, list):
+        msg = "spc must be an array of species codes."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+    if len(spc) > BIODATA_BATCH_MAX_FISH:
+        msg = f"A maximum of {BIODATA_BATCH_MAX_FISH} fish can be submitted."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    ids = data.get("id")
+    if ids is None:
+        ids = list(range(len(spc)))
+    elif not isinstance(ids, list) or len(ids) != len(spc):
+        msg = "id must be an array with the same length as spc."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        flags = validate_biodata(
+            spc, flen=data.get("flen"), tlen=data.get("tlen"), rwt=data.get("rwt")
+        )
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+    failed = {}
+    for flag in BIODATA_FLAGS:
+        indices = flags[flag].nonzero()[0]
+        if indices.size:
+            failed[flag] = [ids[i] for i in indices]
+
+    return Response(dict(count=len(spc), flags=failed), status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def convert_lengths_batch(request):
+    """This function accepts post requests containing species codes and
+    either fork lengths or total lengths as arrays of the same length:
+
+    {"spc": ["081", "081", "334"], "flen": [450, 510, null]}
+
+    and returns the converted lengths (total lengths in this case -
+    {"tlen": [...]}) calculated with the flen-tlen regression of each
+    species.  Posting tlen returns fork lengths.  The converted length
+    is null if the length is missing or the species does not have
+    regression coefficients.
+
+    """
+
+    data = request.data
+    spc = data.get("spc")
+    if not isinstance(spc, list):
+        msg = "spc must be an array of species codes."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+    if len(spc) > BIODATA_BATCH_MAX_FISH:
+        msg = f"A maximum of {BIODATA_BATCH_MAX_FISH} fish can be submitted."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    if ("flen" in data) == ("tlen" in data):
+        msg = "Provide either flen or tlen."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    source, target = ("flen", "tlen") if "flen" in data else ("tlen", "flen")
+    try:
+        lengths = convert_lengths(spc, data.get(source), f"{source}2{target}")
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+    converted = [None if np.isnan(x) else x for x in lengths.tolist()]
+    return Response({target: converted}, status=status.HTTP_200_OK)
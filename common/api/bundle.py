@@ -0,0 +1,220 @@
+"""
+=============================================================
+~/uglmu_common/common/api/bundle.py
+
+ Description:
+
+  A single endpoint that returns all of our small lookup tables
+  (lakes, species, vessels, bottom types, cover types, management
+  unit types, lake management unit types and the flen2tlen
+  coefficients) so client applications can load them with one
+  request at startup.
+
+  The bundle is rendered by the same views and serializers as the
+  individual list endpoints, compressed with gzip and brotli and
+  stored in the cache specified by the COMMON_BUNDLE_CACHE setting
+  ("default" if not specified).  The version and each encoding are
+  stored under their own keys, so a request only fetches the
+  encoding it is served (or just the version for a 304).  The cache
+  keys include the versions of the underlying models (see
+  common.cache_utils) so the bundle is rebuilt by the first request
+  after any of them change - all other requests are served straight
+  from the stored bytes.
+
+  The version of the bundle is a hash of its content, and is
+  included in the bundle and used as its (weak) ETag.
+
+=============================================================
+"""
+
+import gzip
+import hashlib
+
+import brotli
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from ..cache_utils import versioned_key
+from ..models import (
+    BottomType,
+    CoverType,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnitType,
+    Species,
+    Vessel,
+)
+from .views import (
+    BottomTypeListView,
+    CoverTypeListView,
+    Flen2TlenListView,
+    LakeListView,
+    LakeManagementUnitTypeListView,
+    ManagementUnitTypeListView,
+    SpeciesListView,
+    VesselListView,
+)
+
+# the tables in our bundle and the views used to serialize them.  The
+# names match the paths of the list endpoints.
+BUNDLE_VIEWS = {
+    "lakes": LakeListView,
+    "species": SpeciesListView,
+    "vessels": VesselListView,
+    "bottom_types": BottomTypeListView,
+    "cover_types": CoverTypeListView,
+    "management_unit_types": ManagementUnitTypeListView,
+    "lake_management_unit_types": LakeManagementUnitTypeListView,
+    "flen2tlen": Flen2TlenListView,
+}
+
+# the encodings of the bundle that we store - in order of preference
+BUNDLE_ENCODINGS = ("br", "gzip", "identity")
+
+BUNDLE_MODELS = (
+    BottomType,
+    CoverType,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnitType,
+    Species,
+    Vessel,
+)
+
+
+def get_bundle_cache():
+    return caches[getattr(settings, "COMMON_BUNDLE_CACHE", "default")]
+
+
+def serialize_table(view_class):
+    """Return the serialized data returned by the list view (without
+    any query parameters)."""
+    view = view_class()
+    view.request = Request(HttpRequest())
+    view.format_kwarg = None
+    view.args = ()
+    view.kwargs = {}
+    return view.get_serializer(view.get_queryset(), many=True).data
+
+
+def build_bundle():
+    """Render our lookup tables and return a dictionary containing the
+    version of the bundle and its content in each of our encodings -
+    uncompressed (identity), gzip and brotli."""
+
+    renderer = JSONRenderer()
+    tables = {name: serialize_table(view) for name, view in BUNDLE_VIEWS.items()}
+    version = hashlib.sha256(renderer.render(tables)).hexdigest()[:16]
+    content = renderer.render(dict(version=version, tables=tables))
+
+    return {
+        "version": version,
+        "identity": content,
+        "gzip": gzip.compress(content, compresslevel=9, mtime=0),
+        "br": brotli.compress(content),
+    }
+
+
+def bundle_cache_prefix():
+    """Return the prefix of the cache keys of the current bundle - it
+    changes when any of our lookup tables change."""
+    return versioned_key("common_bundle", BUNDLE_MODELS)
+
+
+def store_bundle(prefix):
+    """Build the bundle and store its version and each of its encodings
+    under their own keys.  Returns the bundle."""
+
+    bundle = build_bundle()
+    timeout = getattr(settings, "COMMON_BUNDLE_CACHE_TIMEOUT", 60 * 60 * 24)
+    values = {"{}:{}".format(prefix, x): bundle[x] for x in BUNDLE_ENCODINGS}
+    values["{}:version".format(prefix)] = bundle["version"]
+    get_bundle_cache().set_many(values, timeout)
+    return bundle
+
+
+def get_bundle_version(prefix):
+    """Return the version of our current bundle - building it if any of
+    our lookup tables have changed since it was last built."""
+    version = get_bundle_cache().get("{}:version".format(prefix))
+    if version is None:
+        version = store_bundle(prefix)["version"]
+    return version
+
+
+def get_bundle_content(prefix, encoding):
+    """Return the content of our current bundle in one encoding."""
+    content = get_bundle_cache().get("{}:{}".format(prefix, encoding))
+    if content is None:
+        content = store_bundle(prefix)[encoding]
+    return content
+
+
+def parse_accept_encoding(header):
+    """Return a dictionary of the encodings in an Accept-Encoding header
+    and their quality values (1 if not specified, 0 if the value can't
+    be parsed)."""
+    accepted = {}
+    for item in header.split(","):
+        encoding, *params = [x.strip() for x in item.split(";")]
+        if not encoding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[encoding.lower()] = q
+    return accepted
+
+
+def preferred_encoding(request):
+    """Return the best content encoding accepted by the client - the
+    encoding with the highest quality value (brotli if they are the
+    same).  Encodings with q=0 are never used."""
+    accepted = parse_accept_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    best, best_q = "identity", 0.0
+    for encoding in ("br", "gzip"):
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+@require_GET
+def lookup_bundle(request):
+    """Return all of our lookup tables in a single json document:
+
+    {"version": "<content hash>", "tables": {"lakes": [...], ...}}
+
+    Each table contains the same data as its list endpoint.  The
+    response is compressed with brotli or gzip if the client accepts
+    them, and clients that send the version in If-None-Match get a
+    304 if it is still current.
+
+    """
+
+    prefix = bundle_cache_prefix()
+    # a weak etag - the representations differ by content encoding
+    etag = "W/" + quote_etag(get_bundle_version(prefix))
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        encoding = preferred_encoding(request)
+        content = get_bundle_content(prefix, encoding)
+        response = HttpResponse(content, content_type="application/json")
+        if encoding != "identity":
+            response["Content-Encoding"] = encoding
+
+    response["ETag"] = etag
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
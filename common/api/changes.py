@@ -0,0 +1,119 @@
+"""
+=============================================================
+~/uglmu_common/common/api/changes.py
+
+ Description:
+
+  A change feed for clients that keep local copies of our tables
+  (field tablets, caching applications ect.).  Given the timestamp
+  of their last sync, the feed reports the objects in each table
+  that have been created or modified since then, and the objects
+  that have been deleted (from our tombstones).  Clients can then
+  fetch just the changed records from our list endpoints with
+  ?modified_since=<timestamp>.
+
+=============================================================
+"""
+
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from ..models import (
+    BottomType,
+    CoverType,
+    Grid5,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnitType,
+    Species,
+    Taxon,
+    Tombstone,
+    Vessel,
+)
+from ..models.tombstones import NATURAL_KEY_FIELDS
+from .utils import parse_timestamp
+
+# the tables reported by our change feed - the names match our list
+# endpoints.
+CHANGE_FEED_MODELS = {
+    "lake": Lake,
+    "grid5": Grid5,
+    "management_unit": ManagementUnit,
+    "management_unit_type": ManagementUnitType,
+    "lake_management_unit_type": LakeManagementUnitType,
+    "species": Species,
+    "taxon": Taxon,
+    "bottom_type": BottomType,
+    "cover_type": CoverType,
+    "vessel": Vessel,
+}
+
+
+def get_changes(model, since):
+    """Return a dictionary containing lists of the objects of model that
+    have been modified or deleted since the timestamp."""
+
+    model_name = model._meta.model_name
+    key_field = NATURAL_KEY_FIELDS.get(model_name, "id")
+
+    modified = (
+        model._base_manager.filter(modified_date__gte=since)
+        .order_by("modified_date", "id")
+        .values_list("id", key_field, "modified_date")
+    )
+    deleted = Tombstone.objects.filter(
+        model=model_name, deleted_date__gte=since
+    ).values_list("object_id", "key", "deleted_date")
+
+    return {
+        "modified": [
+            dict(id=pk, key=str(key), modified_date=date) for pk, key, date in modified
+        ],
+        "deleted": [
+            dict(id=pk, key=key or str(pk), deleted_date=date)
+            for pk, key, date in deleted
+        ],
+    }
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def change_feed(request):
+    """Return the objects that have been created, modified or deleted
+    since the timestamp in the since query parameter
+    (e.g. ?since=2021-03-01T12:00:00Z).  The tables can be limited
+    with the tables query parameter (e.g. ?tables=lake,species).
+
+    The response includes the timestamp of the request in 'until' -
+    clients should use it as the since parameter of their next
+    request.
+
+    """
+
+    until = timezone.now()
+    since = request.query_params.get("since")
+    if not since:
+        return Response(
+            {"detail": "The since parameter is required."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        since = parse_timestamp(since)
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+    tables = request.query_params.get("tables")
+    tables = tables.split(",") if tables else list(CHANGE_FEED_MODELS.keys())
+    unknown = [x for x in tables if x not in CHANGE_FEED_MODELS]
+    if unknown:
+        msg = "Unknown table(s): {}".format(", ".join(unknown))
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    changes = {x: get_changes(CHANGE_FEED_MODELS[x], since) for x in tables}
+    return Response(
+        dict(since=since, until=until, changes=changes), status=status.HTTP_200_OK
+    )
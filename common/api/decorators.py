@@ -0,0 +1,116 @@
+"""
+=============================================================
+~/uglmu_common/common/api/decorators.py
+
+ Description:
+
+  HTTP caching for the GET forms of our spatial lookup views.
+
+  The response to a spatial lookup only depends on the point, the
+  query parameters, the requested media type and our geometries, so
+  GET lookups are returned with an ETag built from the canonical
+  point, the remaining query parameters, the Accept header and the
+  versions of the models the view depends on (see common.cache_utils).
+  Revalidation requests (If-None-Match) are answered with a 304
+  without running any spatial queries, and the ETag changes as soon
+  as any of the geometries are saved or deleted.
+
+  By default the responses are sent with Cache-Control: no-cache, so
+  browsers and shared caches can store them but must revalidate them
+  with us before every use - clients never see stale assignments.
+  Set COMMON_LOOKUP_MAX_AGE to a number of seconds to let caches use
+  them without revalidating for that long instead - a lookup can
+  then return the old assignment for up to that long after a
+  geometry changes.
+
+  POST requests are not affected.
+
+=============================================================
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import quote_etag
+
+from ..cache_utils import model_versions
+from .mixins import normalize_query
+from .utils import parse_request_point
+
+# query parameters that specify the point - everything else is part
+# of the etag
+POINT_QUERY_PARAMS = ("point", "lon", "lat")
+
+# the responses of our lookups that can be cached
+CACHEABLE_STATUS_CODES = (200, 304, 404)
+
+
+def lookup_etag(request, pt, models):
+    """Return the etag of a GET lookup of pt - it changes if the point,
+    any of the other query parameters, the requested media type or any
+    of the models change."""
+
+    params = request.query_params.copy()
+    for param in POINT_QUERY_PARAMS:
+        params.pop(param, None)
+
+    key = "|".join(
+        [
+            request.path,
+            "{:f} {:f}".format(pt.x, pt.y),
+            normalize_query(params),
+            request.META.get("HTTP_ACCEPT", ""),
+        ]
+        + model_versions(*models)
+    )
+    return quote_etag(hashlib.md5(key.encode("utf-8")).hexdigest())
+
+
+def cacheable_lookup(*models):
+    """Add ETag, Cache-Control and Vary headers to the GET responses of a
+    spatial lookup view, and answer conditional requests with a 304
+    if none of the models have changed.  Apply it below @api_view:
+
+    @api_view(["GET", "POST"])
+    @permission_classes([AllowAny])
+    @cacheable_lookup(Lake)
+    def get_lake_from_pt(request):
+        ...
+
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return func(request, *args, **kwargs)
+
+            pt = parse_request_point(request)
+            if pt is None:
+                # the view will return a 400
+                return func(request, *args, **kwargs)
+
+            etag = lookup_etag(request, pt, models)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = func(request, *args, **kwargs)
+
+            if response.status_code in CACHEABLE_STATUS_CODES:
+                max_age = getattr(settings, "COMMON_LOOKUP_MAX_AGE", 0)
+                response["ETag"] = etag
+                if max_age:
+                    patch_cache_control(response, public=True, max_age=max_age)
+                else:
+                    patch_cache_control(response, public=True, no_cache=True)
+                patch_vary_headers(response, ["Accept"])
+            return response
+
+        return wrapper
+
+    return decorator
@@ -16,8 +16,11 @@ records.
 
 import django_filters
 from django_filters import rest_framework as filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
 
 from ..models import Grid5, Lake, LakeManagementUnitType, ManagementUnit, Species, Taxon
+from .utils import parse_timestamp
 
 
 class ValueInFilter(django_filters.BaseInFilter, django_filters.CharFilter):
@@ -28,6 +31,24 @@ class NumberInFilter(django_filters.BaseInFilter, django_filters.NumberFilter):
     pass
 
 
+class ModifiedSinceFilterBackend(BaseFilterBackend):
+    """Return only the objects that have been created or modified since
+    the timestamp provided in the modified_since query parameter
+    (e.g. ?modified_since=2021-03-01T12:00:00Z).  Used by clients to
+    sync their local copies of our tables - deleted objects are
+    reported by our change feed."""
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get("modified_since")
+        if not value:
+            return queryset
+        try:
+            timestamp = parse_timestamp(value)
+        except ValueError as err:
+            raise ValidationError({"modified_since": str(err)})
+        return queryset.filter(modified_date__gte=timestamp)
+
+
 class LakeFilter(filters.FilterSet):
     """Lake objects.  We want to be able to filter them
     by lake abbreviation (e.g. ?lake=HU)"""
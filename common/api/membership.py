@@ -0,0 +1,162 @@
+"""
+=============================================================
+~/uglmu_common/common/api/membership.py
+
+ Description:
+
+  A precomputed grid x management unit membership matrix.  Client
+  applications that summarize data by 5-minute grid can use it to
+  roll their results up to any management unit (quota management
+  areas, lake trout rehabilitation zones, statistical districts
+  ect.) locally, rather than querying the management units of each
+  grid.
+
+  The matrix is stored in sparse form - a list of our grids, and for
+  each management unit, an array of the integer indices of the grids
+  it contains.  It is built from the ManagementUnit.grids table in a
+  single query and stored in the cache specified by the
+  COMMON_MEMBERSHIP_CACHE setting ("default" if not specified).  The
+  cache key includes the versions of the grid and management unit
+  models, which change whenever the membership does (m2m_changed,
+  see common.signals), so the matrix is rebuilt by the first request
+  after any change.
+
+=============================================================
+"""
+
+import hashlib
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from ..cache_utils import versioned_key
+from ..models import (
+    Grid5,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnitType,
+)
+
+MEMBERSHIP_MODELS = (
+    Grid5,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnit.grids.through,
+    ManagementUnitType,
+)
+
+
+def get_membership_cache():
+    return caches[getattr(settings, "COMMON_MEMBERSHIP_CACHE", "default")]
+
+
+def build_membership():
+    """Build our membership matrix and return it as a dictionary with
+    the keys:
+
+    + grids - a list of [id, slug] for each grid (the columns of
+      the matrix)
+    + management_units - a list of dictionaries with the id, slug,
+      label, lake_abbrev and mu_type of each management unit and
+      'grids', the indices of the grids it contains (the rows)
+    + version - a hash of the content
+
+    """
+
+    grids = list(Grid5.objects.order_by("slug").values_list("id", "slug"))
+    index = {grid_id: i for i, (grid_id, slug) in enumerate(grids)}
+
+    members = defaultdict(list)
+    through = ManagementUnit.grids.through.objects.values_list(
+        "managementunit_id", "grid5_id"
+    )
+    for mu_id, grid_id in through:
+        members[mu_id].append(index[grid_id])
+
+    mus = ManagementUnit.objects.order_by("slug").values(
+        "id",
+        "slug",
+        "label",
+        "lake__abbrev",
+        "lake_management_unit_type__management_unit_type__slug",
+    )
+    management_units = [
+        dict(
+            id=mu["id"],
+            slug=mu["slug"],
+            label=mu["label"],
+            lake_abbrev=mu["lake__abbrev"],
+            mu_type=mu["lake_management_unit_type__management_unit_type__slug"],
+            grids=sorted(members.get(mu["id"], [])),
+        )
+        for mu in mus
+    ]
+
+    matrix = dict(grids=[list(x) for x in grids], management_units=management_units)
+    content = json.dumps(matrix, sort_keys=True).encode("utf-8")
+    matrix["version"] = hashlib.sha256(content).hexdigest()[:16]
+    return matrix
+
+
+def get_membership():
+    """Return our current membership matrix - building it if the grids
+    or management units have changed since it was last built."""
+
+    cache = get_membership_cache()
+    key = versioned_key("common_membership", MEMBERSHIP_MODELS)
+    matrix = cache.get(key)
+    if matrix is None:
+        matrix = build_membership()
+        timeout = getattr(settings, "COMMON_MEMBERSHIP_CACHE_TIMEOUT", 60 * 60 * 24)
+        cache.set(key, matrix, timeout)
+    return matrix
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def grid5_membership(request):
+    """Return our sparse grid x management unit membership matrix.
+
+    The management units can be limited to one or more management
+    unit types or lakes with the mu_type and lake query parameters
+    (e.g. ?mu_type=qma,ltrz&lake=HU).  The grids array always
+    contains all of our grids, so indices are consistent between
+    requests.
+
+    """
+
+    matrix = get_membership()
+
+    mu_types = request.query_params.get("mu_type")
+    lakes = request.query_params.get("lake")
+    etag = quote_etag("{}-{}-{}".format(matrix["version"], mu_types, lakes))
+
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+        return response
+
+    management_units = matrix["management_units"]
+    if mu_types:
+        mu_types = mu_types.split(",")
+        management_units = [x for x in management_units if x["mu_type"] in mu_types]
+    if lakes:
+        lakes = lakes.split(",")
+        management_units = [x for x in management_units if x["lake_abbrev"] in lakes]
+
+    data = dict(
+        version=matrix["version"],
+        grids=matrix["grids"],
+        management_units=management_units,
+    )
+    return Response(data, status=status.HTTP_200_OK, headers={"ETag": etag})
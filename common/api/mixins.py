@@ -0,0 +1,365 @@
+"""
+=============================================================
+~/uglmu_common/common/api/mixins.py
+
+ Description:
+
+  Mixins shared by the read-only views in our api.
+
+  ConditionalListMixin adds HTTP conditional GET support (ETag
+  headers) to our list views.  The ETag is calculated from the most
+  recent modified_date and the number of records in the filtered
+  queryset (plus the request parameters), in a single aggregate
+  query, so clients that already have a current copy of the data get
+  a 304 without us ever fetching or serializing the records.  Pages
+  of keyset (cursor) pagination are small slices of a large table,
+  so their ETags are calculated from the versions of the view's
+  models instead (see common.cache_utils) - without scanning the
+  whole filtered queryset for every page.
+
+  List responses do not include a Last-Modified header - deleting a
+  record (or changing it so it no longer matches the filters) does
+  not move the most recent modified_date of the list forward, so
+  If-Modified-Since can't tell that a list has changed.
+
+  CachedResponseMixin stores the rendered content of successful GET
+  requests in the cache specified by the COMMON_API_CACHE setting
+  (responses are not cached if it is not specified).  Cache keys
+  include the scheme, host and path of the request (paginated
+  responses contain absolute next and previous links), the
+  normalized query string and the
+  versions of the models the view depends on (see
+  common.cache_utils), so cached responses are invalidated as soon as
+  any of those models are saved or deleted.  Html responses (the
+  browsable api) are never cached - they contain content specific to
+  the user and request, like the login state and csrf token.
+
+  StreamingListMixin streams every record of a list view (without
+  pagination) if the client requests one of our streaming formats
+  (?format=ndjson or ?format=csv).
+
+  SparseFieldsMixin lets clients choose the fields returned by a view
+  (?fields=slug,label).  The fields are removed from the serializer
+  and the columns are never selected from the database.
+
+  KeysetPaginationMixin lets clients of our larger list views choose
+  keyset (cursor) pagination with ?pagination=cursor.
+
+=============================================================
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe, quote_etag
+from rest_framework.exceptions import ValidationError
+
+from ..cache_utils import model_versions, versioned_key
+
+# the response headers that are stored with cached content
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Vary", "Allow")
+
+
+def normalize_query(query_params):
+    """Return a string representation of the query parameters that does
+    not depend on the order they were provided in."""
+    return "&".join(
+        "{}={}".format(key, ",".join(values))
+        for key, values in sorted(query_params.lists())
+    )
+
+
+class ConditionalListMixin:
+    """Answer If-None-Match requests to a ListAPIView with a 304 if the
+    data has not changed.
+
+    Views that serialize attributes of related models (e.g. the lake
+    abbreviation of a management unit) should include those models in
+    related_models so changes to them are reflected in the
+    validators.
+
+    """
+
+    related_models = ()
+
+    def get_validator_values(self):
+        """Return the most recent modified_date and the number of
+        records in the filtered queryset, and the most recent
+        modified_date of each of our related_models."""
+
+        qs = self.filter_queryset(self.get_queryset()).order_by()
+        agg = qs.aggregate(modified=Max("modified_date"), count=Count("pk"))
+        modified = [agg["modified"]]
+        for model in self.related_models:
+            modified.append(
+                model._default_manager.aggregate(modified=Max("modified_date"))[
+                    "modified"
+                ]
+            )
+        return modified, agg["count"]
+
+    def use_version_validators(self):
+        """Return True if the validators should be calculated from the
+        model versions - i.e. if the view returns a page of keyset
+        pagination (see KeysetPaginationMixin)."""
+        use_cursor = getattr(self, "use_cursor_pagination", None)
+        return bool(use_cursor and use_cursor())
+
+    def get_version_etag(self):
+        """Return an etag built from the current versions of the view's
+        model and related_models."""
+
+        models = [self.get_queryset().model] + list(self.related_models)
+        query = normalize_query(self.request.query_params)
+        key = "{}|{}|{}".format(self.request.path, query, model_versions(*models))
+        return quote_etag(hashlib.md5(key.encode("utf-8")).hexdigest())
+
+    def get_etag(self):
+        """Return the etag for the current request."""
+
+        if self.use_version_validators():
+            return self.get_version_etag()
+
+        modified, count = self.get_validator_values()
+        modified = [x.isoformat() for x in modified if x is not None]
+
+        query = normalize_query(self.request.query_params)
+        key = "{}|{}|{}|{}".format(self.request.path, query, modified, count)
+        return quote_etag(hashlib.md5(key.encode("utf-8")).hexdigest())
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_etag()
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        return response
+
+
+class CachedResponseMixin:
+    """Serve GET requests from the response cache if we have already
+    rendered the same request since any of the models the view
+    depends on last changed.
+
+    The models are the model of the view's queryset plus any models
+    listed in related_models.
+
+    """
+
+    related_models = ()
+
+    def get_response_cache(self):
+        alias = getattr(settings, "COMMON_API_CACHE", None)
+        return caches[alias] if alias else None
+
+    def get_cache_models(self):
+        return [self.get_queryset().model] + list(self.related_models)
+
+    def get_response_cache_key(self, request):
+        """Build the cache key from the scheme, host and path, the
+        normalized query string and the requested media type.  The
+        next and previous links of our paginated responses are absolute
+        urls, so responses can't be shared between hosts."""
+        return versioned_key(
+            "common_api",
+            self.get_cache_models(),
+            request.scheme,
+            request.get_host(),
+            request.path,
+            normalize_query(request.GET),
+            request.META.get("HTTP_ACCEPT", ""),
+        )
+
+    def get(self, request, *args, **kwargs):
+        cache = self.get_response_cache()
+        self.response_cache_key = None
+        if cache is None:
+            return super().get(request, *args, **kwargs)
+
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            # the response is rendered and cached in finalize_response
+            self.response_cache_key = key
+            return super().get(request, *args, **kwargs)
+
+        content, headers = cached
+        response = HttpResponse(content)
+        for header, value in headers.items():
+            response[header] = value
+        return get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+            response=response,
+        )
+
+    def is_cacheable_response(self, request, response):
+        """Only successful, non-streaming responses that are not html
+        (i.e. not rendered by the browsable api) can be shared."""
+        renderer = getattr(request, "accepted_renderer", None)
+        return (
+            response.status_code == 200
+            and not response.streaming
+            and renderer is not None
+            and renderer.media_type != "text/html"
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, "response_cache_key", None)
+        if key and self.is_cacheable_response(request, response):
+            response.render()
+            headers = {x: response[x] for x in CACHED_HEADERS if response.has_header(x)}
+            timeout = getattr(settings, "COMMON_API_CACHE_TIMEOUT", 60 * 60)
+            self.get_response_cache().set(key, (response.content, headers), timeout)
+        return response
+
+
+class KeysetPaginationMixin:
+    """Use the view's cursor_pagination_class instead of its
+    pagination_class if the client requests it with
+    ?pagination=cursor (or provides a cursor).  Views must specify
+    the field used to order the pages in cursor_ordering - ideally a
+    unique, indexed field.  Views without a cursor_ordering always
+    use their pagination_class.
+
+    """
+
+    cursor_pagination_class = None
+    cursor_ordering = None
+
+    def use_cursor_pagination(self):
+        if self.cursor_pagination_class is None or self.cursor_ordering is None:
+            return False
+        params = self.request.query_params
+        return params.get("pagination") == "cursor" or "cursor" in params
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator"):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+
+class StreamingListMixin:
+    """Stream the complete filtered queryset if the accepted renderer is
+    one of our streaming renderers (see api.renderers).  The rows are
+    fetched from a server side cursor in chunks of stream_chunk_size
+    so memory use does not depend on the size of the table.
+
+    Views enable streaming by including the renderers in their
+    renderer_classes.
+
+    """
+
+    stream_chunk_size = 2000
+
+    def list(self, request, *args, **kwargs):
+        renderer = getattr(request, "accepted_renderer", None)
+        if not getattr(renderer, "streaming", False):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ordering = getattr(self, "cursor_ordering", None)
+        if ordering:
+            queryset = queryset.order_by(ordering)
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+
+        serializer = self.get_serializer([], many=True)
+        if hasattr(serializer, "iter_representation"):
+            rows = serializer.iter_representation(rows)
+        else:
+            rows = (serializer.child.to_representation(x) for x in rows)
+
+        fields = [x.field_name for x in serializer.child._readable_fields]
+        content_type = "{}; charset={}".format(renderer.media_type, renderer.charset)
+        return StreamingHttpResponse(
+            renderer.stream(rows, fields), content_type=content_type
+        )
+
+
+class SparseFieldsMixin:
+    """Return only the fields requested in the fields query parameter
+    (e.g. ?fields=slug,label).  The requested fields are pushed down
+    to the queryset - querysets that return dictionaries are limited
+    with .values() and model querysets with .only() - so unused
+    columns (and expensive geometries) are never fetched.
+
+    Requests for fields that the serializer does not have return a
+    400 response.
+
+    """
+
+    fields_query_param = "fields"
+
+    def get_requested_fields(self):
+        """Return the list of requested field names or None if the
+        client did not ask for specific fields."""
+        value = self.request.query_params.get(self.fields_query_param)
+        if not value:
+            return None
+
+        requested = [x.strip() for x in value.split(",") if x.strip()]
+        available = self.get_serializer_class()().fields
+        unknown = [x for x in requested if x not in available]
+        if unknown:
+            msg = "Unknown field(s): {}".format(", ".join(unknown))
+            raise ValidationError({self.fields_query_param: msg})
+        return requested
+
+    def get_requested_sources(self):
+        """Return the attributes read by the requested fields, or None
+        if any of them are not simple attributes."""
+        requested = self.get_requested_fields()
+        if requested is None:
+            return None
+        available = self.get_serializer_class()().fields
+        sources = []
+        for name in requested:
+            source_attrs = available[name].source_attrs
+            if len(source_attrs) != 1:
+                return None
+            sources.append(source_attrs[0])
+        return sources
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        requested = self.get_requested_fields()
+        if requested:
+            target = getattr(serializer, "child", serializer)
+            for name in set(target.fields.keys()) - set(requested):
+                target.fields.pop(name)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        sources = self.get_requested_sources()
+        if not sources:
+            return queryset
+
+        # our keyset pagination needs the ordering field too:
+        ordering = getattr(self, "cursor_ordering", None)
+        if ordering:
+            sources.append(ordering)
+        sources = list(dict.fromkeys(sources))
+
+        if queryset._fields is not None:
+            # queryset.values()
+            return queryset.values(*sources)
+
+        concrete = {x.name for x in queryset.model._meta.concrete_fields}
+        if all(x in concrete for x in sources):
+            return queryset.only(*sources)
+        return queryset
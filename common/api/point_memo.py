@@ -0,0 +1,114 @@
+"""
+=============================================================
+~/uglmu_common/common/api/point_memo.py
+
+ Description:
+
+  A persistent memo of point assignments for the spatial attribute
+  lookups.  Our index and trawl programs revisit the same fixed
+  stations every year, so the same coordinates are resolved to the
+  same lake, management unit and grid over and over again.
+
+  The memo is stored in the cache specified by the
+  COMMON_POINT_MEMO_CACHE setting (the memo is not used if it is not
+  specified) - use a database or file based cache to keep it between
+  restarts.  Points are quantized to COMMON_POINT_MEMO_PRECISION
+  decimal degrees (5 by default - about a metre) and the quantized
+  point is resolved, so the memo always returns the same assignment
+  for the same key.
+
+  Memo keys include the versions of the lake, management unit and
+  grid models (see common.cache_utils), so every entry is
+  invalidated as soon as any of those geometries are saved or
+  deleted.
+
+=============================================================
+"""
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.core.cache import caches
+
+from ..cache_utils import versioned_key
+from ..grid5_index import GRID5_LOOKUP_DB, grid5_lookup_method, get_grid5s_from_pts
+from ..models import (
+    Grid5,
+    Grid5Lattice,
+    Lake,
+    LakeManagementUnitType,
+    LakeSubdivision,
+    ManagementUnit,
+    ManagementUnitType,
+)
+from .spatial_queries import get_spatial_attrs, grid5_dict
+
+MEMO_MODELS = (
+    Lake,
+    LakeSubdivision,
+    ManagementUnit,
+    Grid5,
+    Grid5Lattice,
+    LakeManagementUnitType,
+    ManagementUnitType,
+)
+
+
+def get_point_memo_cache():
+    alias = getattr(settings, "COMMON_POINT_MEMO_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def quantize_point(pt, precision):
+    """Round the coordinates of pt to precision decimal places."""
+    return Point(round(pt.x, precision), round(pt.y, precision), srid=pt.srid)
+
+
+def resolve_points(points, mu_type="stat_dist"):
+    """Return the lake, management unit and grid5 of each point - the
+    grids are found with our in-memory index or lattices if they are
+    enabled."""
+
+    use_db = grid5_lookup_method() == GRID5_LOOKUP_DB
+    attrs = get_spatial_attrs(points, mu_type=mu_type, include_grid5=use_db)
+    if not use_db:
+        for grid5, item in zip(get_grid5s_from_pts(points), attrs):
+            item["grid5"] = grid5_dict(grid5)
+    return attrs
+
+
+def get_point_attrs(points, mu_type="stat_dist"):
+    """Given a list of GEOS Points, return a list of dictionaries
+    containing the lake, management unit (of type mu_type) and
+    5-minute grid of each point - in the same order as the points.
+
+    If the point memo is enabled, points that have been resolved
+    before are returned from the memo and the remaining points are
+    resolved in a single query and added to it.
+
+    """
+
+    cache = get_point_memo_cache()
+    if cache is None:
+        return resolve_points(points, mu_type=mu_type)
+
+    precision = getattr(settings, "COMMON_POINT_MEMO_PRECISION", 5)
+    quantized = [quantize_point(pt, precision) for pt in points]
+
+    # the model versions are only fetched once for the whole batch:
+    prefix = versioned_key("common_pt_memo", MEMO_MODELS, mu_type)
+    keys = [
+        "{}:{:.{p}f}:{:.{p}f}".format(prefix, pt.x, pt.y, p=precision)
+        for pt in quantized
+    ]
+
+    memo = cache.get_many(list(set(keys)))
+    missing = list(dict.fromkeys(key for key in keys if key not in memo))
+    if missing:
+        pts = {key: pt for key, pt in zip(keys, quantized)}
+        attrs = resolve_points([pts[key] for key in missing], mu_type=mu_type)
+        new = dict(zip(missing, attrs))
+        timeout = getattr(settings, "COMMON_POINT_MEMO_TIMEOUT", None)
+        cache.set_many(new, timeout)
+        memo.update(new)
+
+    return [dict(memo[key]) for key in keys]
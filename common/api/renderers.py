@@ -0,0 +1,82 @@
+"""
+=============================================================
+~/uglmu_common/common/api/renderers.py
+
+ Description:
+
+  Renderers for the streaming output formats of our large list
+  views (?format=ndjson and ?format=csv).
+
+  List views that use these renderers stream their rows straight
+  from a server side cursor (see api.mixins.StreamingListMixin) by
+  calling the renderer's stream() method.  render() is only used for
+  ordinary responses (e.g. errors) that are sent in these formats.
+
+=============================================================
+"""
+
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class Echo:
+    """A file-like object that returns what is written to it, so
+    csv.writer can be used to build each line of a streaming
+    response."""
+
+    def write(self, value):
+        return value
+
+
+def as_rows(data):
+    """Return the rows in data - a list of rows, or a single row."""
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return [data]
+    return data
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline delimited json - each row is a complete json object on
+    its own line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+    streaming = True
+
+    def stream(self, rows, fields):
+        for row in rows:
+            line = json.dumps(
+                row, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+            )
+            yield (line + "\n").encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return b"".join(self.stream(as_rows(data), None))
+
+
+class CSVRenderer(BaseRenderer):
+    """Comma separated values with a header row.  The columns are the
+    fields of the view's serializer."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+    streaming = True
+
+    def stream(self, rows, fields):
+        writer = csv.writer(Echo())
+        yield writer.writerow(fields).encode(self.charset)
+        for row in rows:
+            values = ["" if row.get(x) is None else row.get(x) for x in fields]
+            yield writer.writerow(values).encode(self.charset)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = as_rows(data)
+        fields = list(rows[0].keys()) if rows else []
+        return b"".join(self.stream(rows, fields))
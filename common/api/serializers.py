@@ -6,9 +6,73 @@ needed).
   """
 
 
+from django.db import models
 from rest_framework import serializers
+from rest_framework.fields import empty
+
 from ..models import Species, Lake, ManagementUnit, Grid5
 
+# to_representation() of these fields just casts the value - use the
+# cast directly in our fast path.
+FAST_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+}
+
+
+class ValuesListSerializer(serializers.ListSerializer):
+    """A list serializer for querysets that return dictionaries
+    (queryset.values()).  Rather than sending every row through each
+    of the field objects, the key and conversion function of each
+    field are worked out once and applied directly to the values of
+    each row.  The field declarations are still used for our schema
+    and documentation, and the results are identical to those
+    produced by the child serializer.
+
+    Rows that are not dictionaries, or are missing any of the fields,
+    are serialized by the child serializer as usual.
+
+    """
+
+    def get_converters(self):
+        """Return a list of (field_name, key, converter) tuples for the
+        readable fields of our child serializer, or None if any of
+        them can't be read directly from a values dictionary."""
+
+        converters = []
+        for field in self.child._readable_fields:
+            if len(field.source_attrs) != 1 or field.default is not empty:
+                return None
+            convert = FAST_CONVERTERS.get(type(field), field.to_representation)
+            converters.append((field.field_name, field.source_attrs[0], convert))
+        return converters
+
+    def iter_representation(self, iterable):
+        """Yield the representation of each row in iterable.  Used by
+        our streaming list views so the rows never need to be held in
+        memory at the same time."""
+
+        converters = self.get_converters()
+        if converters is None:
+            for item in iterable:
+                yield self.child.to_representation(item)
+            return
+
+        for item in iterable:
+            try:
+                row = {}
+                for name, key, convert in converters:
+                    value = item[key]
+                    row[name] = None if value is None else convert(value)
+            except (KeyError, TypeError):
+                row = self.child.to_representation(item)
+            yield row
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        return list(self.iter_representation(iterable))
+
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
     """
@@ -62,6 +126,9 @@ class LakeManagementUnitTypeSerializer(serializers.Serializer):
     mu_type_label = serializers.CharField(read_only=True)
     primary = serializers.BooleanField(read_only=True)
 
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
 
 class ManagementUnitTypeSerializer(serializers.Serializer):
     """"""
@@ -85,6 +152,9 @@ class ManagementUnitSerializer(serializers.Serializer):
     centroid = serializers.CharField(read_only=True)
     envelope = serializers.CharField(read_only=True)
 
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
 
 class Grid5Serializer(serializers.Serializer):
     """"""
@@ -95,6 +165,9 @@ class Grid5Serializer(serializers.Serializer):
     slug = serializers.CharField(read_only=True)
     centroid = serializers.CharField(read_only=True)
 
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
 
 # class Grid5Serializer(serializers.ModelSerializer):
 #
@@ -133,6 +206,7 @@ class Flen2TlenSerializer(serializers.ModelSerializer):
         model = Species
         fields = ("spc", "intercept", "slope")
         lookup_field = "spc"
+        list_serializer_class = ValuesListSerializer
 
 
 class SpeciesDetailSerializer(serializers.ModelSerializer):
@@ -153,6 +227,9 @@ class TaxonSerializer(serializers.Serializer):
     vertinvert = serializers.CharField(read_only=True)
     omnr_provincial_code = serializers.CharField(read_only=True)
 
+    class Meta:
+        list_serializer_class = ValuesListSerializer
+
 
 class LookupTableSerializer(serializers.Serializer):
     """"""
@@ -163,3 +240,6 @@ class LookupTableSerializer(serializers.Serializer):
     description = serializers.CharField(read_only=True)
     slug = serializers.CharField(read_only=True)
     is_active = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        list_serializer_class = ValuesListSerializer
@@ -0,0 +1,417 @@
+"""
+=============================================================
+~/uglmu_common/common/api/spatial_queries.py
+
+ Description:
+
+  Set-based spatial queries used by the spatial lookup api views.
+  Rather than running one containment query per point and layer, the
+  functions in this module send an array of points to the database
+  and let postgis join them to our lakes, management units and
+  5-minute grids in a single statement.  Lakes are found using their
+  subdivided pieces (see LakeSubdivision) - with ST_Intersects, so
+  that points on the seams between two pieces are still found.
+
+  get_nearest_lake() and get_nearest_grid5() find the feature that
+  contains a point or, if there isn't one, the nearest feature within
+  a tolerance (in metres) using an index assisted knn search.
+
+  get_spatial_totals() aggregates a batch of weighted points by
+  5-minute grid and management unit in the database.
+
+=============================================================
+"""
+
+import math
+
+from django.contrib.gis.geos import GEOSGeometry
+from django.db import connection
+
+from ..models import (
+    Grid5,
+    Lake,
+    LakeManagementUnitType,
+    LakeSubdivision,
+    ManagementUnit,
+    ManagementUnitType,
+)
+
+
+SPATIAL_ATTRS_SQL = """
+WITH pts AS (
+    SELECT p.idx, ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) AS geom
+    FROM unnest(%(lons)s::float8[], %(lats)s::float8[])
+        WITH ORDINALITY AS p(lon, lat, idx)
+)
+SELECT pts.idx,
+    lake.id, lake.abbrev, lake.lake_name, lake.centroid,
+    mu.id, mu.slug, mu.label, mu.centroid{grid5_columns}
+FROM pts
+LEFT JOIN LATERAL (
+    SELECT l.id, l.abbrev, l.lake_name, l.centroid
+    FROM {lake_subdivision} s
+    JOIN {lake} l ON l.id = s.lake_id
+    WHERE ST_Intersects(s.geom, pts.geom)
+    ORDER BY l.abbrev
+    LIMIT 1
+) lake ON TRUE
+LEFT JOIN LATERAL (
+    SELECT m.id, m.slug, m.label, m.centroid
+    FROM {management_unit} m
+    JOIN {lake} ml ON ml.id = m.lake_id
+    JOIN {lake_mu_type} lmt ON lmt.id = m.lake_management_unit_type_id
+    JOIN {mu_type} mut ON mut.id = lmt.management_unit_type_id
+    WHERE mut.slug = %(mu_type)s AND ST_Contains(m.geom, pts.geom)
+    ORDER BY ml.abbrev, m.label
+    LIMIT 1
+) mu ON TRUE{grid5_join}
+ORDER BY pts.idx
+"""
+
+GRID5_COLUMNS = """,
+    grid.id, grid.grid, grid.slug, grid.centroid, grid.lake_abbrev"""
+
+GRID5_JOIN = """
+LEFT JOIN LATERAL (
+    SELECT g.id, g.grid, g.slug, g.centroid, gl.abbrev AS lake_abbrev
+    FROM {grid5} g
+    JOIN {lake} gl ON gl.id = g.lake_id
+    WHERE ST_Contains(g.geom, pts.geom)
+    ORDER BY gl.abbrev, g.grid
+    LIMIT 1
+) grid ON TRUE"""
+
+SPATIAL_TOTALS_SQL = """
+WITH pts AS (
+    SELECT ST_SetSRID(ST_MakePoint(p.lon, p.lat), 4326) AS geom, p.weight
+    FROM unnest(%(lons)s::float8[], %(lats)s::float8[], %(weights)s::float8[])
+        AS p(lon, lat, weight)
+),
+grid_totals AS (
+    SELECT 'grid5' AS layer, g.id, g.slug, g.grid AS label,
+        gl.abbrev AS lake_abbrev, count(*) AS n, sum(pts.weight) AS total
+    FROM pts
+    JOIN {grid5} g ON ST_Contains(g.geom, pts.geom)
+    JOIN {lake} gl ON gl.id = g.lake_id
+    GROUP BY g.id, g.slug, g.grid, gl.abbrev
+),
+mu_totals AS (
+    SELECT 'management_unit' AS layer, m.id, m.slug, m.label,
+        ml.abbrev AS lake_abbrev, count(*) AS n, sum(pts.weight) AS total
+    FROM pts
+    JOIN {management_unit} m ON ST_Contains(m.geom, pts.geom)
+    JOIN {lake} ml ON ml.id = m.lake_id
+    JOIN {lake_mu_type} lmt ON lmt.id = m.lake_management_unit_type_id
+    JOIN {mu_type} mut ON mut.id = lmt.management_unit_type_id
+    WHERE mut.slug = %(mu_type)s
+    GROUP BY m.id, m.slug, m.label, ml.abbrev
+)
+SELECT * FROM grid_totals
+UNION ALL
+SELECT * FROM mu_totals
+ORDER BY layer, lake_abbrev, slug
+"""
+
+# the number of candidates returned by the knn search.  The index
+# orders features by planar distance, so the nearest few are compared
+# by their distance on the spheroid.
+NEAREST_CANDIDATES = 5
+
+# the first branch finds the features the point is in (or on the
+# boundary of - lakes are searched using their subdivided pieces, see
+# LakeSubdivision), the second the nearest features within the snap
+# tolerance.
+NEAREST_FEATURE_SQL = """
+WITH pt AS (
+    SELECT ST_SetSRID(ST_MakePoint(%(lon)s, %(lat)s), 4326) AS geom
+),
+candidates AS (
+    (
+        SELECT {key} AS id, 0.0::float8 AS distance
+        FROM {source} t, pt
+        WHERE ST_Intersects(t.geom, pt.geom)
+    )
+    UNION ALL
+    (
+        SELECT {key} AS id,
+            ST_Distance(t.geom::geography, pt.geom::geography) AS distance
+        FROM {source} t, pt
+        WHERE ST_DWithin(t.geom, pt.geom, %(snap_degrees)s)
+        ORDER BY t.geom <-> pt.geom
+        LIMIT {candidates}
+    )
+)
+SELECT {columns}, c.distance
+FROM candidates c
+{joins}
+WHERE c.distance <= %(snap)s
+ORDER BY c.distance, {order}
+LIMIT 1
+"""
+
+NEAREST_LAKE = dict(
+    source="{lake_subdivision}",
+    key="t.lake_id",
+    columns=(
+        "f.id, f.abbrev, f.lake_name, f.centroid, f.envelope, "
+        "f.centroid_ontario, f.envelope_ontario"
+    ),
+    joins="JOIN {lake} f ON f.id = c.id",
+    order="f.abbrev",
+)
+
+NEAREST_GRID5 = dict(
+    source="{grid5}",
+    key="t.id",
+    columns=(
+        "f.id, f.grid, f.slug, f.centroid, f.envelope, f.lake_id, "
+        "l.abbrev, l.lake_name"
+    ),
+    joins="JOIN {grid5} f ON f.id = c.id JOIN {lake} l ON l.id = f.lake_id",
+    order="l.abbrev, f.grid",
+)
+
+
+def table_names():
+    """Return a dictionary of the database table names used in our raw
+    sql, so that the queries follow our model definitions."""
+
+    return dict(
+        lake=Lake._meta.db_table,
+        lake_subdivision=LakeSubdivision._meta.db_table,
+        grid5=Grid5._meta.db_table,
+        management_unit=ManagementUnit._meta.db_table,
+        lake_mu_type=LakeManagementUnitType._meta.db_table,
+        mu_type=ManagementUnitType._meta.db_table,
+    )
+
+
+def wkt_or_empty(value):
+    """Convert a geometry column returned by a raw query (hex ewkb) to
+    the same wkt string that the geodjango objects would return."""
+    if value is None:
+        return ""
+    return GEOSGeometry(value).wkt
+
+
+def grid5_dict(attrs):
+    """Convert the grid5 attributes returned by our grid5 lookup
+    (common.grid5_index.get_grid5_from_pt) to the grid5 element
+    returned by the spatial attribute lookups."""
+    if attrs is None:
+        return ""
+    return dict(
+        id=attrs["id"],
+        grid=attrs["grid"],
+        slug=attrs["slug"],
+        centroid=attrs["centroid"],
+        lake_abbrev=attrs["lake_abbrev"],
+    )
+
+
+def get_spatial_attrs(points, mu_type="stat_dist", include_grid5=True):
+    """Given a list of GEOS Points, return a list of dictionaries
+    containing the lake, management unit (of type mu_type) and
+    5-minute grid containing each point - in the same order as the
+    supplied points.  Each dictionary has the same structure as the
+    response returned by the pt_spatial_attrs view.  Elements that
+    could not be found are returned as empty strings.
+
+    All of the points are resolved in a single database query.  If
+    include_grid5 is False, the grids are not included in the query
+    (or the returned dictionaries) so they can be found some other
+    way.
+
+    """
+
+    if not points:
+        return []
+
+    params = dict(
+        lons=[pt.x for pt in points],
+        lats=[pt.y for pt in points],
+        mu_type=mu_type,
+    )
+    tables = table_names()
+    if include_grid5:
+        grid5_columns = GRID5_COLUMNS
+        grid5_join = GRID5_JOIN.format(**tables)
+    else:
+        grid5_columns = grid5_join = ""
+    sql = SPATIAL_ATTRS_SQL.format(
+        grid5_columns=grid5_columns, grid5_join=grid5_join, **tables
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for row in rows:
+        ret = dict()
+        if row[1] is not None:
+            ret["lake"] = dict(
+                id=row[1],
+                abbrev=row[2],
+                lake_name=row[3],
+                centroid=wkt_or_empty(row[4]),
+            )
+        else:
+            ret["lake"] = ""
+
+        if row[5] is not None:
+            ret["manUnit"] = dict(
+                id=row[5],
+                slug=row[6],
+                label=row[7],
+                centroid=wkt_or_empty(row[8]),
+            )
+        else:
+            ret["manUnit"] = ""
+
+        if include_grid5 and row[9] is not None:
+            ret["grid5"] = dict(
+                id=row[9],
+                grid=row[10],
+                slug=row[11],
+                centroid=wkt_or_empty(row[12]),
+                lake_abbrev=row[13],
+            )
+        elif include_grid5:
+            ret["grid5"] = ""
+        results.append(ret)
+
+    return results
+
+
+def get_spatial_totals(points, weights, mu_type="stat_dist"):
+    """Given a list of GEOS Points and a list of their weights, return a
+    dictionary containing the number of points and the sum of their
+    weights in each 5-minute grid and each management unit of type
+    mu_type that contains at least one of the points:
+
+    {"grid5": [{id, slug, grid, lake_abbrev, count, total}, ...],
+     "management_units": [{id, slug, label, lake_abbrev, count, total}, ...]}
+
+    The spatial join and aggregation of both layers are done in a
+    single database query.
+
+    """
+
+    totals = dict(grid5=[], management_units=[])
+    if not points:
+        return totals
+
+    params = dict(
+        lons=[pt.x for pt in points],
+        lats=[pt.y for pt in points],
+        weights=list(weights),
+        mu_type=mu_type,
+    )
+    sql = SPATIAL_TOTALS_SQL.format(**table_names())
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    for layer, pk, slug, label, lake_abbrev, count, total in rows:
+        if layer == "grid5":
+            totals["grid5"].append(
+                dict(
+                    id=pk,
+                    slug=slug,
+                    grid=label,
+                    lake_abbrev=lake_abbrev,
+                    count=count,
+                    total=total,
+                )
+            )
+        else:
+            totals["management_units"].append(
+                dict(
+                    id=pk,
+                    slug=slug,
+                    label=label,
+                    lake_abbrev=lake_abbrev,
+                    count=count,
+                    total=total,
+                )
+            )
+
+    return totals
+
+
+def snap_degrees(snap, lat):
+    """Return a distance in decimal degrees that is at least as large as
+    snap metres in any direction at the latitude lat.  Used to limit
+    the knn search with the spatial index before the exact distances
+    are calculated."""
+    metres_per_degree = 111320 * max(math.cos(math.radians(lat)), 0.01)
+    return snap / metres_per_degree
+
+
+def get_nearest_feature(layer, pt, snap):
+    """Return the row of the first feature of the layer that contains
+    the point, or the nearest feature within snap metres (or None)
+    - all in a single query.  The last element of the row is the
+    distance in metres (0 for containing features)."""
+
+    tables = table_names()
+    sql = NEAREST_FEATURE_SQL.format(
+        source=layer["source"].format(**tables),
+        key=layer["key"],
+        columns=layer["columns"],
+        joins=layer["joins"].format(**tables),
+        order=layer["order"],
+        candidates=NEAREST_CANDIDATES,
+    )
+    params = dict(
+        lon=pt.x, lat=pt.y, snap=snap, snap_degrees=snap_degrees(snap, pt.y)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchone()
+
+
+def get_nearest_lake(pt, snap):
+    """Return a dictionary containing the attributes of the lake that
+    contains the point, or the nearest lake within snap metres, and
+    its distance from the point in metres.  Returns None if there
+    isn't one."""
+
+    row = get_nearest_feature(NEAREST_LAKE, pt, snap)
+    if row is None:
+        return None
+    return dict(
+        id=row[0],
+        abbrev=row[1],
+        lake_name=row[2],
+        centroid=wkt_or_empty(row[3]),
+        envelope=wkt_or_empty(row[4]),
+        centroid_ontario=wkt_or_empty(row[5]),
+        envelope_ontario=wkt_or_empty(row[6]),
+        distance=row[7],
+    )
+
+
+def get_nearest_grid5(pt, snap):
+    """Return a dictionary containing the attributes of the grid that
+    contains the point, or the nearest grid within snap metres (with
+    the same keys returned by common.grid5_index.get_grid5_from_pt)
+    and its distance from the point in metres.  Returns None if there
+    isn't one."""
+
+    row = get_nearest_feature(NEAREST_GRID5, pt, snap)
+    if row is None:
+        return None
+    return dict(
+        id=row[0],
+        grid=row[1],
+        slug=row[2],
+        centroid=wkt_or_empty(row[3]),
+        envelope=wkt_or_empty(row[4]),
+        lake_id=row[5],
+        lake_abbrev=row[6],
+        lake_name=row[7],
+        distance=row[8],
+    )
@@ -0,0 +1,215 @@
+"""
+=============================================================
+~/uglmu_common/common/api/tiles.py
+
+ Description:
+
+  Mapbox vector tiles for our spatial layers (5-minute grids,
+  management units and lakes).  Tiles are built by postgis with
+  ST_AsMVT.  The geometries are clipped to the (buffered) tile in
+  lon-lat before they are transformed and simplified to the
+  resolution of the zoom level, so only the part of a large lake
+  inside the tile is processed.  At low zoom levels, one of our
+  precomputed simplified geometries (see GEOM_RESOLUTIONS) is used
+  instead of the full resolution geometry.
+
+  Rendered tiles are stored in the cache specified by the
+  COMMON_TILE_CACHE setting ("default" if not specified).  The cache
+  keys include the versions of the layer's model and of every model
+  whose attributes are embedded in its tiles (see common.cache_utils),
+  so cached tiles are ignored as soon as any of them change - e.g.
+  management unit tiles are replaced when a lake is renamed.
+
+=============================================================
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from ..cache_utils import versioned_key
+from ..models import (
+    Grid5,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnitType,
+)
+from ..models.spatial_models import GEOM_RESOLUTIONS
+
+MVT_CONTENT_TYPE = "application/vnd.mapbox-vector-tile"
+
+# the number of tile coordinates along each side of a tile
+TILE_EXTENT = 4096
+
+# the number of tile coordinates included around each tile
+TILE_BUFFER = 64
+
+# the circumference of the earth in web mercator metres
+WEB_MERCATOR_WIDTH = 40075016.68557849
+
+# web mercator metres per degree of longitude
+METRES_PER_DEGREE = WEB_MERCATOR_WIDTH / 360
+
+# a tile coordinate covers fewer degrees of latitude than longitude
+# (half as many at 60N - north of any of our lakes)
+LATITUDE_FACTOR = 2
+
+
+TILE_SQL = """
+WITH bounds AS (
+    SELECT ST_TileEnvelope(%(z)s, %(x)s, %(y)s) AS geom,
+        ST_Transform(
+            ST_Expand(ST_TileEnvelope(%(z)s, %(x)s, %(y)s), %(buffer)s), 4326
+        ) AS clip
+),
+features AS (
+    SELECT {columns},
+        ST_AsMVTGeom(
+            ST_Simplify(
+                ST_Transform(ST_ClipByBox2D({geom}, bounds.clip), 3857),
+                %(tolerance)s,
+                true
+            ),
+            bounds.geom,
+            {extent},
+            {buffer},
+            true
+        ) AS geom
+    FROM bounds, {table} t
+    {joins}
+    WHERE t.geom && bounds.clip {where}
+)
+SELECT ST_AsMVT(features.*, %(layer)s, {extent}, 'geom')
+FROM features
+WHERE features.geom IS NOT NULL
+"""
+
+TILE_LAYERS = {
+    "grid5": dict(
+        model=Grid5,
+        related_models=(Lake,),
+        columns="t.id, t.grid, t.slug, l.abbrev AS lake_abbrev",
+        joins="JOIN {lake} l ON l.id = t.lake_id",
+    ),
+    "management_unit": dict(
+        model=ManagementUnit,
+        related_models=(Lake, LakeManagementUnitType, ManagementUnitType),
+        columns=("t.id, t.slug, t.label, mut.slug AS mu_type, l.abbrev AS lake_abbrev"),
+        joins=(
+            "JOIN {lake} l ON l.id = t.lake_id "
+            "JOIN {lake_mu_type} lmt ON lmt.id = t.lake_management_unit_type_id "
+            "JOIN {mu_type} mut ON mut.id = lmt.management_unit_type_id"
+        ),
+    ),
+    "lake": dict(
+        model=Lake,
+        related_models=(),
+        columns="t.id, t.abbrev, t.lake_name",
+        joins="",
+    ),
+}
+
+
+def get_tile_cache():
+    return caches[getattr(settings, "COMMON_TILE_CACHE", "default")]
+
+
+def layer_models(layer):
+    """Return the models whose data is included in the tiles of the
+    layer - the layer's own model and the models joined to it."""
+    config = TILE_LAYERS[layer]
+    return [config["model"]] + list(config["related_models"])
+
+
+def simplify_tolerance(z):
+    """The tolerance used to simplify geometries at zoom level z - the
+    size of one tile coordinate in web mercator metres."""
+    return WEB_MERCATOR_WIDTH / (2**z) / TILE_EXTENT
+
+
+def tile_geom_column(z):
+    """Return the geometry used for tiles at zoom level z - the
+    coarsest of our precomputed simplified geometries that is finer
+    than one tile coordinate (falling back to the full geometry if it
+    is missing), or the full geometry at high zoom levels."""
+
+    degrees = simplify_tolerance(z) / METRES_PER_DEGREE / LATITUDE_FACTOR
+    for resolution in ("low", "medium", "high"):
+        if GEOM_RESOLUTIONS[resolution] <= degrees:
+            return "COALESCE(t.geom_{}, t.geom)".format(resolution)
+    return "t.geom"
+
+
+def render_tile(layer, z, x, y, mu_type=None):
+    """Build the vector tile for the layer at z/x/y and return it as
+    bytes.  Management unit tiles can be restricted to a single
+    management unit type with mu_type."""
+
+    config = TILE_LAYERS[layer]
+    tables = dict(
+        lake=Lake._meta.db_table,
+        lake_mu_type=LakeManagementUnitType._meta.db_table,
+        mu_type=ManagementUnitType._meta.db_table,
+    )
+
+    where = ""
+    tolerance = simplify_tolerance(z)
+    params = dict(
+        z=z,
+        x=x,
+        y=y,
+        tolerance=tolerance,
+        buffer=TILE_BUFFER * tolerance,
+        layer=layer,
+    )
+    if layer == "management_unit" and mu_type:
+        where = "AND mut.slug = %(mu_type)s"
+        params["mu_type"] = mu_type
+
+    sql = TILE_SQL.format(
+        columns=config["columns"],
+        geom=tile_geom_column(z),
+        table=config["model"]._meta.db_table,
+        joins=config["joins"].format(**tables),
+        where=where,
+        extent=TILE_EXTENT,
+        buffer=TILE_BUFFER,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+
+    return bytes(row[0]) if row and row[0] is not None else b""
+
+
+@require_GET
+def vector_tile(request, layer, z, x, y):
+    """Return a mapbox vector tile for one of our spatial layers
+    (grid5, management_unit or lake).  Management unit tiles can be
+    filtered by management unit type with the mu_type query
+    parameter (e.g. ?mu_type=qma).
+
+    """
+
+    if layer not in TILE_LAYERS:
+        raise Http404("Unknown tile layer: {}".format(layer))
+    if z > 24 or x >= 2**z or y >= 2**z:
+        raise Http404("Invalid tile coordinates.")
+
+    mu_type = request.GET.get("mu_type", "")
+    key = versioned_key(
+        "common_mvt", layer_models(layer), layer, mu_type, "{}/{}/{}".format(z, x, y)
+    )
+
+    cache = get_tile_cache()
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_tile(layer, z, x, y, mu_type=mu_type)
+        timeout = getattr(settings, "COMMON_TILE_CACHE_TIMEOUT", 60 * 60 * 24)
+        cache.set(key, tile, timeout)
+
+    return HttpResponse(tile, content_type=MVT_CONTENT_TYPE)
@@ -3,6 +3,11 @@
 from django.urls import path
 from rest_framework.routers import SimpleRouter
 
+from .biodata import convert_lengths_batch, validate_biodata_batch
+from .bundle import lookup_bundle
+from .changes import change_feed
+from .membership import grid5_membership
+from .tiles import vector_tile
 from .views import (
     SpeciesListView,  # LakeViewSet,
     SpeciesDetailView,
@@ -24,6 +29,8 @@ from .views import (
     get_management_unit_from_pt,
     get_grid5_from_pt,
     pt_spatial_attrs,
+    pt_spatial_attrs_batch,
+    pt_spatial_totals,
 )
 
 app_name = "common"
@@ -62,6 +69,7 @@ urlpatterns += [
     ),
     path("grid5s/", Grid5ListView.as_view(), name="grid5-list"),
     path("grid5/<slug:slug>", Grid5DetailView.as_view(), name="grid5-detail"),
+    path("grid5_membership/", grid5_membership, name="grid5-membership"),
     path("species/", SpeciesListView.as_view(), name="species-list"),
     path("taxon/", TaxonListView.as_view(), name="taxon-list"),
     path("species/<str:spc>", SpeciesDetailView.as_view(), name="species-detail"),
@@ -69,6 +77,9 @@ urlpatterns += [
     path("cover_types/", CoverTypeListView.as_view(), name="cover-type-list"),
     path("vessels/", VesselListView.as_view(), name="vessel-list"),
     path("flen2tlen/", Flen2TlenListView.as_view(), name="flen2tlen-list"),
+    path("flen2tlen/convert/", convert_lengths_batch, name="flen2tlen-convert"),
+    path("changes/", change_feed, name="change-feed"),
+    path("lookups/", lookup_bundle, name="lookup-bundle"),
     path("spatial_lookup/lake/", get_lake_from_pt, name="api-lookup-lake-from-pt"),
     path(
         "spatial_lookup/management_unit/",
@@ -76,5 +87,25 @@ urlpatterns += [
         name="api-lookup-management-unit-from-pt",
     ),
     path("spatial_lookup/grid5/", get_grid5_from_pt, name="api-lookup-grid5-from-pt"),
+    path(
+        "tiles/<str:layer>/<int:z>/<int:x>/<int:y>.mvt",
+        vector_tile,
+        name="vector-tile",
+    ),
     path("spatial_lookup/", pt_spatial_attrs, name="api-lookup-spatial-attrs"),
+    path(
+        "spatial_lookup/batch/",
+        pt_spatial_attrs_batch,
+        name="api-lookup-spatial-attrs-batch",
+    ),
+    path(
+        "spatial_lookup/totals/",
+        pt_spatial_totals,
+        name="api-spatial-totals",
+    ),
+    path(
+        "biodata/validate/",
+        validate_biodata_batch,
+        name="api-validate-biodata",
+    ),
 ]
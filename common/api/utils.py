@@ -11,7 +11,17 @@
 =============================================================
 """
 
+import json
+import math
+
+from datetime import datetime, time
+
+from django.conf import settings
 from django.contrib.gis.geos import Point, GEOSGeometry
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ..models.spatial_models import GEOM_RESOLUTIONS
 
 
 def parse_point(data):
@@ -19,6 +29,10 @@ def parse_point(data):
     the reqest data to a GEOSGeometry Point object.  If it cannot be
     coerced to a Point object return None.
 
+    data can be a wkt or geojson string, a geojson dictionary or a
+    [lon, lat] pair.  Points with coordinates that are not finite
+    (nan or inf) are not valid.
+
     TODOs:
 
     + consider including a meaningful error message if it cannot be
@@ -30,6 +44,18 @@ def parse_point(data):
     if data is None:
         return None
 
+    if isinstance(data, (list, tuple)):
+        try:
+            lon, lat = [float(x) for x in data]
+        except (TypeError, ValueError):
+            return None
+        if not (math.isfinite(lon) and math.isfinite(lat)):
+            return None
+        return Point(lon, lat, srid=4326)
+
+    if isinstance(data, dict):
+        data = json.dumps(data)
+
     try:
         pt = GEOSGeometry(data, srid=4326)
     except:
@@ -37,7 +63,203 @@ def parse_point(data):
         return None
 
     if isinstance(pt, Point):
+        if pt.empty or not (math.isfinite(pt.x) and math.isfinite(pt.y)):
+            return None
         return pt
     else:
         # the data was not a valid Point in either geojson or wkt
         return None
+
+
+def parse_request_point(request):
+    """A helper function used by the spatial lookup api views to get the
+    point from either a POST request ({"point": <wkt, geojson or [lon,
+    lat]>} in the request body), or a GET request (?point=<wkt or
+    geojson> or ?lon=<lon>&lat=<lat> in the query string).
+
+    The coordinates of points submitted with GET requests are rounded
+    to COMMON_LOOKUP_PRECISION decimal places (6 by default - about
+    10 cm) so equivalent requests return identical (and identically
+    cached) responses.  Returns None if the point cannot be parsed.
+
+    """
+
+    if request.method != "GET":
+        return parse_point(request.data.get("point"))
+
+    params = request.query_params
+    if "point" in params:
+        pt = parse_point(params.get("point"))
+    else:
+        pt = parse_point([params.get("lon"), params.get("lat")])
+    if pt is None:
+        return None
+
+    precision = getattr(settings, "COMMON_LOOKUP_PRECISION", 6)
+    return Point(round(pt.x, precision), round(pt.y, precision), srid=4326)
+
+
+def parse_points(data):
+    """A helper function used by the batch spatial lookup api views to
+    convert a list of submitted points to GEOSGeometry Point objects.
+    Each element of data should be a dictionary of the form:
+
+    {"id": <caller supplied id>, "point": <wkt, geojson or [lon, lat]>}
+
+    Returns a tuple containing a list of (id, Point) tuples for the
+    points that could be parsed, and a list of the ids of the elements
+    that could not.  Returns None if data is not a list.
+
+    """
+
+    if not isinstance(data, list):
+        return None
+
+    points = []
+    invalid = []
+    for item in data:
+        if not isinstance(item, dict):
+            invalid.append(None)
+            continue
+        pt = parse_point(item.get("point"))
+        if pt is None:
+            invalid.append(item.get("id"))
+        else:
+            points.append((item.get("id"), pt))
+
+    return points, invalid
+
+
+def parse_weighted_points(data):
+    """A helper function used by the spatial aggregation view to convert
+    a list of submitted points and their weights.  Each element of
+    data should be a dictionary of the form:
+
+    {"id": <caller supplied id>, "point": <wkt, geojson or [lon, lat]>,
+     "weight": <number - optional, defaults to 1>}
+
+    Returns a tuple containing a list of (id, Point, weight) tuples for
+    the points that could be parsed, and a list of the ids of the
+    elements that could not (either the point or the weight was
+    invalid - weights must be finite numbers).  Returns None if data
+    is not a list.
+
+    """
+
+    if not isinstance(data, list):
+        return None
+
+    points = []
+    invalid = []
+    for item in data:
+        if not isinstance(item, dict):
+            invalid.append(None)
+            continue
+        pt = parse_point(item.get("point"))
+        try:
+            weight = float(item.get("weight", 1))
+        except (TypeError, ValueError):
+            weight = None
+        if weight is not None and not math.isfinite(weight):
+            weight = None
+        if pt is None or weight is None:
+            invalid.append(item.get("id"))
+        else:
+            points.append((item.get("id"), pt, weight))
+
+    return points, invalid
+
+
+def parse_geom_resolution(query_params):
+    """A helper function used by the spatial lookup api views to get the
+    geometry resolution requested by the client.  Clients can request
+    one of our precomputed resolutions (?resolution=low, medium or
+    high) or a simplification tolerance in decimal degrees
+    (?tolerance=0.005).
+
+    Returns a (resolution, tolerance) tuple - either or both can be
+    None.  Raises a ValueError if the values are not valid.
+
+    """
+
+    resolution = query_params.get("resolution")
+    tolerance = query_params.get("tolerance")
+
+    if resolution is not None and resolution not in GEOM_RESOLUTIONS:
+        options = ", ".join(GEOM_RESOLUTIONS.keys())
+        raise ValueError(f"resolution must be one of {options}.")
+
+    if tolerance is not None:
+        try:
+            tolerance = float(tolerance)
+        except ValueError:
+            raise ValueError("tolerance must be a number.")
+        if tolerance < 0:
+            raise ValueError("tolerance must be positive.")
+
+    return resolution, tolerance
+
+
+def parse_snap(query_params):
+    """A helper function used by the spatial lookup api views to get the
+    snap distance (in metres) requested by the client (?snap=50).
+    Returns None if snap was not requested, and raises a ValueError if
+    the value is not a positive number or is larger than the
+    COMMON_MAX_SNAP_DISTANCE setting (5000 metres by default).
+
+    """
+
+    snap = query_params.get("snap")
+    if snap is None:
+        return None
+    try:
+        snap = float(snap)
+    except ValueError:
+        raise ValueError("snap must be a number (metres).")
+    max_snap = getattr(settings, "COMMON_MAX_SNAP_DISTANCE", 5000)
+    if snap < 0 or snap > max_snap:
+        raise ValueError(f"snap must be between 0 and {max_snap} metres.")
+    return snap
+
+
+def geom_geojson(geom):
+    """Return the geojson representation of a geometry that may be
+    None."""
+    return geom.geojson if geom else ""
+
+
+def parse_timestamp(value):
+    """A helper function used to parse the timestamps passed to our
+    api as query parameters (e.g. ?modified_since=2021-03-01T12:00:00Z).
+    Dates without a time are interpreted as midnight, and timestamps
+    without a timezone are assumed to be in our current timezone.
+
+    Raises a ValueError if the value is not a valid date or timestamp.
+
+    """
+
+    value = value.strip()
+    # a '+' in a utc offset is decoded as a space if it isn't escaped:
+    candidates = [value]
+    if " " in value:
+        head, tail = value.rsplit(" ", 1)
+        candidates.append(head + "+" + tail)
+
+    timestamp = None
+    for candidate in candidates:
+        try:
+            timestamp = parse_datetime(candidate)
+            if timestamp is None:
+                date = parse_date(candidate)
+                timestamp = datetime.combine(date, time()) if date else None
+        except ValueError:
+            timestamp = None
+        if timestamp is not None:
+            break
+
+    if timestamp is None:
+        raise ValueError(f"'{value}' is not a valid date or timestamp.")
+
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    return timestamp
@@ -4,16 +4,23 @@ The veiws in this file should all be publicly available as readonly.
 
 """
 
+from django.conf import settings
 from django.db.models import F, Case, Value, When
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
+from ..grid5_index import GRID5_LOOKUP_DB, grid5_lookup_method
+from ..grid5_index import get_grid5_from_pt as find_grid5
+from ..models.spatial_models import simplify_geom
 from ..models import (
     Grid5,
+    Grid5Lattice,
     Lake,
+    LakeSubdivision,
     LakeManagementUnitType,
     ManagementUnit,
     ManagementUnitType,
@@ -23,6 +30,7 @@ from ..models import (
     CoverType,
     Vessel
 )
+from .decorators import cacheable_lookup
 from .filters import (
     Grid5Filter,
     LakeFilter,
@@ -30,7 +38,17 @@ from .filters import (
     SpeciesFilter,
     TaxonFilter,
     LakeManagementUnitTypeFilter,
+    ModifiedSinceFilterBackend,
 )
+from .mixins import (
+    CachedResponseMixin,
+    ConditionalListMixin,
+    KeysetPaginationMixin,
+    SparseFieldsMixin,
+    StreamingListMixin,
+)
+from .point_memo import MEMO_MODELS, get_point_attrs
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import (
     Flen2TlenSerializer,
     Grid5DetailSerializer,
@@ -45,7 +63,23 @@ from .serializers import (
     TaxonSerializer,
     LookupTableSerializer,
 )
-from .utils import parse_point
+from .spatial_queries import (
+    get_nearest_grid5,
+    get_nearest_lake,
+    get_spatial_totals,
+)
+from .utils import (
+    geom_geojson,
+    parse_geom_resolution,
+    parse_points,
+    parse_request_point,
+    parse_snap,
+    parse_weighted_points,
+)
+
+# the maximum number of points that can be submitted to the batch
+# spatial lookup endpoint in a single request.
+SPATIAL_BATCH_MAX_POINTS = getattr(settings, "COMMON_SPATIAL_BATCH_MAX_POINTS", 50000)
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -54,7 +88,57 @@ class StandardResultsSetPagination(PageNumberPagination):
     max_page_size = 1000
 
 
-class LakeListView(generics.ListAPIView):
+# the renderers used by list views that can stream their records
+STREAMING_RENDERER_CLASSES = list(api_settings.DEFAULT_RENDERER_CLASSES) + [
+    NDJSONRenderer,
+    CSVRenderer,
+]
+
+
+class KeysetPagination(CursorPagination):
+    """Keyset pagination for clients that need to walk through an entire
+    table.  Each page is retrieved with an indexed range query on the
+    view's cursor_ordering field rather than an OFFSET, and no count
+    query is required.  The cursors are opaque, and remain stable if
+    records are added or removed between requests.
+
+    """
+
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        return (view.cursor_ordering,)
+
+
+class CommonListAPIView(
+    CachedResponseMixin,
+    ConditionalListMixin,
+    StreamingListMixin,
+    KeysetPaginationMixin,
+    SparseFieldsMixin,
+    generics.ListAPIView,
+):
+    """The base class for our list views - adds conditional GET support,
+    server side response caching, streaming output, optional keyset
+    pagination, sparse fieldsets (see api.mixins) and the
+    modified_since filter."""
+
+    cursor_pagination_class = KeysetPagination
+    filter_backends = list(api_settings.DEFAULT_FILTER_BACKENDS) + [
+        ModifiedSinceFilterBackend
+    ]
+
+
+class CommonRetrieveAPIView(
+    CachedResponseMixin, SparseFieldsMixin, generics.RetrieveAPIView
+):
+    """The base class for our detail views - adds server side response
+    caching and sparse fieldsets (see api.mixins)."""
+
+
+class LakeListView(CommonListAPIView):
 
     pagination_class = None
     queryset = Lake.objects.all()
@@ -62,25 +146,26 @@ class LakeListView(generics.ListAPIView):
     filterset_class = LakeFilter
 
 
-class LakeDetailView(generics.RetrieveAPIView):
+class LakeDetailView(CommonRetrieveAPIView):
 
     queryset = Lake.objects.all()
     serializer_class = LakeDetailSerializer
     lookup_field = "abbrev"
 
 
-class ManagementUnitTypeListView(generics.ListAPIView):
+class ManagementUnitTypeListView(CommonListAPIView):
 
     queryset = ManagementUnitType.objects.all()
     serializer_class = ManagementUnitTypeSerializer
     pagination_class = None
 
 
-class LakeManagementUnitTypeListView(generics.ListAPIView):
+class LakeManagementUnitTypeListView(CommonListAPIView):
 
     serializer_class = LakeManagementUnitTypeSerializer
     filterset_class = LakeManagementUnitTypeFilter
     pagination_class = None
+    related_models = (Lake, ManagementUnitType)
 
     def get_queryset(self):
         qs = (
@@ -104,11 +189,14 @@ class LakeManagementUnitTypeListView(generics.ListAPIView):
         return qs
 
 
-class ManagementUnitListView(generics.ListAPIView):
+class ManagementUnitListView(CommonListAPIView):
 
     pagination_class = StandardResultsSetPagination
+    renderer_classes = STREAMING_RENDERER_CLASSES
+    cursor_ordering = "slug"
     serializer_class = ManagementUnitSerializer
     filterset_class = ManagementUnitFilter
+    related_models = (Lake, LakeManagementUnitType, ManagementUnitType)
 
     def get_queryset(self):
         qs = (
@@ -134,10 +222,11 @@ class ManagementUnitListView(generics.ListAPIView):
         return qs
 
 
-class ManagementUnitDetailView(generics.RetrieveAPIView):
+class ManagementUnitDetailView(CommonRetrieveAPIView):
 
     serializer_class = ManagementUnitSerializer
     lookup_field = "slug"
+    related_models = (Lake, LakeManagementUnitType, ManagementUnitType)
 
     def get_queryset(self):
         qs = (
@@ -163,12 +252,15 @@ class ManagementUnitDetailView(generics.RetrieveAPIView):
         return qs
 
 
-class Grid5ListView(generics.ListAPIView):
+class Grid5ListView(CommonListAPIView):
 
     pagination_class = StandardResultsSetPagination
+    renderer_classes = STREAMING_RENDERER_CLASSES
+    cursor_ordering = "slug"
     # queryset = Grid5.objects.all().prefetch_related("lake")
     serializer_class = Grid5Serializer
     filterset_class = Grid5Filter
+    related_models = (Lake,)
 
     def get_queryset(self):
         qs = Grid5.objects.annotate(lake_abbrev=F("lake__abbrev"),).values(
@@ -181,14 +273,15 @@ class Grid5ListView(generics.ListAPIView):
         return qs
 
 
-class Grid5DetailView(generics.RetrieveAPIView):
+class Grid5DetailView(CommonRetrieveAPIView):
 
     queryset = Grid5.objects.all()
     serializer_class = Grid5DetailSerializer
     lookup_field = "slug"
+    related_models = (Lake,)
 
 
-class SpeciesListView(generics.ListAPIView):
+class SpeciesListView(CommonListAPIView):
 
     queryset = Species.objects.all()
     serializer_class = SpeciesSerializer
@@ -196,22 +289,26 @@ class SpeciesListView(generics.ListAPIView):
     pagination_class = None
 
 
-class SpeciesDetailView(generics.RetrieveAPIView):
+class SpeciesDetailView(CommonRetrieveAPIView):
 
     queryset = Species.objects.all()
     serializer_class = SpeciesDetailSerializer
     lookup_field = "spc"
 
 
-class TaxonListView(generics.ListAPIView):
+class TaxonListView(CommonListAPIView):
 
     serializer_class = TaxonSerializer
     pagination_class = StandardResultsSetPagination
+    renderer_classes = STREAMING_RENDERER_CLASSES
+    cursor_ordering = "path"
     filterset_class = TaxonFilter
 
     def get_queryset(self):
 
+        # path is only used by our keyset pagination:
         qs = Taxon.objects.all().values(
+            "path",
             "taxon",
             "itiscode",
             "taxon_name",
@@ -223,7 +320,7 @@ class TaxonListView(generics.ListAPIView):
         return qs
 
 
-class BottomTypeListView(generics.ListAPIView):
+class BottomTypeListView(CommonListAPIView):
 
     serializer_class = LookupTableSerializer
     pagination_class = None
@@ -254,7 +351,7 @@ class BottomTypeListView(generics.ListAPIView):
         return qs
 
 
-class CoverTypeListView(generics.ListAPIView):
+class CoverTypeListView(CommonListAPIView):
 
     serializer_class = LookupTableSerializer
     pagination_class = None
@@ -287,7 +384,7 @@ class CoverTypeListView(generics.ListAPIView):
         return qs
 
 
-class VesselListView(generics.ListAPIView):
+class VesselListView(CommonListAPIView):
 
     serializer_class = LookupTableSerializer
     pagination_class = None
@@ -319,10 +416,11 @@ class VesselListView(generics.ListAPIView):
 
 
 
-class Flen2TlenListView(generics.ListAPIView):
+class Flen2TlenListView(CommonListAPIView):
     """An api endpoint that returns the flen-tlen regression coefficents
     for our species. Uses a species filter to select subsets based on
-    species name or species code.
+    species name or species code.  Batches of lengths can be
+    converted with the flen2tlen/convert/ endpoint.
 
     """
 
@@ -336,8 +434,9 @@ class Flen2TlenListView(generics.ListAPIView):
     pagination_class = None
 
 
-@api_view(["POST"])
+@api_view(["GET", "POST"])
 @permission_classes([AllowAny])
+@cacheable_lookup(Lake, LakeSubdivision)
 def get_lake_from_pt(request):
     """This function accepts post requests that contain a geojson
     representation of a point.  The view returns a dictionary contianing
@@ -345,46 +444,87 @@ def get_lake_from_pt(request):
     containing the point, or an empty dictionary if the dat is not geojson
     or falls outside of any lake.
 
+    The lake geometry is included if the query parameter geom=geom (or
+    geom=geom_ontario) is provided.  The geometry can be simplified by
+    requesting one of our precomputed resolutions (?resolution=low,
+    medium or high) or a tolerance in decimal degrees (?tolerance=0.01).
+    Only the tolerance option applies to geom_ontario.
+
+    If the point does not fall in any lake, the nearest lake within a
+    tolerance can be returned by including the tolerance in metres
+    in the snap query parameter (e.g. ?snap=100).  The response then
+    includes the distance (in metres) from the point to the lake - 0
+    if the lake contains the point.
+
+    The point can also be included in the query string of a GET
+    request (?point=POINT(-81.5 44.5) or ?lon=-81.5&lat=44.5).  GET
+    responses include ETag and Cache-Control headers so repeated
+    lookups can be served by browsers and proxies (see
+    common.api.decorators).
+
     TODO: add options for 'pure' and 'plus' geometries
 
     """
 
     geom = request.query_params.get("geom")
-    pt = parse_point(request.data.get("point"))
+    pt = parse_request_point(request)
     if pt is None:
         return Response({}, status=status.HTTP_400_BAD_REQUEST)
 
-    lake = Lake.objects.filter(geom__contains=pt).first()
-
-    if lake:
-        ret = dict(
-            id=lake.id,
-            abbrev=lake.abbrev,
-            lake_name=lake.lake_name,
-            centroid=lake.centroid.wkt if lake.centroid else "",
-            envelope=lake.envelope.wkt if lake.envelope else "",
-            centroid_ontario=lake.centroid_ontario.wkt if lake.centroid_ontario else "",
-            envelope_ontario=lake.envelope_ontario.wkt if lake.envelope_ontario else "",
-        )
-
-        # return one geom or the other - not both
-        if geom == "geom":
-            ret["geom"] = lake.geom.geojson
-        elif geom == "geom_ontario":
-            ret["geom"] = lake.geom_ontario.geojson
-
-        return Response(ret, status=status.HTTP_200_OK)
+    try:
+        resolution, tolerance = parse_geom_resolution(request.query_params)
+        snap = parse_snap(request.query_params)
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if snap is None:
+        # our subdivided lake pieces are much faster to search than the
+        # complete lake geometries.  Points on the seams between two
+        # pieces are not contained by either, so use intersects.
+        lake = Lake.objects.filter(subdivisions__geom__intersects=pt).first()
+        ret = None
+        if lake:
+            ret = dict(
+                id=lake.id,
+                abbrev=lake.abbrev,
+                lake_name=lake.lake_name,
+                centroid=lake.centroid.wkt if lake.centroid else "",
+                envelope=lake.envelope.wkt if lake.envelope else "",
+                centroid_ontario=lake.centroid_ontario.wkt
+                if lake.centroid_ontario
+                else "",
+                envelope_ontario=lake.envelope_ontario.wkt
+                if lake.envelope_ontario
+                else "",
+            )
     else:
+        # the containing lake or the nearest lake within snap metres:
+        ret = get_nearest_lake(pt, snap)
+        lake = Lake.objects.get(pk=ret["id"]) if ret and geom else None
+
+    if ret is None:
         # no lake object could be associated with that point.
-        # 400
         return Response({}, status=status.HTTP_404_NOT_FOUND)
 
+    # return one geom or the other - not both
+    if geom == "geom":
+        ret["geom"] = geom_geojson(lake.get_geom(resolution, tolerance))
+    elif geom == "geom_ontario" and tolerance:
+        ret["geom"] = geom_geojson(simplify_geom(lake.geom_ontario, tolerance))
+    elif geom == "geom_ontario":
+        ret["geom"] = lake.geom_ontario.geojson
+
+    return Response(ret, status=status.HTTP_200_OK)
+
 
-def manUnit_dict(obj, geom=None):
+def manUnit_dict(obj, geom=None, resolution=None, tolerance=None):
     """Serialize a management unit to a python dictionary
 
     Arguments:
     - `obj`: a ManagementUnit instance
+    - `geom`: include the geometry if geom == "geom"
+    - `resolution`: the precomputed geometry resolution to return
+    - `tolerance`: the tolerance used to simplify the geometry
     """
     item = dict(
         id=obj.id,
@@ -397,13 +537,16 @@ def manUnit_dict(obj, geom=None):
         envelope=obj.envelope.wkt,
     )
     if geom == "geom":
-        item["geom"] = obj.geom.geojson
+        item["geom"] = geom_geojson(obj.get_geom(resolution, tolerance))
 
     return item
 
 
-@api_view(["POST"])
+@api_view(["GET", "POST"])
 @permission_classes([AllowAny])
+@cacheable_lookup(
+    ManagementUnit, Lake, LakeManagementUnitType, ManagementUnitType
+)
 def get_management_unit_from_pt(request):
     """This function accepts post requests that contains a geojson
     representation of a point.  The view returns a dictionary contianing
@@ -418,6 +561,12 @@ def get_management_unit_from_pt(request):
     the request, the management_unit with primary=True is returned by
     default.
 
+    The geometry of the management unit is included if geom=geom is
+    included in the query parameters.  Simplified geometries can be
+    requested with the resolution or tolerance parameters (see
+    get_lake_from_pt).  Like get_lake_from_pt, the point can also be
+    provided with a cacheable GET request.
+
     TODO: add options for 'pure' and 'plus' geometries
 
     """
@@ -425,10 +574,15 @@ def get_management_unit_from_pt(request):
     mu_type = request.query_params.get("mu_type")
     all_mus = request.query_params.get("all")
 
-    pt = parse_point(request.data.get("point"))
+    pt = parse_request_point(request)
     if pt is None:
         return Response({}, status=status.HTTP_400_BAD_REQUEST)
 
+    try:
+        resolution, tolerance = parse_geom_resolution(request.query_params)
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
     qs = ManagementUnit.objects.select_related(
         "lake_management_unit_type", "lake_management_unit_type__management_unit_type"
     ).filter(geom__contains=pt)
@@ -444,9 +598,9 @@ def get_management_unit_from_pt(request):
 
     if qs:
         if all_mus:
-            ret = [manUnit_dict(x, geom) for x in qs]
+            ret = [manUnit_dict(x, geom, resolution, tolerance) for x in qs]
         else:
-            ret = manUnit_dict(qs, geom)
+            ret = manUnit_dict(qs, geom, resolution, tolerance)
 
         return Response(ret, status=status.HTTP_200_OK)
     else:
@@ -455,8 +609,9 @@ def get_management_unit_from_pt(request):
         return Response({}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(["POST"])
+@api_view(["GET", "POST"])
 @permission_classes([AllowAny])
+@cacheable_lookup(Grid5, Grid5Lattice, Lake)
 def get_grid5_from_pt(request):
     """This function accepts post requests that contain a geojson
     representation of a point.  The view returns a dictionary contianing
@@ -468,32 +623,57 @@ def get_grid5_from_pt(request):
 
     {"point": "POINT(-81.5 44.5)"}
 
+    The grid geometry is included if geom=geom is included in the
+    query parameters.  Simplified geometries can be requested with
+    the resolution or tolerance parameters, and the nearest grid can
+    be returned for points that are not in any grid with the snap
+    parameter (see get_lake_from_pt).  The point can also be provided
+    with a cacheable GET request (?lon=-81.5&lat=44.5).
+
     """
 
-    pt = parse_point(request.data.get("point"))
+    pt = parse_request_point(request)
     if pt is None:
         return Response({}, status=status.HTTP_400_BAD_REQUEST)
 
-    grid5 = Grid5.objects.select_related("lake").filter(geom__contains=pt).first()
+    try:
+        resolution, tolerance = parse_geom_resolution(request.query_params)
+        snap = parse_snap(request.query_params)
+    except ValueError as err:
+        return Response({"detail": str(err)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if snap is not None and grid5_lookup_method() == GRID5_LOOKUP_DB:
+        # containment and the nearest grid in one query:
+        grid5 = get_nearest_grid5(pt, snap)
+    else:
+        grid5 = find_grid5(pt)
+        if grid5 is not None and snap is not None:
+            grid5["distance"] = 0.0
+        elif snap is not None:
+            grid5 = get_nearest_grid5(pt, snap)
 
     geom = request.query_params.get("geom")
 
     if grid5:
         ret = dict(
-            id=grid5.id,
-            grid=grid5.grid,
-            slug=grid5.slug,
-            centroid=grid5.centroid.wkt,
-            envelope=grid5.envelope.wkt,
+            id=grid5["id"],
+            grid=grid5["grid"],
+            slug=grid5["slug"],
+            centroid=grid5["centroid"],
+            envelope=grid5["envelope"],
             # lake attributes:
             lake=dict(
-                lake_id=grid5.lake.id,
-                lake_abbrev=grid5.lake.abbrev,
-                lake_name=grid5.lake.lake_name,
+                lake_id=grid5["lake_id"],
+                lake_abbrev=grid5["lake_abbrev"],
+                lake_name=grid5["lake_name"],
             ),
         )
+        if snap is not None:
+            ret["distance"] = grid5["distance"]
         if geom == "geom":
-            ret["geom"] = grid5.geom.geojson
+            field = f"geom_{resolution}" if resolution else "geom"
+            obj = Grid5.objects.only(field).get(pk=grid5["id"])
+            ret["geom"] = geom_geojson(obj.get_geom(resolution, tolerance))
 
         return Response(ret, status=status.HTTP_200_OK)
     else:
@@ -502,8 +682,9 @@ def get_grid5_from_pt(request):
         return Response({}, status=status.HTTP_404_NOT_FOUND)
 
 
-@api_view(["POST"])
+@api_view(["GET", "POST"])
 @permission_classes([AllowAny])
+@cacheable_lookup(*MEMO_MODELS)
 def pt_spatial_attrs(request):
     """This function accepts post requests that contain a geojson
     representation of a point and returns a dictionary containing the
@@ -518,53 +699,113 @@ def pt_spatial_attrs(request):
 
     {"point": "POINT(-81.5 44.5)"}
 
+    or a GET request of the form ?point=POINT(-81.5 44.5) or
+    ?lon=-81.5&lat=44.5 - GET responses can be cached by browsers and
+    proxies until our geometries change.
+
+    The lake, statistical district and grid are all resolved in a
+    single database query.
+
     TODO: implement the mangement unit array.
 
     """
 
-    pt = parse_point(request.data.get("point"))
+    pt = parse_request_point(request)
     if pt is None:
         return Response({}, status=status.HTTP_400_BAD_REQUEST)
 
-    ret = dict()
+    # the lake, stat_dist and (unless they come from our index or
+    # lattices) the grid are all found in a single query - or from
+    # our point memo if the point has been resolved before.
+    ret = get_point_attrs([pt], mu_type="stat_dist")[0]
 
-    lake = Lake.objects.filter(geom__contains=pt).first()
-    if lake:
-        ret["lake"] = dict(
-            id=lake.id,
-            abbrev=lake.abbrev,
-            lake_name=lake.lake_name,
-            centroid=lake.centroid.wkt,
-        )
-    else:
-        ret["lake"] = ""
+    return Response(ret, status=status.HTTP_200_OK)
 
-    manUnit = (
-        ManagementUnit.objects.filter(geom__contains=pt)
-        .filter(lake_management_unit_type__management_unit_type__slug="stat_dist")
-        .first()
-    )
-    if manUnit:
-        ret["manUnit"] = dict(
-            id=manUnit.id,
-            slug=manUnit.slug,
-            label=manUnit.label,
-            centroid=manUnit.centroid.wkt,
-        )
-    else:
-        ret["manUnit"] = ""
 
-    grid5 = Grid5.objects.select_related("lake").filter(geom__contains=pt).first()
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def pt_spatial_attrs_batch(request):
+    """This function accepts post requests that contain an array of
+    points and returns the basic lake, management unit and 5-minute
+    grid that contain each of them.  Each point must include a caller
+    supplied id that is returned with its spatial attributes.  Points
+    can be wkt, geojson or [lon, lat] pairs.
 
-    if grid5:
-        ret["grid5"] = dict(
-            id=grid5.id,
-            grid=grid5.grid,
-            slug=grid5.slug,
-            centroid=grid5.centroid.wkt,
-            lake_abbrev=grid5.lake.abbrev,
-        )
-    else:
-        ret["grid5"] = ""
+    post data should contain a json string of the form:
 
-    return Response(ret, status=status.HTTP_200_OK)
+    {"points": [
+        {"id": 1, "point": "POINT(-81.5 44.5)"},
+        {"id": 2, "point": {"type": "Point", "coordinates": [-81.5, 44.5]}},
+        {"id": 3, "point": [-81.5, 44.5]}
+        ]
+    }
+
+    The response contains a list of dictionaries with the keys id,
+    lake, manUnit and grid5 (with the same structure returned by
+    pt_spatial_attrs), and a list of the ids of any points that could
+    not be parsed. The management unit type defaults to stat_dist, but
+    can be changed with the mu_type query parameter.
+
+    All of the points are resolved in one database query (points that
+    are already in our point memo are not queried at all - see
+    common.api.point_memo).
+
+    """
+
+    mu_type = request.query_params.get("mu_type", "stat_dist")
+
+    parsed = parse_points(request.data.get("points"))
+    if parsed is None:
+        return Response({}, status=status.HTTP_400_BAD_REQUEST)
+
+    points, invalid = parsed
+    if len(points) + len(invalid) > SPATIAL_BATCH_MAX_POINTS:
+        msg = f"A maximum of {SPATIAL_BATCH_MAX_POINTS} points can be submitted."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    # points that are not in our point memo are resolved together
+    attrs = get_point_attrs([pt for pt_id, pt in points], mu_type=mu_type)
+    results = [dict(id=pt_id, **item) for (pt_id, pt), item in zip(points, attrs)]
+
+    return Response(dict(results=results, invalid=invalid), status=status.HTTP_200_OK)
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def pt_spatial_totals(request):
+    """This function accepts post requests that contain a list of
+    weighted points:
+
+    {"points": [{"id": 1, "point": "POINT(-81.5 44.5)", "weight": 12}, ...]}
+
+    and returns the number of points and the sum of their weights in
+    each 5-minute grid and management unit (of the type specified by
+    the mu_type query parameter - stat_dist by default) that contains
+    any of the points.  Points without a weight are counted with a
+    weight of 1.  The ids of any points (or weights) that could not
+    be parsed are returned in 'invalid'.
+
+    The points are joined to the grids and management units and
+    summarized in one database query.
+
+    """
+
+    mu_type = request.query_params.get("mu_type", "stat_dist")
+
+    parsed = parse_weighted_points(request.data.get("points"))
+    if parsed is None:
+        return Response({}, status=status.HTTP_400_BAD_REQUEST)
+
+    points, invalid = parsed
+    if len(points) + len(invalid) > SPATIAL_BATCH_MAX_POINTS:
+        msg = f"A maximum of {SPATIAL_BATCH_MAX_POINTS} points can be submitted."
+        return Response({"detail": msg}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = get_spatial_totals(
+        [pt for pt_id, pt, weight in points],
+        [weight for pt_id, pt, weight in points],
+        mu_type=mu_type,
+    )
+    totals["invalid"] = invalid
+
+    return Response(totals, status=status.HTTP_200_OK)
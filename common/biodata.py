@@ -0,0 +1,173 @@
+"""
+=============================================================
+~/uglmu_common/common/biodata.py
+
+ Description:
+
+  Vectorized validation of biological data (FN125 fish attributes)
+  against the FN012 limits stored with each species - the range of
+  fork length, total length and round weight, and the warning and
+  error thresholds of Fulton's condition factor:
+
+      K = 100000 * RWT / LEN^3
+
+  Low values of K are calculated with TLEN and high values with FLEN
+  (following the FN012 conventions).
+
+  Batches are validated as columns of numpy arrays - the limits of
+  each species are stored in a single array (part of our cached
+  species snapshot - see common.species_cache) and broadcast to the fish
+  by indexing it with the species of each fish, so a batch of any
+  size is validated without a python loop over the fish.
+
+  Missing values (None or nan) are never flagged, and neither are
+  limits that have not been specified for a species.  Fish with
+  species codes that are not in our species table are flagged as
+  unknown_spc.
+
+  convert_lengths() uses the same array to convert fork lengths to
+  total lengths (or total lengths to fork lengths) with the
+  flen-tlen regression of each species:
+
+      TLEN = alpha + beta * FLEN
+
+=============================================================
+"""
+
+import numpy as np
+
+from .species_cache import get_species_snapshot
+
+LENGTH_CONVERSIONS = ("flen2tlen", "tlen2flen")
+
+# the flags returned by validate_biodata() and the limit each of them
+# is compared to
+RANGE_FLAGS = (
+    ("flen_low", "flen", "flen_min", np.less),
+    ("flen_high", "flen", "flen_max", np.greater),
+    ("tlen_low", "tlen", "tlen_min", np.less),
+    ("tlen_high", "tlen", "tlen_max", np.greater),
+    ("rwt_low", "rwt", "rwt_min", np.less),
+    ("rwt_high", "rwt", "rwt_max", np.greater),
+    ("k_low_error", "k_tlen", "k_min_error", np.less),
+    ("k_low_warn", "k_tlen", "k_min_warn", np.less),
+    ("k_high_error", "k_flen", "k_max_error", np.greater),
+    ("k_high_warn", "k_flen", "k_max_warn", np.greater),
+)
+
+BIODATA_FLAGS = tuple(x[0] for x in RANGE_FLAGS) + ("unknown_spc",)
+
+
+def get_species_limits():
+    """Return the SpeciesLimits of the current version of our species
+    table (see common.species_cache)."""
+    return get_species_snapshot().limits
+
+
+def normalize_spc(values):
+    """Convert a sequence of species codes to an array of three
+    character strings (81 and "81" both become "081")."""
+    return np.array(
+        ["" if x is None else str(x).zfill(3) for x in values], dtype=str
+    ).reshape(-1)
+
+
+def as_float_array(values, size):
+    """Convert a sequence of numbers (that may include None) to a float
+    array - missing columns are all nan.  Raises a ValueError if the
+    values are not numbers or there are not size of them."""
+    if values is None:
+        return np.full(size, np.nan)
+    try:
+        values = np.array(values, dtype=float).reshape(-1)
+    except (TypeError, ValueError):
+        raise ValueError("values must be numbers.")
+    if values.size != size:
+        raise ValueError("each column must be the same length as spc.")
+    return values
+
+
+def condition_factor(rwt, length):
+    """Return Fulton's condition factor of each fish - nan if the weight
+    or length is missing (or the length is 0)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = 100000 * rwt / length**3
+    k[~np.isfinite(k)] = np.nan
+    return k
+
+
+def validate_biodata(spc, flen=None, tlen=None, rwt=None, limits=None):
+    """Validate a batch of fish against the FN012 limits of their
+    species.  spc is a sequence of species codes and flen, tlen and
+    rwt are sequences of the same length (or None) - all elements can
+    be None.
+
+    Returns a dictionary containing a boolean array for each of the
+    flags in BIODATA_FLAGS (True if the fish fails the check), and the
+    condition factors of each fish calculated from fork length
+    (k_flen) and total length (k_tlen).
+
+    Raises a ValueError if the columns are not numbers or are not the
+    same length.
+
+    """
+
+    if limits is None:
+        limits = get_species_limits()
+
+    spc = normalize_spc(spc)
+    columns = dict(
+        flen=as_float_array(flen, spc.size),
+        tlen=as_float_array(tlen, spc.size),
+        rwt=as_float_array(rwt, spc.size),
+    )
+    columns["k_flen"] = condition_factor(columns["rwt"], columns["flen"])
+    columns["k_tlen"] = condition_factor(columns["rwt"], columns["tlen"])
+
+    rows = limits.row_indices(spc)
+    flags = {}
+    with np.errstate(invalid="ignore"):
+        for flag, column, field, compare in RANGE_FLAGS:
+            # comparisons with nan (missing values or limits) are False
+            flags[flag] = compare(columns[column], limits.column(field)[rows])
+    flags["unknown_spc"] = rows == len(limits.codes)
+
+    flags["k_flen"] = columns["k_flen"]
+    flags["k_tlen"] = columns["k_tlen"]
+    return flags
+
+
+def convert_lengths(spc, lengths, conversion="flen2tlen", limits=None):
+    """Convert a batch of fork lengths to total lengths (conversion =
+    'flen2tlen') or total lengths to fork lengths ('tlen2flen') using
+    the flen-tlen regression of each species.  spc and lengths are
+    sequences of the same length.
+
+    Returns a float array of the converted lengths - nan if the length
+    is missing, the species does not have regression coefficients or
+    the result is not finite (e.g. the length was inf).
+    Raises a ValueError if the conversion is not valid or the lengths
+    are not numbers.
+
+    """
+
+    if conversion not in LENGTH_CONVERSIONS:
+        options = ", ".join(LENGTH_CONVERSIONS)
+        raise ValueError(f"conversion must be one of {options}.")
+
+    if limits is None:
+        limits = get_species_limits()
+
+    spc = normalize_spc(spc)
+    lengths = as_float_array(lengths, spc.size)
+    rows = limits.row_indices(spc)
+    alpha = limits.column("flen2tlen_alpha")[rows]
+    beta = limits.column("flen2tlen_beta")[rows]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if conversion == "flen2tlen":
+            converted = alpha + beta * lengths
+        else:
+            converted = (lengths - alpha) / beta
+    converted[~np.isfinite(converted)] = np.nan
+    return converted
@@ -0,0 +1,80 @@
+"""
+=============================================================
+~/uglmu_common/common/cache_utils.py
+
+ Description:
+
+  Model version keys used to invalidate cached data derived from
+  our models (rendered api responses, lookup tables, indexes ect.).
+
+  Each model in the common application has a version stored in the
+  cache specified by the COMMON_VERSION_CACHE setting ("default" if
+  not specified).  The version is replaced with a new random value
+  whenever an object is saved or deleted, or a many-to-many
+  relationship is changed (see common.signals).  Cache keys that
+  include the versions of the models they depend on are never
+  served once any of those models change, and because the versions
+  are stored in the shared cache, all of our processes see the
+  change.
+
+  Note - queryset.update() and bulk_update() do not send signals -
+  call bump_model_version() after using them.
+
+=============================================================
+"""
+
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+def get_version_cache():
+    return caches[getattr(settings, "COMMON_VERSION_CACHE", "default")]
+
+
+def version_key(model):
+    return "common_version:{}".format(model._meta.label_lower)
+
+
+def new_version():
+    return uuid.uuid4().hex
+
+
+def model_versions(*models):
+    """Return a list containing the current version of each model -
+    creating any versions that do not exist yet."""
+
+    cache = get_version_cache()
+    keys = [version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        # another process may have created the version since we asked:
+        cache.add(key, new_version(), None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, "") for key in keys]
+
+
+def model_version(model):
+    """Return the current version of a single model."""
+    return model_versions(model)[0]
+
+
+def bump_model_version(*models):
+    """Assign a new version to each of the models, invalidating
+    anything cached with the old ones."""
+    cache = get_version_cache()
+    cache.set_many({version_key(model): new_version() for model in models}, None)
+
+
+def versioned_key(prefix, models, *parts):
+    """Build a cache key from the prefix, the current version of each
+    model and the remaining parts.  The parts are hashed so the key
+    is always a valid (memcached safe) length."""
+
+    versions = model_versions(*models)
+    raw = "|".join(str(x) for x in list(parts) + versions)
+    return "{}:{}".format(prefix, hashlib.md5(raw.encode("utf-8")).hexdigest())
@@ -0,0 +1,409 @@
+"""
+=============================================================
+~/uglmu_common/common/grid5_index.py
+
+ Description:
+
+  An optional in-memory spatial index for our 5-minute grids.  The
+  grid layer is small, static and read-mostly, so point lookups can
+  be answered from a packed R-tree of prepared geometries without a
+  round trip to the database.
+
+  The lookup method is controlled by the COMMON_GRID5_LOOKUP setting:
+
+  + "db" - (default) run a containment query in postgis
+  + "index" - use the in-memory index
+  + "lattice" - calculate the grid number from the coordinates using
+    the Grid5Lattice of each lake, and only run a containment query
+    if the grid has been clipped by the shoreline (or the point is
+    not in a cell of any lattice).  The clipped flags are updated
+    whenever a grid or lattice is saved - run the flag_clipped_grids
+    management command after loading grids without saving them
+    (e.g. with bulk_create).
+
+  The index and lattices are built the first time they are needed
+  and are tagged with the versions of the Grid5, Grid5Lattice and
+  Lake models (see common.cache_utils).  The versions are stored in
+  the shared cache and are replaced whenever one of those objects is
+  saved or deleted, so every process rebuilds its index the next
+  time it is used - not just the process that made the change.
+
+=============================================================
+"""
+
+import math
+from threading import Lock
+
+from django.conf import settings
+from django.db import connection
+
+from .cache_utils import model_versions
+from .models import Grid5, Grid5Lattice, Lake
+
+GRID5_LOOKUP_DB = "db"
+GRID5_LOOKUP_INDEX = "index"
+GRID5_LOOKUP_LATTICE = "lattice"
+
+# the models our index and lattices are built from
+GRID5_INDEX_MODELS = (Grid5, Grid5Lattice, Lake)
+
+
+def grid5_lookup_method():
+    """Return the grid5 lookup method specified in our settings."""
+    return getattr(settings, "COMMON_GRID5_LOOKUP", GRID5_LOOKUP_DB)
+
+
+class STRtree:
+    """A static R-tree that is bulk loaded using the Sort-Tile-Recursive
+    algorithm.  Items are (bbox, value) tuples where bbox is
+    (xmin, ymin, xmax, ymax).  The tree cannot be modified once it is
+    built - create a new one if the items change.
+
+    """
+
+    def __init__(self, items, node_capacity=10):
+        self.node_capacity = node_capacity
+        self.size = len(items)
+        # leaves are (bbox, value, None), nodes are (bbox, None, children)
+        nodes = [(bbox, value, None) for bbox, value in items]
+        while len(nodes) > 1:
+            nodes = self._pack(nodes)
+        self.root = nodes[0] if nodes else None
+
+    @staticmethod
+    def _extent(nodes):
+        return (
+            min(x[0][0] for x in nodes),
+            min(x[0][1] for x in nodes),
+            max(x[0][2] for x in nodes),
+            max(x[0][3] for x in nodes),
+        )
+
+    def _pack(self, nodes):
+        """Pack one level of the tree - sort the nodes into vertical
+        slices by the x-coordinate of their centres, then group
+        each slice into parent nodes by the y-coordinate of their
+        centres."""
+
+        capacity = self.node_capacity
+        parent_count = math.ceil(len(nodes) / capacity)
+        slice_count = math.ceil(math.sqrt(parent_count))
+        slice_size = slice_count * capacity
+
+        nodes = sorted(nodes, key=lambda x: x[0][0] + x[0][2])
+        parents = []
+        for i in range(0, len(nodes), slice_size):
+            vslice = sorted(nodes[i : i + slice_size], key=lambda x: x[0][1] + x[0][3])
+            for j in range(0, len(vslice), capacity):
+                children = vslice[j : j + capacity]
+                parents.append((self._extent(children), None, children))
+        return parents
+
+    def query(self, x, y):
+        """Return a list of the values with a bounding box that contains
+        the point (x, y)."""
+
+        matches = []
+        if self.root is None:
+            return matches
+
+        stack = [self.root]
+        while stack:
+            bbox, value, children = stack.pop()
+            if not (bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]):
+                continue
+            if children is None:
+                matches.append(value)
+            else:
+                stack.extend(children)
+        return matches
+
+
+class Grid5Index:
+    """An in-memory index of our 5-minute grids.  The attributes
+    returned by the spatial lookup views are stored with each
+    prepared geometry so a lookup does not need to touch the database.
+
+    """
+
+    # the versions of GRID5_INDEX_MODELS the index was built from
+    version = None
+
+    def __init__(self, grids):
+        items = []
+        for grid in grids:
+            geom = grid.pop("geom")
+            if geom is None:
+                continue
+            items.append((geom.extent, (geom.prepared, grid)))
+        self.tree = STRtree(items)
+
+    @classmethod
+    def from_db(cls):
+        grids = Grid5.objects.values(
+            "id",
+            "grid",
+            "slug",
+            "geom",
+            "centroid",
+            "envelope",
+            "lake_id",
+            "lake__abbrev",
+            "lake__lake_name",
+        )
+        return cls([grid5_attrs(x) for x in grids])
+
+    def lookup(self, pt):
+        """Return the attributes of the grid containing the point, or
+        None if the point is not in any of our grids.  If grids
+        overlap, the first by lake and grid is returned to match our
+        database lookups."""
+
+        matches = [
+            attrs
+            for prepared, attrs in self.tree.query(pt.x, pt.y)
+            if prepared.contains(pt)
+        ]
+        if not matches:
+            return None
+        matches.sort(key=lambda x: (x["lake_abbrev"], x["grid"]))
+        return dict(matches[0])
+
+
+GRID5_CONTAINS_SQL = """
+SELECT c.idx, g.id
+FROM unnest(%(lons)s::float8[], %(lats)s::float8[])
+    WITH ORDINALITY AS c(lon, lat, idx)
+CROSS JOIN LATERAL (
+    SELECT g.id
+    FROM {grid5} g
+    JOIN {lake} l ON l.id = g.lake_id
+    WHERE ST_Contains(g.geom, ST_SetSRID(ST_MakePoint(c.lon, c.lat), 4326))
+    ORDER BY l.abbrev, g.grid
+    LIMIT 1
+) g
+"""
+
+
+class Grid5LatticeIndex:
+    """Resolve points to 5-minute grids arithmetically using the
+    lattice of each lake.  The attributes of every grid are held in a
+    dictionary keyed by lake and grid number, so most points can be
+    resolved without touching the database.  Points that fall in
+    grids flagged as clipped, and points without an unclipped
+    candidate (outside of every lattice, in a lake without a lattice,
+    or in a cell whose grid is not numbered the way the lattice
+    expects), are resolved with the same containment query used by
+    our database lookups - so the results always match.
+
+    """
+
+    # the versions of GRID5_INDEX_MODELS the index was built from
+    version = None
+
+    def __init__(self, lattices, grids):
+        self.lattices = sorted(lattices, key=lambda x: x.lake.abbrev)
+        self.by_id = {grid["id"]: grid for grid in grids}
+        self.grids = {}
+        for grid in grids:
+            try:
+                key = (grid["lake_id"], int(grid["grid"]))
+            except ValueError:
+                continue
+            self.grids[key] = grid
+
+    @classmethod
+    def from_db(cls):
+        lattices = Grid5Lattice.objects.select_related("lake").defer(
+            "lake__geom",
+            "lake__envelope",
+            "lake__centroid",
+            "lake__geom_ontario",
+            "lake__envelope_ontario",
+            "lake__centroid_ontario",
+        )
+        grids = Grid5.objects.values(
+            "id",
+            "grid",
+            "slug",
+            "clipped",
+            "centroid",
+            "envelope",
+            "lake_id",
+            "lake__abbrev",
+            "lake__lake_name",
+        )
+        return cls(list(lattices), [lattice_grid5_attrs(x) for x in grids])
+
+    def candidates(self, pt):
+        """Return a list of the grids whose lattice cell contains the
+        point - ordered by lake."""
+        matches = []
+        for lattice in self.lattices:
+            grid_number = lattice.grid_number(pt.x, pt.y)
+            if grid_number is None:
+                continue
+            grid = self.grids.get((lattice.lake_id, grid_number))
+            if grid is not None:
+                matches.append(grid)
+        return matches
+
+    def lookup_many(self, points):
+        """Return a list containing the attributes of the grid
+        containing each point (or None).  The containment tests
+        required for points that cannot be resolved from the lattices
+        are all run in a single database query."""
+
+        results = [None] * len(points)
+        unresolved = []
+        for i, pt in enumerate(points):
+            unclipped = [x for x in self.candidates(pt) if not x["clipped"]]
+            if unclipped:
+                results[i] = unclipped[0]
+            else:
+                unresolved.append(i)
+
+        if unresolved:
+            params = dict(
+                lons=[points[i].x for i in unresolved],
+                lats=[points[i].y for i in unresolved],
+            )
+            sql = GRID5_CONTAINS_SQL.format(
+                grid5=Grid5._meta.db_table, lake=Lake._meta.db_table
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            # ordinality is 1 based:
+            for idx, grid_id in rows:
+                results[unresolved[idx - 1]] = self.by_id.get(grid_id)
+
+        return [public_grid5_attrs(x) for x in results]
+
+    def lookup(self, pt):
+        return self.lookup_many([pt])[0]
+
+
+def lattice_grid5_attrs(values):
+    """The grid attributes used by our lattice index include the
+    clipped flag."""
+    attrs = grid5_attrs(values)
+    attrs.pop("geom")
+    attrs["clipped"] = values["clipped"]
+    return attrs
+
+
+def public_grid5_attrs(attrs):
+    """Return a copy of the grid attributes without any of the
+    attributes used internally by our lattice lookups."""
+    if attrs is None:
+        return None
+    attrs = dict(attrs)
+    attrs.pop("clipped", None)
+    return attrs
+
+
+def grid5_attrs(values):
+    """Convert a dictionary returned by Grid5.objects.values() to the
+    dictionary of attributes used by our spatial lookups."""
+    return dict(
+        id=values["id"],
+        grid=values["grid"],
+        slug=values["slug"],
+        geom=values.get("geom"),
+        centroid=values["centroid"].wkt if values["centroid"] else "",
+        envelope=values["envelope"].wkt if values["envelope"] else "",
+        lake_id=values["lake_id"],
+        lake_abbrev=values["lake__abbrev"],
+        lake_name=values["lake__lake_name"],
+    )
+
+
+_index = None
+_lattice_index = None
+_index_lock = Lock()
+
+
+def get_grid5_index():
+    """Return our grid5 index - building it if it does not exist or
+    our grids have changed since it was built."""
+    global _index
+    version = model_versions(*GRID5_INDEX_MODELS)
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = Grid5Index.from_db()
+            _index.version = version
+        return _index
+
+
+def get_grid5_lattice_index():
+    """Return our grid5 lattice index - building it if it does not
+    exist or our grids have changed since it was built."""
+    global _lattice_index
+    version = model_versions(*GRID5_INDEX_MODELS)
+    with _index_lock:
+        if _lattice_index is None or _lattice_index.version != version:
+            _lattice_index = Grid5LatticeIndex.from_db()
+            _lattice_index.version = version
+        return _lattice_index
+
+
+def invalidate_grid5_index():
+    """Discard the current grid5 index and lattices in this process.
+    They will be rebuilt the next time they are needed (other
+    processes rebuild theirs when the model versions change)."""
+    global _index, _lattice_index
+    with _index_lock:
+        _index = None
+        _lattice_index = None
+
+
+def get_grid5_from_pt(pt):
+    """Return a dictionary containing the attributes of the 5-minute
+    grid that contains the point (id, grid, slug, centroid, envelope,
+    lake_id, lake_abbrev and lake_name), or None if the point does
+    not fall in any grid.  Uses the in-memory index or a database
+    query depending on the COMMON_GRID5_LOOKUP setting.
+
+    """
+
+    method = grid5_lookup_method()
+    if method == GRID5_LOOKUP_INDEX:
+        return get_grid5_index().lookup(pt)
+    if method == GRID5_LOOKUP_LATTICE:
+        return get_grid5_lattice_index().lookup(pt)
+
+    grid = (
+        Grid5.objects.filter(geom__contains=pt)
+        .values(
+            "id",
+            "grid",
+            "slug",
+            "centroid",
+            "envelope",
+            "lake_id",
+            "lake__abbrev",
+            "lake__lake_name",
+        )
+        .first()
+    )
+    if grid is None:
+        return None
+    attrs = grid5_attrs(grid)
+    attrs.pop("geom")
+    return attrs
+
+
+def get_grid5s_from_pts(points):
+    """Return a list containing the grid5 attributes (or None) for each
+    point in points.  This is the bulk version of get_grid5_from_pt,
+    which is much faster than calling it for each point when the
+    lattice lookup is used."""
+
+    method = grid5_lookup_method()
+    if method == GRID5_LOOKUP_INDEX:
+        index = get_grid5_index()
+        return [index.lookup(pt) for pt in points]
+    if method == GRID5_LOOKUP_LATTICE:
+        return get_grid5_lattice_index().lookup_many(points)
+    return [get_grid5_from_pt(pt) for pt in points]
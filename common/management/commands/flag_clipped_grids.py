@@ -0,0 +1,57 @@
+"""
+=============================================================
+~/uglmu_common/common/management/commands/flag_clipped_grids.py
+
+ Description:
+
+  Update the clipped flag of our 5-minute grids by comparing each
+  grid to the cell of its lake's Grid5Lattice (see
+  Grid5Lattice.flag_clipped_grids).  The flags are updated whenever
+  a grid or lattice is saved, but grids that are loaded without
+  calling save() (with bulk_create, or before the migration that added
+  the flag) are flagged as clipped, so the lattice lookup
+  (COMMON_GRID5_LOOKUP="lattice") can only resolve them without a
+  database query after this command has been run:
+
+  > python manage.py flag_clipped_grids
+  > python manage.py flag_clipped_grids --lake HU SU
+
+=============================================================
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...models import Grid5Lattice
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag the 5-minute grids that do not fill their lattice cell "
+        "(usually because they have been clipped by the shoreline)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lake",
+            nargs="+",
+            help="the abbreviations of the lakes to update (default: all)",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.001,
+            help="the fraction of the cell area a grid can differ by",
+        )
+
+    def handle(self, *args, **options):
+        lattices = Grid5Lattice.objects.select_related("lake")
+        if options["lake"]:
+            lattices = lattices.filter(lake__abbrev__in=options["lake"])
+        lattices = list(lattices)
+        if not lattices:
+            raise CommandError("No grid5 lattices were found.")
+
+        for lattice in lattices:
+            clipped = lattice.flag_clipped_grids(options["tolerance"])
+            msg = "{}: {} clipped grids."
+            self.stdout.write(msg.format(lattice.lake.abbrev, clipped))
@@ -0,0 +1,192 @@
+"""
+=============================================================
+~/uglmu_common/common/management/commands/load_fn012_limits.py
+
+ Description:
+
+  Load the FN012 limits and flen-tlen regression coefficients of our
+  species from the text files in a directory (e.g. utils/spc_fn012):
+
+  + spc_flen_tlen_rwt.txt - spc, min_flen, max_flen, min_tlen,
+    max_tlen, min_rwt, max_rwt
+  + spc_tlen_K.txt - spc, warn_low, error_low
+  + spc_flen_K.txt - spc, warn_high, error_high
+  + spc_alpha_beta.txt - spc, alpha, beta
+
+  The files are merged in memory and compared to the current values
+  of each species (read in one query).  Only the species that have
+  changed are updated - with a single bulk_update in a transaction.
+  Empty values clear the existing value.  Species that are not in
+  any of the files are not changed.
+
+  Use --dry-run to report the changes without saving them:
+
+  > python manage.py load_fn012_limits utils/spc_fn012 --dry-run
+
+=============================================================
+"""
+
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ...cache_utils import bump_model_version
+from ...models import Species
+
+# the files containing our limits, and the species field that each
+# of their columns is loaded into
+FN012_FILES = {
+    "spc_flen_tlen_rwt.txt": {
+        "min_flen": "flen_min",
+        "max_flen": "flen_max",
+        "min_tlen": "tlen_min",
+        "max_tlen": "tlen_max",
+        "min_rwt": "rwt_min",
+        "max_rwt": "rwt_max",
+    },
+    "spc_tlen_K.txt": {"warn_low": "k_min_warn", "error_low": "k_min_error"},
+    "spc_flen_K.txt": {"warn_high": "k_max_warn", "error_high": "k_max_error"},
+    "spc_alpha_beta.txt": {"alpha": "flen2tlen_alpha", "beta": "flen2tlen_beta"},
+}
+
+
+def float_or_none(value):
+    """Convert a value from one of our files to a float - empty values
+    are None.  Raises a ValueError if the value is not a number."""
+    value = value.strip()
+    return float(value) if value else None
+
+
+def read_fn012_file(path, columns):
+    """Return a dictionary of the values in one of our files keyed by
+    species code - {spc: {field: value}}.  Column names are not case
+    sensitive.  Raises a CommandError if a row is missing any of the
+    columns or has a value that is not a number."""
+
+    values = {}
+    with open(path, newline="") as csvfile:
+        reader = csv.DictReader(csvfile)
+        reader.fieldnames = [x.strip().lower() for x in reader.fieldnames]
+        missing = set(columns) - set(reader.fieldnames)
+        if "spc" not in reader.fieldnames or missing:
+            msg = "{} must have the columns spc, {}."
+            raise CommandError(msg.format(path, ", ".join(columns)))
+        for i, row in enumerate(reader, start=2):
+            # DictReader fills the missing columns of short rows with None
+            if any(row[column] is None for column in ["spc", *columns]):
+                msg = "{} line {} does not have a value for every column."
+                raise CommandError(msg.format(path, i))
+            spc = row["spc"].strip().zfill(3)
+            try:
+                values[spc] = {
+                    field: float_or_none(row[column])
+                    for column, field in columns.items()
+                }
+            except ValueError:
+                msg = "{} line {} has a value that is not a number."
+                raise CommandError(msg.format(path, i))
+    return values
+
+
+def merge_fn012_files(directory):
+    """Read and merge all of our files in directory - returns the new
+    values of each species {spc: {field: value}}.  Files that do not
+    exist are skipped."""
+
+    merged = {}
+    found = False
+    for filename, columns in FN012_FILES.items():
+        path = os.path.join(directory, filename)
+        if not os.path.exists(path):
+            continue
+        found = True
+        for spc, values in read_fn012_file(path, columns).items():
+            merged.setdefault(spc, {}).update(values)
+    if not found:
+        msg = "None of {} were found in {}."
+        raise CommandError(msg.format(", ".join(FN012_FILES), directory))
+    return merged
+
+
+def diff_species(merged):
+    """Compare the merged values to the current values of each species.
+    Returns a list of (species, {field: (old, new)}) tuples for the
+    species that have changed, and a list of the species codes that
+    are not in our species table."""
+
+    species = Species.objects.filter(spc__in=merged.keys())
+    species = {x.spc: x for x in species}
+
+    changes = []
+    for spc in sorted(merged):
+        obj = species.get(spc)
+        if obj is None:
+            continue
+        changed = {
+            field: (getattr(obj, field), value)
+            for field, value in merged[spc].items()
+            if getattr(obj, field) != value
+        }
+        if changed:
+            changes.append((obj, changed))
+
+    unknown = sorted(set(merged) - set(species))
+    return changes, unknown
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the FN012 limits and flen-tlen regression coefficients of "
+        "our species from the text files in a directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory", help="the directory containing the FN012 text files"
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="report the changes without saving them",
+        )
+
+    def handle(self, *args, **options):
+        directory = options["directory"]
+        if not os.path.isdir(directory):
+            raise CommandError("{} is not a directory.".format(directory))
+
+        merged = merge_fn012_files(directory)
+        changes, unknown = diff_species(merged)
+
+        for spc in unknown:
+            self.stdout.write("Unknown species: {} - skipped".format(spc))
+
+        fields = set()
+        for obj, changed in changes:
+            self.stdout.write("{}:".format(obj.spc))
+            for field, (old, new) in sorted(changed.items()):
+                self.stdout.write("    {}: {} -> {}".format(field, old, new))
+                setattr(obj, field, new)
+            fields.update(changed)
+
+        if options["dry_run"]:
+            msg = "Dry run - {} species would be updated."
+            self.stdout.write(msg.format(len(changes)))
+            return
+
+        if changes:
+            # bulk_update() does not set modified_date or send signals
+            now = timezone.now()
+            for obj, changed in changes:
+                obj.modified_date = now
+            with transaction.atomic():
+                Species.objects.bulk_update(
+                    [obj for obj, changed in changes],
+                    sorted(fields) + ["modified_date"],
+                )
+            bump_model_version(Species)
+
+        self.stdout.write("{} species updated.".format(len(changes)))
@@ -0,0 +1,267 @@
+"""
+=============================================================
+~/uglmu_common/common/management/commands/validate_fn125.py
+
+ Description:
+
+  Validate the biological data in a (potentially very large) FN125
+  extract against the FN012 limits of each species (see
+  common.biodata) and write the rows that fail any check to a csv
+  file with the names of the failed checks in an additional FLAGS
+  column.
+
+  The file is read in chunks of --chunksize rows and the chunks are
+  validated by a pool of --workers processes.  The species limits
+  are read from the database once and sent to each worker when it
+  starts, and only a few chunks are in flight at any time, so memory
+  use depends on the chunk size rather than the size of the file.
+  The workers are forked from this process (they need our django
+  settings and models) - on platforms that cannot fork, the chunks
+  are validated in this process.
+
+  CSV and Parquet (requires pyarrow) files are supported:
+
+  > python manage.py validate_fn125 fn125.csv --output flagged.csv
+  > python manage.py validate_fn125 fn125.parquet --workers 8
+
+=============================================================
+"""
+
+import csv
+import multiprocessing
+import os
+import time
+from collections import deque
+from itertools import islice
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from ...biodata import BIODATA_FLAGS, validate_biodata
+from ...species_cache import SpeciesLimits
+
+BIODATA_COLUMNS = ("spc", "flen", "tlen", "rwt")
+
+# the limits used by each worker process - see init_worker()
+_worker_limits = None
+
+
+def get_pool_context():
+    """Return a multiprocessing context that forks our workers, or None
+    if this platform cannot fork.  Spawned workers would have to import
+    our models before django has been set up."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return None
+    return multiprocessing.get_context("fork")
+
+
+def init_worker(limits):
+    global _worker_limits
+    _worker_limits = limits
+
+
+def to_float(value):
+    """Convert a value read from the file to a float - nan if it is
+    missing or is not a number."""
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def validate_chunk(rows, columns, limits=None):
+    """Validate a chunk of rows (a list of lists of the fields in the
+    file) and return the rows that failed any check with the names
+    of the checks appended.  columns maps spc, flen, tlen and rwt to
+    their positions in each row (or None if the file does not have that
+    column).  Values that are not numbers are flagged as
+    invalid_<column>."""
+
+    if limits is None:
+        limits = _worker_limits
+
+    def column(name):
+        i = columns[name]
+        if i is None:
+            return None
+        return [row[i] if i < len(row) else None for row in rows]
+
+    values = {}
+    invalid = {}
+    for name in BIODATA_COLUMNS[1:]:
+        raw = column(name)
+        if raw is None:
+            values[name] = None
+            continue
+        values[name] = np.array([to_float(x) for x in raw], dtype=float)
+        missing = np.array([x is None or x == "" for x in raw], dtype=bool)
+        invalid["invalid_" + name] = np.isnan(values[name]) & ~missing
+
+    flags = validate_biodata(column("spc"), limits=limits, **values)
+    flags.update(invalid)
+    names = list(BIODATA_FLAGS) + list(invalid.keys())
+
+    failed = np.zeros(len(rows), dtype=bool)
+    for name in names:
+        failed |= flags[name]
+
+    flagged = []
+    for i in failed.nonzero()[0]:
+        row_flags = [name for name in names if flags[name][i]]
+        flagged.append(list(rows[i]) + [";".join(row_flags)])
+    return flagged
+
+
+def validate_worker_chunk(args):
+    rows, columns = args
+    return len(rows), validate_chunk(rows, columns)
+
+
+def read_csv_chunks(path, chunksize, delimiter=","):
+    """Yield the header and then lists of at most chunksize rows of a
+    csv file.  Raises a CommandError if the file is empty."""
+    with open(path, newline="") as csvfile:
+        reader = csv.reader(csvfile, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            raise CommandError("{} is empty.".format(path))
+        yield header
+        while True:
+            rows = list(islice(reader, chunksize))
+            if not rows:
+                break
+            yield rows
+
+
+def read_parquet_chunks(path, chunksize):
+    """Yield the header and then lists of at most chunksize rows of a
+    parquet file."""
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise CommandError("pyarrow must be installed to read parquet files.")
+
+    parquet = pq.ParquetFile(path)
+    yield parquet.schema_arrow.names
+    for batch in parquet.iter_batches(batch_size=chunksize):
+        yield [list(x) for x in zip(*batch.to_pydict().values())]
+
+
+class Command(BaseCommand):
+    help = (
+        "Validate the biological data in a csv or parquet FN125 file "
+        "against the FN012 limits of each species and write the rows "
+        "that fail any check to a csv file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="the csv or parquet file to validate")
+        parser.add_argument(
+            "--output",
+            help="the csv file of flagged rows (default: <path>_flagged.csv)",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "parquet"],
+            help="the format of the input file (default: from the extension)",
+        )
+        parser.add_argument("--chunksize", type=int, default=100000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="the number of processes used to validate the chunks",
+        )
+        parser.add_argument("--delimiter", default=",")
+        for name in BIODATA_COLUMNS:
+            parser.add_argument(
+                "--{}-column".format(name),
+                default=name.upper(),
+                help="the name of the {} column (default: {})".format(
+                    name, name.upper()
+                ),
+            )
+
+    def get_columns(self, header, options):
+        """Find the position of each of our columns in the header - the
+        names are not case sensitive."""
+        positions = {x.lower(): i for i, x in enumerate(header)}
+        columns = {}
+        for name in BIODATA_COLUMNS:
+            column = options["{}_column".format(name)]
+            columns[name] = positions.get(column.lower())
+        if columns["spc"] is None:
+            raise CommandError(
+                "Could not find the species column ({}).".format(options["spc_column"])
+            )
+        return columns
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError("{} does not exist.".format(path))
+
+        file_format = options["format"]
+        if file_format is None:
+            is_parquet = path.lower().endswith((".parquet", ".pq"))
+            file_format = "parquet" if is_parquet else "csv"
+
+        chunksize = options["chunksize"]
+        if file_format == "parquet":
+            chunks = read_parquet_chunks(path, chunksize)
+        else:
+            chunks = read_csv_chunks(path, chunksize, options["delimiter"])
+
+        header = next(chunks)
+        columns = self.get_columns(header, options)
+
+        output = options["output"] or os.path.splitext(path)[0] + "_flagged.csv"
+        limits = SpeciesLimits.from_db()
+        workers = max(options["workers"], 1)
+
+        start = time.perf_counter()
+        total = 0
+        flagged = 0
+        with open(output, "w", newline="") as outfile:
+            writer = csv.writer(outfile)
+            writer.writerow(list(header) + ["FLAGS"])
+            tasks = ((rows, columns) for rows in chunks)
+            for count, rows in self.validate(tasks, limits, workers):
+                writer.writerows(rows)
+                total += count
+                flagged += len(rows)
+                if options["verbosity"] > 1:
+                    self.stdout.write("{} rows validated...".format(total))
+
+        elapsed = time.perf_counter() - start
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            "Validated {} rows in {:.1f} seconds ({:.0f} rows/second) - "
+            "{} flagged rows written to {}".format(
+                total, elapsed, rate, flagged, output
+            )
+        )
+
+    def validate(self, tasks, limits, workers):
+        """Yield the number of rows and the flagged rows of each chunk,
+        in order.  Chunks are validated in a process pool if workers
+        is more than 1 - no more than two chunks per worker are read
+        ahead of the results."""
+
+        context = get_pool_context() if workers > 1 else None
+        if context is None:
+            for rows, columns in tasks:
+                yield len(rows), validate_chunk(rows, columns, limits)
+            return
+
+        pool = context.Pool(workers, initializer=init_worker, initargs=(limits,))
+        with pool:
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.apply_async(validate_worker_chunk, (task,)))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
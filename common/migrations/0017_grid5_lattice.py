@@ -0,0 +1,41 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0016_add_vessel_lookup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid5',
+            name='clipped',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.CreateModel(
+            name='Grid5Lattice',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('origin_lon', models.FloatField(verbose_name='Longitude of the outer corner of the first cell')),
+                ('origin_lat', models.FloatField(verbose_name='Latitude of the outer corner of the first cell')),
+                ('cell_size', models.FloatField(default=0.08333333333333333, verbose_name='Cell size (decimal degrees)')),
+                ('nrows', models.PositiveIntegerField(verbose_name='Number of rows')),
+                ('ncols', models.PositiveIntegerField(verbose_name='Number of columns')),
+                ('row_order', models.CharField(choices=[('n2s', 'North to South'), ('s2n', 'South to North')], default='n2s', max_length=3)),
+                ('col_order', models.CharField(choices=[('w2e', 'West to East'), ('e2w', 'East to West')], default='w2e', max_length=3)),
+                ('first_grid', models.IntegerField(default=0, verbose_name='Grid number of the first cell')),
+                ('row_step', models.IntegerField(default=100)),
+                ('col_step', models.IntegerField(default=1)),
+                ('lake', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grid5_lattice', to='common.lake')),
+            ],
+            options={
+                'ordering': ['lake__abbrev'],
+            },
+        ),
+    ]
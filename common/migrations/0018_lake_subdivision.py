@@ -0,0 +1,37 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:20
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# populate the subdivided lake pieces for our existing lakes:
+SUBDIVIDE_LAKES = """
+INSERT INTO common_lakesubdivision (lake_id, geom, created_date, modified_date)
+SELECT id, ST_Subdivide(geom, 256), now(), now()
+FROM common_lake
+WHERE geom IS NOT NULL;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0017_grid5_lattice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LakeSubdivision',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('geom', django.contrib.gis.db.models.fields.PolygonField(srid=4326)),
+                ('lake', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subdivisions', to='common.lake')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunSQL(SUBDIVIDE_LAKES, migrations.RunSQL.noop),
+    ]
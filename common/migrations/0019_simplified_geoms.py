@@ -0,0 +1,79 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:22
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations
+
+
+# populate the simplified geometries of our existing objects - the
+# tolerances must match GEOM_RESOLUTIONS in common.models.spatial_models
+SIMPLIFY_SQL = """
+UPDATE {table} SET
+    geom_high = ST_Multi(ST_SimplifyPreserveTopology(geom, 0.0001)),
+    geom_medium = ST_Multi(ST_SimplifyPreserveTopology(geom, 0.001)),
+    geom_low = ST_Multi(ST_SimplifyPreserveTopology(geom, 0.01))
+WHERE geom IS NOT NULL;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0018_lake_subdivision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid5',
+            name='geom_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='grid5',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='grid5',
+            name='geom_medium',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='lake',
+            name='geom_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='lake',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='lake',
+            name='geom_medium',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='managementunit',
+            name='geom_high',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='managementunit',
+            name='geom_low',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='managementunit',
+            name='geom_medium',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, null=True, srid=4326),
+        ),
+        migrations.RunSQL(
+            SIMPLIFY_SQL.format(table="common_lake"), migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            SIMPLIFY_SQL.format(table="common_grid5"), migrations.RunSQL.noop
+        ),
+        migrations.RunSQL(
+            SIMPLIFY_SQL.format(table="common_managementunit"), migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.12 on 2026-10-18 13:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0019_simplified_geoms'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('model', models.CharField(db_index=True, max_length=50)),
+                ('object_id', models.IntegerField()),
+                ('key', models.CharField(blank=True, max_length=100, null=True)),
+                ('deleted_date', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['deleted_date', 'id'],
+            },
+        ),
+    ]
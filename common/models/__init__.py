@@ -1,7 +1,9 @@
 from .managers import LakeManager, Grid5Manager, SpeciesManager, ManagementUnitManager
 from .spatial_models import (
     Lake,
+    LakeSubdivision,
     Grid5,
+    Grid5Lattice,
     ManagementUnit,
     ManagementUnitType,
     LakeManagementUnitType,
@@ -10,3 +12,5 @@ from .spatial_models import (
 from .lookups import BottomType, CoverType, Vessel
 
 from .species_taxon import Species, Taxon
+
+from .tombstones import Tombstone
@@ -16,6 +16,9 @@ class LakeManager(models.Manager):
             .get_queryset(*args, **kwargs)
             .defer(
                 "geom",
+                "geom_high",
+                "geom_medium",
+                "geom_low",
                 "geom_ontario",
                 "envelope",
                 "envelope_ontario",
@@ -33,7 +36,9 @@ class Grid5Manager(models.Manager):
         return (
             super(Grid5Manager, self)
             .get_queryset(*args, **kwargs)
-            .defer("geom", "envelope", "centroid")
+            .defer(
+                "geom", "geom_high", "geom_medium", "geom_low", "envelope", "centroid"
+            )
         )
 
     def get_by_natural_key(self, lake, grid):
@@ -45,7 +50,9 @@ class ManagementUnitManager(models.Manager):
         return (
             super(ManagementUnitManager, self)
             .get_queryset(*args, **kwargs)
-            .defer("geom", "envelope", "centroid")
+            .defer(
+                "geom", "geom_high", "geom_medium", "geom_low", "envelope", "centroid"
+            )
         )
 
 
@@ -1,14 +1,89 @@
+import math
+
+from django.conf import settings
 from django.contrib.gis.db import models
 from django.contrib.gis.db.models import Q, UniqueConstraint
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.db import connection
 
 from django.template.defaultfilters import slugify
 
+from ..cache_utils import bump_model_version
 from .managers import Grid5Manager, LakeManager, ManagementUnitManager
 
 from .base_models import BaseModel
 
 
-class Lake(BaseModel):
+# the tolerances (in decimal degrees) used to create the precomputed
+# simplified geometries of our lakes, grids and management units.
+GEOM_RESOLUTIONS = {
+    "high": 0.0001,
+    "medium": 0.001,
+    "low": 0.01,
+}
+
+
+def simplify_geom(geom, tolerance):
+    """Return a topology preserving simplification of a multipolygon
+    as a multipolygon (or None if nothing is left)."""
+    if geom is None:
+        return None
+    simplified = geom.simplify(tolerance, preserve_topology=True)
+    if simplified.empty:
+        return None
+    if isinstance(simplified, Polygon):
+        simplified = MultiPolygon(simplified, srid=geom.srid)
+    return simplified
+
+
+class SimplifiedGeomModel(BaseModel):
+    """An abstract model for our spatial models that stores several
+    precomputed simplifications of the geom field (see
+    GEOM_RESOLUTIONS).  Serving one of the simplified geometries is much
+    faster and produces a much smaller payload than the full
+    resolution geometry.
+
+    """
+
+    geom_high = models.MultiPolygonField(srid=4326, blank=True, null=True)
+    geom_medium = models.MultiPolygonField(srid=4326, blank=True, null=True)
+    geom_low = models.MultiPolygonField(srid=4326, blank=True, null=True)
+
+    class Meta:
+        abstract = True
+
+    def simplify_geoms(self):
+        """Populate the simplified geometries from the current geom."""
+        for resolution, tolerance in GEOM_RESOLUTIONS.items():
+            setattr(self, f"geom_{resolution}", simplify_geom(self.geom, tolerance))
+
+    def get_geom(self, resolution=None, tolerance=None):
+        """Return the geometry of this object at the requested resolution
+        (high, medium or low) or simplified with the requested tolerance.
+        Tolerances are applied to the closest precomputed geometry with
+        a smaller tolerance. Returns the full resolution geometry if
+        neither is provided.
+
+        """
+
+        if resolution is not None:
+            return getattr(self, f"geom_{resolution}")
+
+        if tolerance is None:
+            return self.geom
+
+        levels = [x for x in GEOM_RESOLUTIONS.items() if x[1] <= tolerance]
+        if levels:
+            resolution, level_tolerance = max(levels, key=lambda x: x[1])
+            geom = getattr(self, f"geom_{resolution}")
+        else:
+            geom, level_tolerance = self.geom, 0
+        if tolerance > level_tolerance:
+            geom = simplify_geom(geom, tolerance)
+        return geom
+
+
+class Lake(SimplifiedGeomModel):
     """
     A lookup table for lakes.
 
@@ -49,22 +124,84 @@ class Lake(BaseModel):
 
     def save(self, *args, **kwargs):
         """
-        Populate slug, centroid, and bounding box when we save the object.
+        Populate slug, centroid, bounding box and simplified geometries
+        when we save the object.
         """
         # if not self.slug:
 
         if self.geom:
             self.centroid = self.geom.centroid
             self.envelope = self.geom.envelope
+        self.simplify_geoms()
 
         if self.geom_ontario:
             self.centroid_ontario = self.geom_ontario.centroid
             self.envelope_ontario = self.geom_ontario.envelope
 
         super(Lake, self).save(*args, **kwargs)
+        self.subdivide()
+
+    def subdivide(self, max_vertices=None):
+        """Replace the subdivided pieces of this lake's geometry
+        (see LakeSubdivision).  The pieces are created by postgis
+        using ST_Subdivide.  The maximum number of vertices in each
+        piece defaults to the COMMON_LAKE_SUBDIVIDE_MAX_VERTICES
+        setting (256).
+
+        """
+
+        if max_vertices is None:
+            max_vertices = getattr(
+                settings, "COMMON_LAKE_SUBDIVIDE_MAX_VERTICES", 256
+            )
+
+        # the pieces are replaced with raw sql - they have no signals
+        # or dependent objects, so there is no need to load them.
+        delete_sql = "DELETE FROM {} WHERE lake_id = %s".format(
+            LakeSubdivision._meta.db_table
+        )
+        sql = """
+        INSERT INTO {subdivision} (lake_id, geom, created_date, modified_date)
+        SELECT id, ST_Subdivide(geom, %s), now(), now()
+        FROM {lake}
+        WHERE id = %s AND geom IS NOT NULL
+        """.format(
+            subdivision=LakeSubdivision._meta.db_table, lake=Lake._meta.db_table
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(delete_sql, [self.id])
+            cursor.execute(sql, [max_vertices, self.id])
+        bump_model_version(LakeSubdivision)
+
+
+class LakeSubdivision(BaseModel):
+    """Small pieces of the geometry of each lake created with postgis
+    ST_Subdivide.  The lake polygons are very large and complex, so
+    containment tests against them are slow. The subdivided pieces
+    have far fewer vertices and much tighter bounding boxes, so the
+    spatial index can discard most of them and the containment test
+    only needs to consider a small polygon.
+
+    Points on the internal seams between two pieces are on the
+    boundary of both, so they are not contained by either of them -
+    always test the pieces with intersects (ST_Intersects) rather
+    than contains.
+
+    The pieces are derived data - they are rebuilt every time a lake
+    is saved and should not be edited directly.
+
+    """
+
+    lake = models.ForeignKey(
+        Lake, on_delete=models.CASCADE, related_name="subdivisions"
+    )
+    geom = models.PolygonField(srid=4326)
+
+    def __str__(self):
+        return "{} subdivision ({})".format(self.lake.abbrev, self.id)
 
 
-class Grid5(BaseModel):
+class Grid5(SimplifiedGeomModel):
     """'
     A lookup table for 5-minute grids within lakes.
     """
@@ -77,6 +214,11 @@ class Grid5(BaseModel):
     centroid = models.PointField(srid=4326, blank=True, null=True)
     envelope = models.PolygonField(srid=4326, blank=True, null=True)
 
+    # True if the grid geometry is not the complete lattice cell
+    # (usually because it has been clipped by the shoreline).  Point
+    # lookups in clipped grids require a polygon containment test.
+    clipped = models.BooleanField(default=True)
+
     objects = Grid5Manager()
 
     class Meta:
@@ -121,10 +263,167 @@ class Grid5(BaseModel):
         if self.geom:
             self.centroid = self.geom.centroid
             self.envelope = self.geom.envelope
+        self.simplify_geoms()
+
+        lattice = Grid5Lattice.objects.filter(lake_id=self.lake_id).first()
+        self.clipped = lattice.is_clipped(self) if lattice else True
 
         super(Grid5, self).save(*args, **kwargs)
 
 
+class Grid5Lattice(BaseModel):
+    """The regular latitude-longitude lattice that the 5-minute grids
+    of a lake are built on.  Given the corner of the first cell, the
+    cell size and the numbering scheme, the grid number containing
+    a point can be calculated directly from its coordinates.
+
+    Grid numbers are calculated as:
+
+        first_grid + row * row_step + col * col_step
+
+    where rows and columns are counted from the cell at the origin in
+    the directions specified by row_order and col_order.
+
+    """
+
+    ROW_ORDER_CHOICES = (
+        ("n2s", "North to South"),
+        ("s2n", "South to North"),
+    )
+
+    COL_ORDER_CHOICES = (
+        ("w2e", "West to East"),
+        ("e2w", "East to West"),
+    )
+
+    lake = models.OneToOneField(
+        Lake, on_delete=models.CASCADE, related_name="grid5_lattice"
+    )
+    origin_lon = models.FloatField("Longitude of the outer corner of the first cell")
+    origin_lat = models.FloatField("Latitude of the outer corner of the first cell")
+    cell_size = models.FloatField("Cell size (decimal degrees)", default=5 / 60)
+    nrows = models.PositiveIntegerField("Number of rows")
+    ncols = models.PositiveIntegerField("Number of columns")
+    row_order = models.CharField(max_length=3, choices=ROW_ORDER_CHOICES, default="n2s")
+    col_order = models.CharField(max_length=3, choices=COL_ORDER_CHOICES, default="w2e")
+    first_grid = models.IntegerField("Grid number of the first cell", default=0)
+    row_step = models.IntegerField(default=100)
+    col_step = models.IntegerField(default=1)
+
+    class Meta:
+        ordering = ["lake__abbrev"]
+
+    def __str__(self):
+        return "{} 5-minute grid lattice".format(self.lake.abbrev)
+
+    def save(self, *args, **kwargs):
+        """
+        Update the clipped flag of the lake's grids when we save the
+        lattice - flags calculated against the old lattice are not
+        valid for the new one.  If the lattice has been moved to
+        another lake, the grids of the old lake are all flagged as
+        clipped.
+        """
+        old_lake_id = None
+        if self.pk:
+            old_lake_id = (
+                Grid5Lattice.objects.filter(pk=self.pk)
+                .values_list("lake_id", flat=True)
+                .first()
+            )
+        super(Grid5Lattice, self).save(*args, **kwargs)
+
+        if old_lake_id is not None and old_lake_id != self.lake_id:
+            Grid5.objects.filter(lake_id=old_lake_id).update(clipped=True)
+        self.flag_clipped_grids()
+
+    def cell_index(self, lon, lat):
+        """Return the (row, col) of the lattice cell containing the
+        point, or None if it falls outside of the lattice."""
+
+        if self.row_order == "n2s":
+            row = math.floor((self.origin_lat - lat) / self.cell_size)
+        else:
+            row = math.floor((lat - self.origin_lat) / self.cell_size)
+
+        if self.col_order == "w2e":
+            col = math.floor((lon - self.origin_lon) / self.cell_size)
+        else:
+            col = math.floor((self.origin_lon - lon) / self.cell_size)
+
+        if 0 <= row < self.nrows and 0 <= col < self.ncols:
+            return (row, col)
+        return None
+
+    def grid_number(self, lon, lat):
+        """Return the number of the grid containing the point, or None
+        if it falls outside of the lattice."""
+        cell = self.cell_index(lon, lat)
+        if cell is None:
+            return None
+        row, col = cell
+        return self.first_grid + row * self.row_step + col * self.col_step
+
+    def cell_polygon(self, row, col):
+        """Return the complete (unclipped) polygon of a lattice cell."""
+
+        size = self.cell_size
+        if self.row_order == "n2s":
+            ymax = self.origin_lat - row * size
+            ymin = ymax - size
+        else:
+            ymin = self.origin_lat + row * size
+            ymax = ymin + size
+
+        if self.col_order == "w2e":
+            xmin = self.origin_lon + col * size
+            xmax = xmin + size
+        else:
+            xmax = self.origin_lon - col * size
+            xmin = xmax - size
+
+        return Polygon.from_bbox((xmin, ymin, xmax, ymax))
+
+    def flag_clipped_grids(self, tolerance=0.001):
+        """Compare the geometry of each grid in this lake to the lattice
+        cell it occupies, and update the clipped flag of any grid
+        that does not fill its cell (or is not numbered the way the
+        lattice expects). Returns the number of clipped grids.
+
+        """
+
+        grids = list(Grid5.objects.filter(lake=self.lake).defer(None))
+        for grid in grids:
+            grid.clipped = self.is_clipped(grid, tolerance)
+        Grid5.objects.bulk_update(grids, ["clipped"])
+        # bulk_update does not send any signals - replace the grid
+        # version so our grid5 lookups are rebuilt in every process:
+        bump_model_version(Grid5)
+        return sum(grid.clipped for grid in grids)
+
+    def is_clipped(self, grid, tolerance=0.001):
+        """Return True unless the geometry of grid fills the lattice cell
+        with the same grid number.  Tolerance is the fraction of the
+        cell area that the geometry can differ by."""
+
+        if grid.geom is None:
+            return True
+        pt = grid.geom.point_on_surface
+        cell = self.cell_index(pt.x, pt.y)
+        if cell is None:
+            return True
+        try:
+            grid_number = int(grid.grid)
+        except ValueError:
+            return True
+        if grid_number != self.grid_number(pt.x, pt.y):
+            return True
+        polygon = self.cell_polygon(*cell)
+        polygon.srid = grid.geom.srid
+        difference = grid.geom.sym_difference(polygon).area
+        return difference > tolerance * polygon.area
+
+
 class ManagementUnitType(BaseModel):
     """A lookup table for management unit types.  Management units
     were originally a choice field in the ManagementUnit model, but
@@ -187,7 +486,7 @@ class LakeManagementUnitType(BaseModel):
         return "{}-{}".format(self.lake.abbrev, self.management_unit_type.abbrev)
 
 
-class ManagementUnit(BaseModel):
+class ManagementUnit(SimplifiedGeomModel):
     """
     a class to hold geometries associated with arbirary ManagementUnits
     that can be represented as polygons.  Examples include quota
@@ -259,6 +558,7 @@ class ManagementUnit(BaseModel):
         if self.geom:
             self.centroid = self.geom.centroid
             self.envelope = self.geom.envelope
+        self.simplify_geoms()
 
         self.slug = self.get_slug()
         super(ManagementUnit, self).save(*args, **kwargs)
@@ -0,0 +1,48 @@
+from django.db import models
+
+# the field that identifies objects of each model in our api
+# responses.  Models that are not listed are identified by their id.
+NATURAL_KEY_FIELDS = {
+    "lake": "abbrev",
+    "grid5": "slug",
+    "managementunit": "slug",
+    "managementunittype": "slug",
+    "species": "spc",
+    "taxon": "taxon",
+    "bottomtype": "abbrev",
+    "covertype": "abbrev",
+    "vessel": "abbrev",
+}
+
+
+class Tombstone(models.Model):
+    """A record of an object that has been deleted from one of our
+    tables.  Tombstones are created by a post_delete signal (see
+    common.signals) and are used by our change feed to tell clients
+    which objects they should remove from their local copies.
+
+    """
+
+    id = models.AutoField(primary_key=True)
+    model = models.CharField(max_length=50, db_index=True)
+    object_id = models.IntegerField()
+    key = models.CharField(max_length=100, blank=True, null=True)
+    deleted_date = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ["deleted_date", "id"]
+
+    def __str__(self):
+        return "{} {} (deleted)".format(self.model, self.key or self.object_id)
+
+    @classmethod
+    def record(cls, instance):
+        """Create a tombstone for an object that has been deleted."""
+        model_name = instance._meta.model_name
+        key_field = NATURAL_KEY_FIELDS.get(model_name)
+        key = getattr(instance, key_field) if key_field else None
+        return cls.objects.create(
+            model=model_name,
+            object_id=instance.pk,
+            key=None if key is None else str(key),
+        )
@@ -0,0 +1,91 @@
+"""Signal handlers used to keep the derived data in the common
+application (caches, indexes, ect.) in sync with our models.
+
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache_utils import bump_model_version
+from .grid5_index import invalidate_grid5_index
+from .models import (
+    BottomType,
+    CoverType,
+    Grid5,
+    Grid5Lattice,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnitType,
+    Species,
+    Taxon,
+    Tombstone,
+    Vessel,
+)
+
+
+@receiver(post_save, sender=Grid5)
+@receiver(post_delete, sender=Grid5)
+@receiver(post_save, sender=Grid5Lattice)
+@receiver(post_delete, sender=Grid5Lattice)
+@receiver(post_save, sender=Lake)
+@receiver(post_delete, sender=Lake)
+def reset_grid5_index(sender, **kwargs):
+    """Discard our in-memory grid5 index and lattices whenever a grid
+    (or the lake or lattice it belongs to) changes."""
+    invalidate_grid5_index()
+
+
+# the models that have a version (see common.cache_utils).  Receivers
+# are registered for each model rather than for every sender so
+# django can still use fast deletes for the others - in particular
+# the derived LakeSubdivision pieces, which are replaced every time a
+# lake is saved (Lake.subdivide() updates their version itself).
+VERSIONED_MODELS = (
+    BottomType,
+    CoverType,
+    Grid5,
+    Grid5Lattice,
+    Lake,
+    LakeManagementUnitType,
+    ManagementUnit,
+    ManagementUnitType,
+    Species,
+    Taxon,
+    Vessel,
+)
+
+# derived models and models that are not exposed by our api do not
+# need tombstones
+TOMBSTONE_MODELS = tuple(x for x in VERSIONED_MODELS if x is not Grid5Lattice)
+
+
+def update_model_version(sender, **kwargs):
+    """Assign a new version to any of our models when an object is
+    saved or deleted (see common.cache_utils)."""
+    bump_model_version(sender)
+
+
+def update_m2m_model_versions(sender, instance, action, model, **kwargs):
+    """Assign new versions to the models on both sides of a
+    many-to-many relationship when it changes."""
+    if action.startswith("post_"):
+        bump_model_version(type(instance), model, sender)
+
+
+def create_tombstone(sender, instance, **kwargs):
+    """Record the deletion of any of our objects so it can be reported
+    by our change feed."""
+    Tombstone.record(instance)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(update_model_version, sender=model)
+    post_delete.connect(update_model_version, sender=model)
+    for field in model._meta.local_many_to_many:
+        m2m_changed.connect(
+            update_m2m_model_versions, sender=field.remote_field.through
+        )
+
+for model in TOMBSTONE_MODELS:
+    post_delete.connect(create_tombstone, sender=model)
@@ -0,0 +1,145 @@
+"""
+=============================================================
+~/uglmu_common/common/species_cache.py
+
+ Description:
+
+  An immutable, in-process snapshot of our species table.  The table
+  only has a few hundred rows and rarely changes, so rather than
+  querying it every time a species (or its FN012 limits) is needed,
+  each process reads it once and keeps:
+
+  + records - a tuple of read-only dictionaries (one per species, in
+    spc order) containing the values of every field
+  + by_spc - a read-only map of species code to record
+  + by_abbrev - a read-only map of abbreviation to record
+  + limits - the FN012 limits and flen-tlen regression coefficients
+    of every species as a numpy array (see SpeciesLimits)
+
+  The snapshot is tagged with the version of the Species model (see
+  common.cache_utils).  The version is replaced whenever a species
+  is saved or deleted, and because it is stored in the shared cache,
+  every process rebuilds its snapshot the next time it is used.
+
+  Note - Species.objects.update() and bulk_update() do not send
+  signals - call bump_model_version(Species) after using them.
+
+=============================================================
+"""
+
+from threading import Lock
+from types import MappingProxyType
+
+import numpy as np
+
+from .cache_utils import model_version
+from .models import Species
+
+# the order of the columns in our array of species limits (and
+# flen-tlen regression coefficients)
+FN012_FIELDS = (
+    "flen_min",
+    "flen_max",
+    "tlen_min",
+    "tlen_max",
+    "rwt_min",
+    "rwt_max",
+    "k_min_error",
+    "k_min_warn",
+    "k_max_error",
+    "k_max_warn",
+    "flen2tlen_alpha",
+    "flen2tlen_beta",
+)
+
+_lock = Lock()
+_snapshot = None
+
+
+class SpeciesLimits:
+    """The FN012 limits (and flen-tlen regression coefficients) of
+    every species as a 2d array - one row per species (in the order
+    of codes) and one column per field in FN012_FIELDS.  The last row
+    is all nan and is used for fish with unknown species codes.
+
+    """
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        self.codes = [row[0] for row in rows]
+        self.index = {spc: i for i, spc in enumerate(self.codes)}
+        values = [row[1:] for row in rows] + [(None,) * len(FN012_FIELDS)]
+        self.values = np.array(values, dtype=float).reshape(-1, len(FN012_FIELDS))
+        self.values.flags.writeable = False
+
+    @classmethod
+    def from_db(cls):
+        version = model_version(Species)
+        rows = Species.objects.order_by("spc").values_list("spc", *FN012_FIELDS)
+        return cls(list(rows), version=version)
+
+    def column(self, field):
+        return self.values[:, FN012_FIELDS.index(field)]
+
+    def row_indices(self, spc):
+        """Return the row of each species code in spc - unknown codes get
+        the last (empty) row."""
+        codes, inverse = np.unique(spc, return_inverse=True)
+        unknown = len(self.codes)
+        rows = np.array([self.index.get(x, unknown) for x in codes], dtype=int)
+        return rows[inverse]
+
+
+class SpeciesSnapshot:
+    """A read-only copy of every species in our species table."""
+
+    def __init__(self, records, version=None):
+        self.version = version
+        self.records = tuple(MappingProxyType(dict(x)) for x in records)
+        self.by_spc = MappingProxyType({x["spc"]: x for x in self.records})
+        # abbreviations are not unique - keep the first species (by spc)
+        by_abbrev = {}
+        for record in self.records:
+            if record["abbrev"]:
+                by_abbrev.setdefault(record["abbrev"], record)
+        self.by_abbrev = MappingProxyType(by_abbrev)
+        self.limits = SpeciesLimits(
+            [(x["spc"],) + tuple(x[field] for field in FN012_FIELDS) for x in records],
+            version=version,
+        )
+
+    @classmethod
+    def from_db(cls):
+        # get the version first so a change made while we are reading
+        # the table will trigger another rebuild.
+        version = model_version(Species)
+        return cls(list(Species.objects.order_by("spc").values()), version=version)
+
+    def __len__(self):
+        return len(self.records)
+
+
+def get_species_snapshot():
+    """Return the snapshot of the current version of our species table -
+    it is only rebuilt when a species has changed."""
+    global _snapshot
+    version = model_version(Species)
+    snapshot = _snapshot
+    if snapshot is None or snapshot.version != version:
+        with _lock:
+            if _snapshot is None or _snapshot.version != version:
+                _snapshot = SpeciesSnapshot.from_db()
+            snapshot = _snapshot
+    return snapshot
+
+
+def get_species(spc):
+    """Return the cached record of the species with the code spc (or
+    None if it does not exist)."""
+    return get_species_snapshot().by_spc.get(spc)
+
+
+def get_species_by_abbrev(abbrev):
+    """Return the cached record of the species with the abbreviation
+    abbrev (or None if it does not exist)."""
+    return get_species_snapshot().by_abbrev.get(abbrev)
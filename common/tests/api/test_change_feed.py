@@ -0,0 +1,105 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_change_feed.py
+
+ DESCRIPTION:
+
+  Clients can sync their local copies of our tables with the
+  modified_since filter on our list endpoints and the change feed,
+  which also reports objects that have been deleted.
+
+=============================================================
+
+"""
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from ...models import Species, Tombstone
+from ..common_factories import LakeFactory, SpeciesFactory
+
+
+@pytest.fixture
+def species_list():
+    return [
+        SpeciesFactory(spc="081", spc_nmco="Lake Trout"),
+        SpeciesFactory(spc="334", spc_nmco="Walleye"),
+    ]
+
+
+@pytest.mark.django_db
+def test_modified_since_filter(client, species_list):
+    """Only the objects modified after the modified_since timestamp
+    should be returned."""
+
+    earlier = timezone.now() - timedelta(days=1)
+    Species.objects.filter(spc="081").update(modified_date=earlier)
+
+    since = (timezone.now() - timedelta(hours=1)).isoformat()
+    url = reverse("common_api:species-list")
+    response = client.get(url, {"modified_since": since})
+    assert response.status_code == status.HTTP_200_OK
+    assert [x["spc"] for x in response.data] == ["334"]
+
+
+@pytest.mark.django_db
+def test_modified_since_invalid(client):
+    """An invalid timestamp should return a 400 response."""
+
+    url = reverse("common_api:lake-list")
+    response = client.get(url, {"modified_since": "yesterday"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_tombstone_created_on_delete(species_list):
+    """Deleting an object should create a tombstone with its natural
+    key."""
+
+    species = species_list[0]
+    pk = species.pk
+    species.delete()
+
+    tombstone = Tombstone.objects.get()
+    assert tombstone.model == "species"
+    assert tombstone.object_id == pk
+    assert tombstone.key == "081"
+
+
+@pytest.mark.django_db
+def test_change_feed(client, species_list):
+    """The change feed should report modified and deleted objects since
+    the timestamp for each of the requested tables."""
+
+    since = timezone.now() - timedelta(minutes=5)
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    species_list[1].delete()
+
+    url = reverse("common_api:change-feed")
+    response = client.get(url, {"since": since.isoformat(), "tables": "lake,species"})
+    assert response.status_code == status.HTTP_200_OK
+
+    changes = response.data["changes"]
+    assert set(changes.keys()) == {"lake", "species"}
+    assert [x["key"] for x in changes["lake"]["modified"]] == ["HU"]
+    assert [x["key"] for x in changes["species"]["modified"]] == ["081"]
+    assert [x["key"] for x in changes["species"]["deleted"]] == ["334"]
+
+    response = client.get(url, {"since": response.data["until"].isoformat()})
+    assert response.data["changes"]["species"] == {"modified": [], "deleted": []}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params", [{}, {"since": "foo"}, {"since": "2021-01-01", "tables": "fish"}]
+)
+def test_change_feed_400(client, params):
+    """The since parameter is required and must be valid, and only
+    known tables can be requested."""
+
+    url = reverse("common_api:change-feed")
+    response = client.get(url, params)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
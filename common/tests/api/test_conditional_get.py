@@ -0,0 +1,101 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_conditional_get.py
+
+ DESCRIPTION:
+
+  Our list endpoints include an ETag header and should return a 304
+  if the client already has the current version of the data
+  (If-None-Match).  They do not include a Last-Modified header - it
+  can't reflect deleted records.
+
+=============================================================
+
+"""
+
+import time
+
+import pytest
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework import status
+
+from ..common_factories import LakeFactory, SpeciesFactory
+
+
+@pytest.fixture
+def species_list():
+    return [
+        SpeciesFactory(spc="081", spc_nmco="Lake Trout"),
+        SpeciesFactory(spc="334", spc_nmco="Walleye"),
+    ]
+
+
+@pytest.mark.django_db
+def test_list_etag_not_modified(client, species_list):
+    """If we request a list endpoint with the ETag returned by a previous
+    request, we should get a 304 with no content."""
+
+    url = reverse("common_api:species-list")
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+    assert not response.has_header("Last-Modified")
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response["ETag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_list_if_modified_since_after_delete(client, species_list):
+    """Deleting a record does not change the most recent modified date
+    of the list - a request with only If-Modified-Since should never
+    get a 304 with the stale list."""
+
+    url = reverse("common_api:species-list")
+    assert client.get(url).status_code == status.HTTP_200_OK
+    since = http_date(time.time() + 60)
+
+    species_list[1].delete()
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 1
+
+
+@pytest.mark.django_db
+def test_list_etag_changes(client, species_list):
+    """The ETag should change if a record is modified, deleted or if the
+    query parameters change."""
+
+    url = reverse("common_api:species-list")
+    etag = client.get(url)["ETag"]
+
+    assert client.get(url, {"spc": "081"})["ETag"] != etag
+
+    species = species_list[0]
+    species.spc_nmco = "Laker"
+    species.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    etag = response["ETag"]
+
+    species_list[1].delete()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data) == 1
+
+
+@pytest.mark.django_db
+def test_list_etag_single_query(client, django_assert_num_queries):
+    """Validating a request should only require one aggregate query
+    - the records themselves should not be retrieved."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+
+    url = reverse("common_api:lake-list")
+    etag = client.get(url)["ETag"]
+
+    with django_assert_num_queries(1):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
@@ -0,0 +1,106 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_geom_resolution.py
+
+ DESCRIPTION:
+
+  The spatial lookup endpoints can return simplified geometries -
+  either one of our precomputed resolutions (?resolution=low) or a
+  simplification tolerance in decimal degrees (?tolerance=0.01).
+
+=============================================================
+
+"""
+
+import json
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.urls import reverse
+from rest_framework import status
+
+from ...models import Lake
+from ..common_factories import Grid5Factory, LakeFactory
+
+
+@pytest.fixture()
+def detailed_polygon():
+    """A polygon somewhere in Lake Huron with a lot of small wiggles
+    along its southern edge."""
+
+    steps = 100
+    coords = []
+    for i in range(steps + 1):
+        x = -82.5 + i * 0.5 / steps
+        y = 44.0 + (0.0005 if i % 2 else 0)
+        coords.append("{} {}".format(x, y))
+    coords.extend(["-82.0 44.5", "-82.5 44.5", "-82.5 44.0"])
+    wkt = "MULTIPOLYGON((({})))".format(",".join(coords))
+    return GEOSGeometry(wkt, srid=4326)
+
+
+def vertex_count(geojson):
+    """Return the number of vertices in a geojson multipolygon."""
+    geom = json.loads(geojson)
+    return sum(len(ring) for poly in geom["coordinates"] for ring in poly)
+
+
+@pytest.mark.django_db
+def test_simplified_geoms_populated_on_save(detailed_polygon):
+    """When a lake is saved, each of our simplified geometries should be
+    populated, and the lower resolutions should have fewer vertices."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=detailed_polygon)
+    lake = Lake.objects.defer(None).get(abbrev="HU")
+
+    assert lake.geom_high is not None
+    assert lake.geom_medium is not None
+    assert lake.geom_low is not None
+    assert lake.geom_low.num_coords < lake.geom.num_coords
+
+
+@pytest.mark.django_db
+def test_lake_geom_resolution(client, detailed_polygon):
+    """If resolution=low is included in the request, the lake geometry
+    should be simplified."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=detailed_polygon)
+    point = detailed_polygon.centroid.wkt
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    full = client.post(url + "?geom=geom", {"point": point})
+    low = client.post(url + "?geom=geom&resolution=low", {"point": point})
+
+    assert low.status_code == status.HTTP_200_OK
+    assert vertex_count(low.data["geom"]) < vertex_count(full.data["geom"])
+
+
+@pytest.mark.django_db
+def test_grid5_geom_tolerance(client, detailed_polygon):
+    """If a tolerance is included in the request, the grid geometry
+    should be simplified with it."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    Grid5Factory(grid=1234, lake=huron, geom=detailed_polygon)
+    point = detailed_polygon.centroid.wkt
+
+    url = reverse("common_api:api-lookup-grid5-from-pt")
+    full = client.post(url + "?geom=geom", {"point": point})
+    simple = client.post(url + "?geom=geom&tolerance=0.005", {"point": point})
+
+    assert simple.status_code == status.HTTP_200_OK
+    assert vertex_count(simple.data["geom"]) < vertex_count(full.data["geom"])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query", ["?geom=geom&resolution=tiny", "?geom=geom&tolerance=foo"]
+)
+def test_invalid_geom_resolution(client, detailed_polygon, query):
+    """An unknown resolution or a tolerance that is not a number should
+    return a 400 response."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=detailed_polygon)
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    response = client.post(url + query, {"point": detailed_polygon.centroid.wkt})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
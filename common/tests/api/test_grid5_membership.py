@@ -0,0 +1,112 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_grid5_membership.py
+
+ DESCRIPTION:
+
+  The grid5 membership endpoint returns a sparse grid x management
+  unit matrix - each management unit has an array of the indices of
+  the grids it contains.
+
+=============================================================
+
+"""
+
+import pytest
+from django.core.cache import caches
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import (
+    Grid5Factory,
+    LakeFactory,
+    LakeManagementUnitTypeFactory,
+    ManagementUnitFactory,
+    ManagementUnitTypeFactory,
+)
+
+
+@pytest.fixture
+def memberships():
+    """Three grids in Lake Huron, two QMAs and one statistical
+    district."""
+
+    caches["default"].clear()
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    grids = [Grid5Factory(grid=x, lake=huron) for x in [1001, 1002, 1003]]
+
+    qma = ManagementUnitTypeFactory(abbrev="qma", label="QMA", slug="qma")
+    stat_dist = ManagementUnitTypeFactory(
+        abbrev="stat_dist", label="Statistical District", slug="stat_dist"
+    )
+    lake_qma = LakeManagementUnitTypeFactory(lake=huron, management_unit_type=qma)
+    lake_sd = LakeManagementUnitTypeFactory(lake=huron, management_unit_type=stat_dist)
+
+    qma1 = ManagementUnitFactory(
+        label="4-1", lake=huron, lake_management_unit_type=lake_qma
+    )
+    qma1.grids.add(grids[0], grids[1])
+    qma2 = ManagementUnitFactory(
+        label="4-2", lake=huron, lake_management_unit_type=lake_qma
+    )
+    qma2.grids.add(grids[2])
+    sd = ManagementUnitFactory(
+        label="OH-3", lake=huron, lake_management_unit_type=lake_sd
+    )
+    sd.grids.add(*grids)
+
+    yield dict(grids=grids, qma1=qma1, qma2=qma2, sd=sd)
+    caches["default"].clear()
+
+
+def grid_slugs(data, mu_slug):
+    """Return the slugs of the grids in the management unit."""
+    mu = [x for x in data["management_units"] if x["slug"] == mu_slug][0]
+    return [data["grids"][i][1] for i in mu["grids"]]
+
+
+@pytest.mark.django_db
+def test_grid5_membership(client, memberships):
+    """Each management unit should include the indices of its grids."""
+
+    url = reverse("common_api:grid5-membership")
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+
+    data = response.data
+    assert [x[1] for x in data["grids"]] == ["hu_1001", "hu_1002", "hu_1003"]
+    assert grid_slugs(data, memberships["qma1"].slug) == ["hu_1001", "hu_1002"]
+    assert grid_slugs(data, memberships["qma2"].slug) == ["hu_1003"]
+    assert len(grid_slugs(data, memberships["sd"].slug)) == 3
+
+
+@pytest.mark.django_db
+def test_grid5_membership_mu_type_filter(client, memberships):
+    """The mu_type parameter should limit the management units but not
+    the grids."""
+
+    url = reverse("common_api:grid5-membership")
+    data = client.get(url, {"mu_type": "qma"}).data
+
+    assert {x["mu_type"] for x in data["management_units"]} == {"qma"}
+    assert len(data["management_units"]) == 2
+    assert len(data["grids"]) == 3
+
+
+@pytest.mark.django_db
+def test_grid5_membership_rebuilt_on_m2m_changed(client, memberships):
+    """If the grids in a management unit change, the matrix should be
+    rebuilt and get a new version."""
+
+    url = reverse("common_api:grid5-membership")
+    response = client.get(url)
+    etag = response["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    qma2 = memberships["qma2"]
+    qma2.grids.add(memberships["grids"][1])
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert grid_slugs(response.data, qma2.slug) == ["hu_1002", "hu_1003"]
@@ -0,0 +1,126 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_keyset_pagination.py
+
+ DESCRIPTION:
+
+  The grid5, management unit and taxon list endpoints support keyset
+  (cursor) pagination if the query parameter pagination=cursor is
+  included in the request.  Pages are ordered by slug (grids and
+  management units) or by path (taxa) and the responses do not
+  include a count.
+
+=============================================================
+
+"""
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from ...models import Taxon
+from ..common_factories import Grid5Factory, LakeFactory
+from ..fixtures import taxon_list
+
+
+def walk_pages(client, url, params):
+    """Follow the next links starting at url and return a list of the
+    pages that were returned."""
+    pages = []
+    response = client.get(url, params)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        pages.append(response.data)
+        if response.data["next"] is None:
+            return pages
+        response = client.get(response.data["next"])
+
+
+@pytest.fixture
+def grid_list():
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    return [Grid5Factory(grid=x, lake=huron) for x in [1005, 1001, 1004, 1002, 1003]]
+
+
+@pytest.mark.django_db
+def test_grid5_keyset_pagination(client, grid_list):
+    """If we walk through the grids with cursor pagination, we should
+    get every grid exactly once, ordered by slug."""
+
+    url = reverse("common_api:grid5-list")
+    pages = walk_pages(client, url, {"pagination": "cursor", "page_size": 2})
+
+    assert len(pages) == 3
+    slugs = [x["slug"] for page in pages for x in page["results"]]
+    assert slugs == sorted(x.slug for x in grid_list)
+    assert "count" not in pages[0]
+
+
+@pytest.mark.django_db
+def test_page_number_pagination_by_default(client, grid_list):
+    """Without the pagination parameter, we should still get page
+    number pagination with a count."""
+
+    url = reverse("common_api:grid5-list")
+    response = client.get(url, {"page_size": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 5
+    assert "page=2" in response.data["next"]
+
+
+@pytest.mark.django_db
+def test_keyset_pagination_stable_cursor(client, grid_list):
+    """A cursor should continue after the last grid of the previous
+    page even if a grid on an earlier page is deleted."""
+
+    url = reverse("common_api:grid5-list")
+    first = client.get(url, {"pagination": "cursor", "page_size": 2}).data
+
+    grid_list[1].delete()
+
+    second = client.get(first["next"]).data
+    slugs = [x["slug"] for x in second["results"]]
+    assert slugs == ["hu_1003", "hu_1004"]
+
+
+@pytest.mark.django_db
+def test_taxon_keyset_pagination(client, taxon_list):
+    """Taxa should be returned in path order and the path should not
+    be included in the response."""
+
+    url = reverse("common_api:taxon-list")
+    pages = walk_pages(client, url, {"pagination": "cursor", "page_size": 2})
+
+    taxa = [x["taxon"] for page in pages for x in page["results"]]
+    expected = list(Taxon.objects.order_by("path").values_list("taxon", flat=True))
+    assert taxa == expected
+    assert "path" not in pages[0]["results"][0]
+
+
+@pytest.mark.django_db
+def test_keyset_page_not_modified(client, grid_list, django_assert_num_queries):
+    """The validators of a cursor page are calculated from the model
+    versions - a current page should get a 304 without querying the
+    grid table."""
+
+    url = reverse("common_api:grid5-list")
+    params = {"pagination": "cursor", "page_size": 2}
+    etag = client.get(url, params)["ETag"]
+
+    with django_assert_num_queries(0):
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_keyset_page_etag_changes(client, grid_list):
+    """The etag of a cursor page should change when a grid is saved."""
+
+    url = reverse("common_api:grid5-list")
+    params = {"pagination": "cursor", "page_size": 2}
+    etag = client.get(url, params)["ETag"]
+
+    grid_list[0].save()
+
+    response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
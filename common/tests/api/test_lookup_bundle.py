@@ -0,0 +1,138 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_lookup_bundle.py
+
+ DESCRIPTION:
+
+  The lookup bundle endpoint returns all of our small lookup tables
+  in a single, precompressed response with a content hash version.
+
+=============================================================
+
+"""
+
+import gzip
+import json
+
+import brotli
+import pytest
+from django.core.cache import caches
+from django.http import HttpRequest
+from django.urls import reverse
+from rest_framework import status
+
+from ...api.bundle import BUNDLE_VIEWS, bundle_cache_prefix, preferred_encoding
+from ..common_factories import LakeFactory, SpeciesFactory, VesselFactory
+
+
+@pytest.fixture
+def lookups():
+    caches["default"].clear()
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    SpeciesFactory(spc="081", spc_nmco="Lake Trout")
+    VesselFactory(abbrev="AT", label="Atigamig")
+    yield
+    caches["default"].clear()
+
+
+@pytest.mark.django_db
+def test_lookup_bundle_tables(client, lookups):
+    """The bundle should contain each of our lookup tables, and each
+    table should match the data returned by its list endpoint."""
+
+    url = reverse("common_api:lookup-bundle")
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert not response.has_header("Content-Encoding")
+
+    bundle = json.loads(response.content)
+    assert set(bundle["tables"].keys()) == set(BUNDLE_VIEWS.keys())
+    assert response["ETag"] == 'W/"{}"'.format(bundle["version"])
+
+    lakes = json.loads(client.get(reverse("common_api:lake-list")).content)
+    assert bundle["tables"]["lakes"] == lakes
+    vessels = json.loads(client.get(reverse("common_api:vessel-list")).content)
+    assert bundle["tables"]["vessels"] == vessels
+
+
+@pytest.mark.django_db
+def test_lookup_bundle_gzip(client, lookups):
+    """If the client accepts gzip, the bundle should be returned
+    compressed."""
+
+    url = reverse("common_api:lookup-bundle")
+    plain = client.get(url).content
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+    assert response["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response["Vary"]
+    assert gzip.decompress(response.content) == plain
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip", "gzip"),
+        ("gzip;q=0", "identity"),
+        ("*", "br"),
+        ("*;q=0.5, br;q=0", "gzip"),
+        ("identity", "identity"),
+        ("", "identity"),
+    ],
+)
+def test_preferred_encoding(header, expected):
+    """The encoding with the highest quality value should be used, and
+    encodings with q=0 should never be used."""
+
+    request = HttpRequest()
+    request.META["HTTP_ACCEPT_ENCODING"] = header
+    assert preferred_encoding(request) == expected
+
+
+@pytest.mark.django_db
+def test_lookup_bundle_brotli(client, lookups):
+    """If the client accepts brotli, the bundle should be returned
+    compressed with brotli."""
+
+    url = reverse("common_api:lookup-bundle")
+    plain = client.get(url).content
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip, deflate, br")
+
+    assert response["Content-Encoding"] == "br"
+    assert brotli.decompress(response.content) == plain
+
+
+@pytest.mark.django_db
+def test_lookup_bundle_encodings_cached_separately(client, lookups):
+    """Each encoding should be stored under its own key, so a request
+    only fetches the encoding it is served."""
+
+    url = reverse("common_api:lookup-bundle")
+    response = client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+
+    cache = caches["default"]
+    prefix = bundle_cache_prefix()
+    assert cache.get(prefix + ":gzip") == response.content
+    assert cache.get(prefix + ":version") in response["ETag"]
+    for encoding in ["br", "identity"]:
+        assert cache.get("{}:{}".format(prefix, encoding)) is not None
+
+
+@pytest.mark.django_db
+def test_lookup_bundle_version(client, lookups):
+    """The bundle version should not change until one of the lookup
+    tables changes, and current versions should get a 304."""
+
+    url = reverse("common_api:lookup-bundle")
+    etag = client.get(url)["ETag"]
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    SpeciesFactory(spc="334", spc_nmco="Walleye")
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["ETag"] != etag
+    species = json.loads(response.content)["tables"]["species"]
+    assert {x["spc"] for x in species} == {"081", "334"}
@@ -0,0 +1,96 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_point_memo.py
+
+ DESCRIPTION:
+
+  If the COMMON_POINT_MEMO_CACHE setting is provided, the spatial
+  attributes of each (quantized) point are memoized so repeated
+  station coordinates are not resolved again until one of our
+  geometries changes.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ...api.point_memo import get_point_attrs, quantize_point
+from ..common_factories import (
+    Grid5Factory,
+    LakeFactory,
+    LakeManagementUnitTypeFactory,
+    ManagementUnitFactory,
+    ManagementUnitTypeFactory,
+)
+
+
+@pytest.fixture()
+def memo(settings):
+    settings.COMMON_POINT_MEMO_CACHE = "default"
+    settings.COMMON_GRID5_LOOKUP = "db"
+    caches["default"].clear()
+    yield caches["default"]
+    caches["default"].clear()
+
+
+@pytest.fixture()
+def huron():
+    polygon = GEOSGeometry(
+        "MULTIPOLYGON(((-82.5 44.0,-82.0 44.0,-82.0 44.5,-82.5 44.5,-82.5 44.0)))",
+        srid=4326,
+    )
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygon)
+    mu_type = ManagementUnitTypeFactory(
+        slug="stat_dist", abbrev="stat_dist", label="Statistical District"
+    )
+    lake_mu_type = LakeManagementUnitTypeFactory(
+        lake=lake, management_unit_type=mu_type
+    )
+    ManagementUnitFactory(
+        label="OH-3", lake=lake, geom=polygon, lake_management_unit_type=lake_mu_type
+    )
+    Grid5Factory(grid=1234, lake=lake, geom=polygon)
+    return lake
+
+
+def test_quantize_point():
+    """Coordinates should be rounded to the requested precision."""
+    pt = quantize_point(Point(-81.123456, 44.987654, srid=4326), 3)
+    assert (pt.x, pt.y) == (-81.123, 44.988)
+
+
+@pytest.mark.django_db
+def test_point_memo(memo, huron):
+    """Points that have already been resolved should be returned from
+    the memo without querying our geometries."""
+
+    points = [Point(-82.25, 44.25, srid=4326), Point(-87.25, 48.25, srid=4326)]
+    first = get_point_attrs(points)
+    assert first[0]["lake"]["abbrev"] == "HU"
+    assert first[0]["manUnit"]["slug"] == "hu_stat_dist_oh-3"
+    assert first[0]["grid5"]["slug"] == "hu_1234"
+    assert first[1]["lake"] == ""
+
+    # a point that rounds to the same coordinates:
+    points = [Point(-82.250001, 44.249999, srid=4326), points[1]]
+    with CaptureQueriesContext(connection) as ctx:
+        second = get_point_attrs(points)
+    assert second == first
+    assert not [x for x in ctx.captured_queries if "unnest" in x["sql"]]
+
+
+@pytest.mark.django_db
+def test_point_memo_invalidated(memo, huron):
+    """Saving a lake (or grid or management unit) should invalidate the
+    memo."""
+
+    pt = Point(-82.25, 44.25, srid=4326)
+    assert get_point_attrs([pt])[0]["lake"]["lake_name"] == "Lake Huron"
+
+    huron.lake_name = "Huron"
+    huron.save()
+    assert get_point_attrs([pt])[0]["lake"]["lake_name"] == "Huron"
@@ -0,0 +1,191 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_response_cache.py
+
+ DESCRIPTION:
+
+  If the COMMON_API_CACHE setting is provided, the rendered responses
+  of our read-only views are cached and served without touching the
+  database until one of the models they depend on changes.
+
+=============================================================
+
+"""
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from ...cache_utils import model_version, model_versions
+from ...models import Grid5, LakeSubdivision, ManagementUnit
+from ..common_factories import Grid5Factory, LakeFactory, ManagementUnitFactory
+
+
+@pytest.fixture
+def response_cache(settings):
+    settings.COMMON_API_CACHE = "default"
+    caches["default"].clear()
+    yield caches["default"]
+    caches["default"].clear()
+
+
+@pytest.mark.django_db
+def test_cached_response_served(client, response_cache, django_assert_num_queries):
+    """The second request for the same url should be served from the
+    cache without any database queries and the content should be the
+    same."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    url = reverse("common_api:lake-list")
+
+    first = client.get(url)
+    assert first.status_code == status.HTTP_200_OK
+
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.status_code == status.HTTP_200_OK
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+
+
+@pytest.mark.django_db
+def test_cached_response_per_host(client, settings, response_cache):
+    """Paginated responses contain absolute links - responses rendered
+    for one host (or scheme) should not be served to another."""
+
+    settings.ALLOWED_HOSTS = ["testserver", "example.com"]
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    for grid in [1001, 1002, 1003]:
+        Grid5Factory(grid=grid, lake=huron)
+    url = reverse("common_api:grid5-list")
+    params = {"page_size": 2}
+
+    first = client.get(url, params)
+    assert first.json()["next"].startswith("http://testserver/")
+
+    response = client.get(url, params, HTTP_HOST="example.com")
+    assert response.json()["next"].startswith("http://example.com/")
+
+    response = client.get(url, params, secure=True)
+    assert response.json()["next"].startswith("https://testserver/")
+
+
+@pytest.mark.django_db
+def test_browsable_api_not_cached(client, response_cache, django_assert_num_queries):
+    """Browsable api responses contain user specific content (e.g. the
+    csrf token) and should never be cached."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    url = reverse("common_api:lake-list")
+
+    first = client.get(url, {"format": "api"})
+    assert first.status_code == status.HTTP_200_OK
+    assert first["Content-Type"].startswith("text/html")
+
+    # the second request is rendered again:
+    with CaptureQueriesContext(connection) as queries:
+        client.get(url, {"format": "api"})
+    assert len(queries) > 0
+
+    # the json response is still cached:
+    client.get(url)
+    with django_assert_num_queries(0):
+        client.get(url)
+
+
+@pytest.mark.django_db
+def test_cached_response_not_modified(client, response_cache):
+    """Cached responses should still answer conditional requests."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    url = reverse("common_api:lake-list")
+
+    etag = client.get(url)["ETag"]
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_query_string_normalized(client, response_cache, django_assert_num_queries):
+    """The order of the query parameters should not matter."""
+
+    LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    url = reverse("common_api:lake-list")
+
+    client.get(url + "?abbrev=HU&lake_name=Lake+Huron")
+    with django_assert_num_queries(0):
+        client.get(url + "?lake_name=Lake+Huron&abbrev=HU")
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_save(client, response_cache):
+    """If an object is saved or deleted, responses that depend on it
+    should not be served from the cache."""
+
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    url = reverse("common_api:lake-list")
+    client.get(url)
+
+    lake.lake_name = "Huron"
+    lake.save()
+    response = client.get(url)
+    assert response.data[0]["lake_name"] == "Huron"
+
+    lake.delete()
+    response = client.get(url)
+    assert response.data == []
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_related_model(client, response_cache):
+    """Changing a related model (the lake of a grid) should invalidate
+    the cached grid responses too."""
+
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    Grid5Factory(grid=1234, lake=lake)
+    url = reverse("common_api:grid5-detail", kwargs={"slug": "hu_1234"})
+
+    assert client.get(url).data["lake"]["lake_name"] == "Lake Huron"
+
+    lake.lake_name = "Huron"
+    lake.save()
+    assert client.get(url).data["lake"]["lake_name"] == "Huron"
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_m2m_changed(response_cache):
+    """Changing a many-to-many relationship should assign new versions
+    to the models on both sides of it."""
+
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    mu = ManagementUnitFactory(lake=lake)
+    grid = Grid5Factory(grid=1234, lake=lake)
+
+    versions = model_versions(ManagementUnit, Grid5)
+    mu.grids.add(grid)
+    new_versions = model_versions(ManagementUnit, Grid5)
+
+    assert versions[0] != new_versions[0]
+    assert versions[1] != new_versions[1]
+
+
+def test_derived_models_fast_delete():
+    """Our version and tombstone receivers should not be registered for
+    the derived lake subdivisions - django can delete them without
+    loading them."""
+
+    assert Collector(using="default").can_fast_delete(LakeSubdivision)
+
+
+@pytest.mark.django_db
+def test_lake_save_updates_subdivision_version(response_cache):
+    """Saving a lake replaces its subdivided pieces - the version of
+    LakeSubdivision should change."""
+
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    version = model_version(LakeSubdivision)
+    lake.save()
+    assert model_version(LakeSubdivision) != version
@@ -0,0 +1,90 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_sparse_fields.py
+
+ DESCRIPTION:
+
+  Clients can limit the fields returned by our list and detail
+  endpoints with the fields query parameter (?fields=slug,label).
+  Fields that are not requested should not be selected from the
+  database.
+
+=============================================================
+
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import Grid5Factory, LakeFactory
+
+
+@pytest.fixture
+def grid_list():
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    return [Grid5Factory(grid=x, lake=huron) for x in [1001, 1002]]
+
+
+def selected_sql(queries):
+    """Return the sql of the select statements that were executed."""
+    return " ".join(
+        x["sql"] for x in queries if x["sql"].lstrip().upper().startswith("SELECT")
+    )
+
+
+@pytest.mark.django_db
+def test_list_sparse_fields(client, grid_list):
+    """Only the requested fields should be returned, and the columns of
+    the other fields should not be selected."""
+
+    url = reverse("common_api:grid5-list")
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, {"fields": "slug,grid"})
+    assert response.status_code == status.HTTP_200_OK
+
+    for item in response.data["results"]:
+        assert set(item.keys()) == {"slug", "grid"}
+
+    sql = selected_sql(ctx.captured_queries)
+    assert "centroid" not in sql
+
+
+@pytest.mark.django_db
+def test_detail_sparse_fields(client, grid_list):
+    """Detail views should accept the fields parameter too - model
+    querysets are limited with only()."""
+
+    url = reverse("common_api:lake-detail", kwargs={"abbrev": "HU"})
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url, {"fields": "abbrev"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {"abbrev": "HU"}
+
+    sql = selected_sql(ctx.captured_queries)
+    assert "envelope" not in sql
+    assert "centroid" not in sql
+
+
+@pytest.mark.django_db
+def test_sparse_fields_with_keyset_pagination(client, grid_list):
+    """The fields parameter should work with cursor pagination even if
+    the ordering field is not requested."""
+
+    url = reverse("common_api:grid5-list")
+    response = client.get(
+        url, {"fields": "grid", "pagination": "cursor", "page_size": 1}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["results"] == [{"grid": "1001"}]
+    assert response.data["next"] is not None
+
+
+@pytest.mark.django_db
+def test_sparse_fields_unknown_field(client, grid_list):
+    """Requesting a field that does not exist should return a 400."""
+
+    url = reverse("common_api:grid5-list")
+    response = client.get(url, {"fields": "slug,geom"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
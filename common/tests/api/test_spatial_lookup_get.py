@@ -0,0 +1,135 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_spatial_lookup_get.py
+
+ DESCRIPTION:
+
+  The spatial lookup views also accept GET requests with the point in
+  the query string.  GET responses include ETag and Cache-Control
+  headers that are tied to the versions of our geometries.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import Grid5Factory, LakeFactory
+
+
+@pytest.fixture()
+def huron():
+    polygon = GEOSGeometry(
+        "MULTIPOLYGON(((-82.5 44.0,-82.0 44.0,-82.0 44.5,-82.5 44.5,-82.5 44.0)))",
+        srid=4326,
+    )
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygon)
+    Grid5Factory(grid=1234, lake=lake, geom=polygon)
+    return lake
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "view",
+    [
+        "api-lookup-lake-from-pt",
+        "api-lookup-grid5-from-pt",
+        "api-lookup-spatial-attrs",
+    ],
+)
+def test_get_matches_post(client, huron, view):
+    """A GET request should return the same data as a POST request for
+    the same point."""
+
+    url = reverse("common_api:" + view)
+    posted = client.post(url, {"point": "POINT(-82.25 44.25)"})
+    response = client.get(url, {"lon": -82.25, "lat": 44.25})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == posted.data
+    assert response.has_header("ETag")
+    assert "no-cache" in response["Cache-Control"]
+    assert "Accept" in response["Vary"]
+    assert not posted.has_header("ETag")
+
+
+@pytest.mark.django_db
+def test_get_max_age(client, settings, huron):
+    """If COMMON_LOOKUP_MAX_AGE is set, caches can use the response for
+    that many seconds without revalidating it."""
+
+    settings.COMMON_LOOKUP_MAX_AGE = 300
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    response = client.get(url, {"lon": -82.25, "lat": 44.25})
+    assert "max-age=300" in response["Cache-Control"]
+    assert "no-cache" not in response["Cache-Control"]
+
+
+@pytest.mark.django_db
+def test_get_etag_depends_on_accept(client, huron):
+    """The json and browsable api representations of a lookup should
+    not share an etag."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    params = {"lon": -82.25, "lat": 44.25}
+    json_etag = client.get(url, params, HTTP_ACCEPT="application/json")["ETag"]
+    html_etag = client.get(url, params, HTTP_ACCEPT="text/html")["ETag"]
+    assert json_etag != html_etag
+
+
+@pytest.mark.django_db
+def test_get_canonical_point(client, huron):
+    """Equivalent points should get the same etag regardless of how
+    they are provided."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    etags = [
+        client.get(url, {"lon": "-82.25", "lat": "44.25"})["ETag"],
+        client.get(url, {"lon": "-82.2500000001", "lat": "44.250"})["ETag"],
+        client.get(url, {"point": "POINT(-82.25 44.25)"})["ETag"],
+    ]
+    assert len(set(etags)) == 1
+
+    response = client.get(url, {"lon": "-82.25", "lat": "44.25", "geom": "geom"})
+    assert response["ETag"] not in etags
+
+
+@pytest.mark.django_db
+def test_get_not_modified(client, huron):
+    """Conditional requests should get a 304 until one of our
+    geometries changes."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    params = {"lon": -82.25, "lat": 44.25}
+    etag = client.get(url, params)["ETag"]
+
+    response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    huron.lake_name = "Huron"
+    huron.save()
+    response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["lake_name"] == "Huron"
+
+
+@pytest.mark.django_db
+def test_get_not_found_and_invalid(client, huron):
+    """Points outside of our geometries should return a cacheable 404,
+    requests without a valid point should return a 400."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    response = client.get(url, {"lon": -87.25, "lat": 48.25})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.has_header("ETag")
+
+    response = client.get(url, {"lon": "west", "lat": 48.25})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(url, {"lon": "nan", "lat": "inf"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(url)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
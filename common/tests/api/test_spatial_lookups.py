@@ -18,10 +18,12 @@
 
 """
 import pytest
-from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.geos import GEOSGeometry, Point, Polygon
 from django.urls import reverse
 from rest_framework import status
 
+from ...api.spatial_queries import get_nearest_lake, get_spatial_attrs
+from ...models import LakeSubdivision
 from ..common_factories import (
     Grid5Factory,
     LakeFactory,
@@ -126,6 +128,44 @@ def test_get_spatial_attributes(client, polygonA):
     assert observed.get("slug") == "hu_1234"
 
 
+@pytest.mark.django_db
+def test_get_spatial_attributes_single_query(
+    client, django_assert_num_queries, polygonA
+):
+    """The lake, management unit and grid returned by our spatial
+    attributes endpoint should all be found in one database query."""
+
+    centroid = polygonA.centroid
+
+    huron_obj = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+
+    mu_type = ManagementUnitTypeFactory(
+        slug="stat_dist", abbrev="stat_dist", label="Statistical District"
+    )
+    lake_mu_type = LakeManagementUnitTypeFactory(
+        lake=huron_obj, management_unit_type=mu_type
+    )
+
+    ManagementUnitFactory(
+        label="OH-3",
+        lake=huron_obj,
+        geom=polygonA,
+        lake_management_unit_type=lake_mu_type,
+    )
+
+    Grid5Factory(grid=1234, lake=huron_obj, geom=polygonA)
+
+    url = reverse("common_api:api-lookup-spatial-attrs")
+
+    with django_assert_num_queries(1):
+        response = client.post(url, {"point": centroid.wkt})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["lake"]["abbrev"] == "HU"
+    assert response.data["manUnit"]["slug"] == "hu_stat_dist_oh-3"
+    assert response.data["grid5"]["slug"] == "hu_1234"
+
+
 @pytest.mark.django_db
 def test_get_spatial_attributes_empty(client, polygonA, polygonB):
     """If we pass coordinates to our spatial attributes endpoint that fall
@@ -255,6 +295,30 @@ def test_get_lake_from_point_404(client, polygonA, polygonB):
     assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
+@pytest.mark.django_db
+def test_get_lake_from_point_on_subdivision_seam(client, polygonA):
+    """Points on the seam between two subdivided pieces of a lake are
+    not contained by either piece - they should still be found by
+    each of our lake lookups."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+    # replace the pieces with two halves that meet at -82.25
+    LakeSubdivision.objects.filter(lake=huron).delete()
+    for xmin, xmax in [(-82.5, -82.25), (-82.25, -82.0)]:
+        LakeSubdivision.objects.create(
+            lake=huron, geom=Polygon.from_bbox((xmin, 44.0, xmax, 44.5))
+        )
+    pt = Point(-82.25, 44.25, srid=4326)
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    response = client.post(url, {"point": pt.wkt})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data.get("abbrev") == "HU"
+
+    assert get_spatial_attrs([pt])[0]["lake"]["abbrev"] == "HU"
+    assert get_nearest_lake(pt, 0)["abbrev"] == "HU"
+
+
 @pytest.mark.django_db
 def test_get_manUnit_from_point_pure_wo_param(client, polygonA, polygonB):
     """If we pass coordinates to our management spatial lookup endpoint
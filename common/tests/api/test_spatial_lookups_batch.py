@@ -0,0 +1,168 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_spatial_lookups_batch.py
+
+ DESCRIPTION:
+
+  The batch spatial lookup endpoint accepts an array of points (each
+  with a caller supplied id) and returns the lake, management unit
+  and 5-minute grid that contain each of them.
+
+=============================================================
+
+"""
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import (
+    Grid5Factory,
+    LakeFactory,
+    LakeManagementUnitTypeFactory,
+    ManagementUnitFactory,
+    ManagementUnitTypeFactory,
+)
+
+
+@pytest.fixture()
+def polygonA():
+    """A polygon somewhere in Lake Huron."""
+
+    wkt = (
+        "MULTIPOLYGON(((-82.0 44.0,"
+        + "-82.5 44.0,"
+        + "-82.5 44.5,"
+        + "-82.0 44.5,"
+        + "-82.0 44.0)))"
+    )
+    return GEOSGeometry(wkt.replace("\n", ""), srid=4326)
+
+
+@pytest.fixture()
+def polygonB():
+    """A polygon somewhere in Lake Superior"""
+    wkt = (
+        "MULTIPOLYGON(((-87.0 48.0,"
+        + "-87.5 48.0,"
+        + "-87.5 48.5,"
+        + "-87.0 48.5,"
+        + "-87.0 48.0)))"
+    )
+    return GEOSGeometry(wkt.replace("\n", ""), srid=4326)
+
+
+@pytest.fixture()
+def huron_geoms(polygonA):
+    """A lake, statistical district and grid that all share polygonA."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+
+    mu_type = ManagementUnitTypeFactory(
+        slug="stat_dist", abbrev="stat_dist", label="Statistical District"
+    )
+    lake_mu_type = LakeManagementUnitTypeFactory(
+        lake=huron, management_unit_type=mu_type
+    )
+
+    ManagementUnitFactory(
+        label="OH-3",
+        lake=huron,
+        geom=polygonA,
+        lake_management_unit_type=lake_mu_type,
+    )
+
+    Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+
+    return huron
+
+
+@pytest.mark.django_db
+def test_spatial_attrs_batch(client, huron_geoms, polygonA, polygonB):
+    """If we post a list of points to the batch endpoint, we should get
+    back the spatial attributes of each point with its id.  Points can
+    be wkt, geojson or lon-lat pairs, and points outside of our
+    geometries should have empty strings for each element.
+
+    """
+
+    inside = polygonA.centroid
+    outside = polygonB.centroid
+
+    points = [
+        {"id": "a", "point": inside.wkt},
+        {"id": "b", "point": inside.json},
+        {"id": "c", "point": [inside.x, inside.y]},
+        {"id": "d", "point": outside.wkt},
+    ]
+
+    url = reverse("common_api:api-lookup-spatial-attrs-batch")
+    response = client.post(url, {"points": points}, content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+
+    results = response.data["results"]
+    assert [x["id"] for x in results] == ["a", "b", "c", "d"]
+    assert response.data["invalid"] == []
+
+    for item in results[:3]:
+        assert item["lake"]["abbrev"] == "HU"
+        assert item["manUnit"]["slug"] == "hu_stat_dist_oh-3"
+        assert item["grid5"]["slug"] == "hu_1234"
+        assert item["grid5"]["lake_abbrev"] == "HU"
+
+    outside_item = results[3]
+    assert outside_item["lake"] == ""
+    assert outside_item["manUnit"] == ""
+    assert outside_item["grid5"] == ""
+
+
+@pytest.mark.django_db
+def test_spatial_attrs_batch_matches_single_point(client, huron_geoms, polygonA):
+    """The attributes returned for a point by the batch endpoint should
+    be the same as those returned by the single point endpoint."""
+
+    centroid = polygonA.centroid
+
+    url = reverse("common_api:api-lookup-spatial-attrs")
+    single = client.post(url, {"point": centroid.wkt}).data
+
+    url = reverse("common_api:api-lookup-spatial-attrs-batch")
+    points = [{"id": 1, "point": centroid.wkt}]
+    response = client.post(url, {"points": points}, content_type="application/json")
+    batch = response.data["results"][0]
+
+    for key in ["lake", "manUnit", "grid5"]:
+        assert batch[key] == single[key]
+
+
+@pytest.mark.django_db
+def test_spatial_attrs_batch_invalid_points(client, huron_geoms, polygonA):
+    """Points that cannot be parsed should be returned in the invalid
+    list and omitted from the results."""
+
+    points = [
+        {"id": 1, "point": polygonA.centroid.wkt},
+        {"id": 2, "point": "not a point"},
+        {"id": 3, "point": polygonA.wkt},
+    ]
+
+    url = reverse("common_api:api-lookup-spatial-attrs-batch")
+    response = client.post(url, {"points": points}, content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+
+    assert [x["id"] for x in response.data["results"]] == [1]
+    assert response.data["invalid"] == [2, 3]
+
+
+@pytest.mark.django_db
+def test_spatial_attrs_batch_400(client):
+    """If the points element is missing or is not a list, we should get
+    a 400 response."""
+
+    url = reverse("common_api:api-lookup-spatial-attrs-batch")
+    response = client.post(url, {}, content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.post(
+        url, {"points": "POINT(-81.5 44.5)"}, content_type="application/json"
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
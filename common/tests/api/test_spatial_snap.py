@@ -0,0 +1,100 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_spatial_snap.py
+
+ DESCRIPTION:
+
+  Points that fall just outside of our lakes or grids can be assigned
+  to the nearest feature within a tolerance (in metres) with the snap
+  query parameter.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import Grid5Factory, LakeFactory
+
+# about 40 metres east of our polygon at this latitude:
+OFFSHORE = Point(-81.9995, 44.25, srid=4326)
+
+
+@pytest.fixture()
+def huron():
+    polygon = GEOSGeometry(
+        "MULTIPOLYGON(((-82.5 44.0,-82.0 44.0,-82.0 44.5,-82.5 44.5,-82.5 44.0)))",
+        srid=4326,
+    )
+    lake = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygon)
+    Grid5Factory(grid=1234, lake=lake, geom=polygon)
+    return lake
+
+
+@pytest.mark.django_db
+def test_lake_snap(client, huron):
+    """A point just outside of the lake should not be found without the
+    snap parameter, but should be with a large enough tolerance."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    response = client.post(url, {"point": OFFSHORE.wkt})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.post(url + "?snap=100", {"point": OFFSHORE.wkt})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["abbrev"] == "HU"
+    assert 30 < response.data["distance"] < 50
+
+    response = client.post(url + "?snap=10", {"point": OFFSHORE.wkt})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_lake_snap_contained(client, huron):
+    """Points inside of the lake should have a distance of 0."""
+
+    url = reverse("common_api:api-lookup-lake-from-pt")
+    point = "POINT(-82.25 44.25)"
+    response = client.post(url + "?snap=100", {"point": point})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["distance"] == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("lookup", ["db", "lattice"])
+def test_grid5_snap(client, settings, huron, lookup):
+    """The same nearest grid should be returned regardless of our grid5
+    lookup method."""
+
+    settings.COMMON_GRID5_LOOKUP = lookup
+    url = reverse("common_api:api-lookup-grid5-from-pt")
+
+    response = client.post(url + "?snap=100", {"point": OFFSHORE.wkt})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["slug"] == "hu_1234"
+    assert 30 < response.data["distance"] < 50
+
+
+@pytest.mark.django_db
+def test_grid5_snap_single_query(client, settings, huron, django_assert_num_queries):
+    """With the database grid5 lookup, containment and the nearest grid
+    should be found in a single query."""
+
+    settings.COMMON_GRID5_LOOKUP = "db"
+    url = reverse("common_api:api-lookup-grid5-from-pt")
+
+    with django_assert_num_queries(1):
+        response = client.post(url + "?snap=100", {"point": OFFSHORE.wkt})
+    assert response.data["slug"] == "hu_1234"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("snap", ["far", "-1", "100000"])
+def test_invalid_snap(client, huron, snap):
+    """Snap distances must be positive numbers less than our maximum."""
+
+    url = reverse("common_api:api-lookup-grid5-from-pt")
+    response = client.post(url + "?snap=" + snap, {"point": OFFSHORE.wkt})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
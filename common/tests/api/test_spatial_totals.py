@@ -0,0 +1,126 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_spatial_totals.py
+
+ DESCRIPTION:
+
+  The spatial totals endpoint accepts a list of weighted points and
+  returns the number of points and the sum of their weights in each
+  5-minute grid and management unit.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.urls import reverse
+from rest_framework import status
+
+from ..common_factories import (
+    Grid5Factory,
+    LakeFactory,
+    LakeManagementUnitTypeFactory,
+    ManagementUnitFactory,
+    ManagementUnitTypeFactory,
+)
+
+
+@pytest.fixture()
+def huron_geoms():
+    """A lake and statistical district containing two grids (west and
+    east)."""
+
+    west = GEOSGeometry(
+        "MULTIPOLYGON(((-82.5 44.0,-82.25 44.0,-82.25 44.5,-82.5 44.5,-82.5 44.0)))",
+        srid=4326,
+    )
+    east = GEOSGeometry(
+        "MULTIPOLYGON(((-82.25 44.0,-82.0 44.0,-82.0 44.5,-82.25 44.5,-82.25 44.0)))",
+        srid=4326,
+    )
+    both = west.union(east)
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=both)
+    mu_type = ManagementUnitTypeFactory(
+        slug="stat_dist", abbrev="stat_dist", label="Statistical District"
+    )
+    lake_mu_type = LakeManagementUnitTypeFactory(
+        lake=huron, management_unit_type=mu_type
+    )
+    ManagementUnitFactory(
+        label="OH-3", lake=huron, geom=both, lake_management_unit_type=lake_mu_type
+    )
+    Grid5Factory(grid=1001, lake=huron, geom=west)
+    Grid5Factory(grid=1002, lake=huron, geom=east)
+
+    return dict(west=west, east=east)
+
+
+@pytest.mark.django_db
+def test_spatial_totals(client, huron_geoms):
+    """Points should be counted and their weights summed by grid and by
+    management unit.  Points outside of our polygons are ignored."""
+
+    west = huron_geoms["west"].centroid
+    east = huron_geoms["east"].centroid
+
+    points = [
+        {"id": 1, "point": west.wkt, "weight": 2.5},
+        {"id": 2, "point": [west.x, west.y], "weight": 1.5},
+        {"id": 3, "point": east.wkt},
+        {"id": 4, "point": "POINT(-70 40)", "weight": 100},
+    ]
+
+    url = reverse("common_api:api-spatial-totals")
+    response = client.post(url, {"points": points}, content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+
+    grids = {x["slug"]: x for x in response.data["grid5"]}
+    assert grids["hu_1001"]["count"] == 2
+    assert grids["hu_1001"]["total"] == 4.0
+    assert grids["hu_1002"]["count"] == 1
+    assert grids["hu_1002"]["total"] == 1.0
+
+    mus = response.data["management_units"]
+    assert len(mus) == 1
+    assert mus[0]["label"] == "OH-3"
+    assert mus[0]["count"] == 3
+    assert mus[0]["total"] == 5.0
+    assert response.data["invalid"] == []
+
+
+@pytest.mark.django_db
+def test_spatial_totals_single_query(client, huron_geoms, django_assert_num_queries):
+    """All of the points should be summarized in one query."""
+
+    pt = huron_geoms["west"].centroid
+    points = [{"id": i, "point": pt.wkt} for i in range(100)]
+
+    url = reverse("common_api:api-spatial-totals")
+    with django_assert_num_queries(1):
+        response = client.post(url, {"points": points}, content_type="application/json")
+    assert response.data["grid5"][0]["count"] == 100
+
+
+@pytest.mark.django_db
+def test_spatial_totals_invalid(client, huron_geoms):
+    """Points or weights that can't be parsed (or are not finite) should
+    be reported as invalid, and a missing points list should return a
+    400."""
+
+    pt = huron_geoms["west"].centroid
+    points = [
+        {"id": 1, "point": pt.wkt},
+        {"id": 2, "point": "foo"},
+        {"id": 3, "point": pt.wkt, "weight": "heavy"},
+        {"id": 4, "point": pt.wkt, "weight": "NaN"},
+        {"id": 5, "point": ["nan", "inf"]},
+    ]
+
+    url = reverse("common_api:api-spatial-totals")
+    response = client.post(url, {"points": points}, content_type="application/json")
+    assert response.data["invalid"] == [2, 3, 4, 5]
+    assert response.data["grid5"][0]["count"] == 1
+
+    response = client.post(url, {}, content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
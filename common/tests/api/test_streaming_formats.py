@@ -0,0 +1,99 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_streaming_formats.py
+
+ DESCRIPTION:
+
+  The grid5, management unit and taxon list endpoints can stream all
+  of their records as newline delimited json (?format=ndjson) or csv
+  (?format=csv) rather than returning pages of json.
+
+=============================================================
+
+"""
+
+import csv
+import io
+import json
+
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from ...api.renderers import CSVRenderer, NDJSONRenderer
+from ..common_factories import Grid5Factory, LakeFactory
+from ..fixtures import taxon_list
+
+
+@pytest.fixture
+def grid_list():
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    return [Grid5Factory(grid=x, lake=huron) for x in range(1001, 1251)]
+
+
+def test_ndjson_renderer_stream():
+    """Each row should be rendered as compact json on its own line."""
+
+    rows = [{"slug": "hu_1001", "grid": "1001"}, {"slug": "ér_1", "grid": None}]
+    content = b"".join(NDJSONRenderer().stream(iter(rows), ["slug", "grid"]))
+    assert content.decode("utf-8") == (
+        '{"slug":"hu_1001","grid":"1001"}\n{"slug":"ér_1","grid":null}\n'
+    )
+
+
+def test_csv_renderer_stream():
+    """The csv should have a header row, and nulls should be empty."""
+
+    rows = [{"slug": "hu_1001", "grid": "1001"}, {"slug": "hu, 2", "grid": None}]
+    content = b"".join(CSVRenderer().stream(iter(rows), ["slug", "grid"]))
+    assert content.decode("utf-8") == 'slug,grid\r\nhu_1001,1001\r\n"hu, 2",\r\n'
+
+
+@pytest.mark.django_db
+def test_grid5_list_ndjson(client, grid_list):
+    """All of our grids should be streamed in one response - regardless
+    of the page size."""
+
+    url = reverse("common_api:grid5-list")
+    response = client.get(url, {"format": "ndjson"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.streaming
+    assert response["Content-Type"].startswith("application/x-ndjson")
+
+    content = b"".join(response.streaming_content).decode("utf-8")
+    rows = [json.loads(x) for x in content.splitlines()]
+    assert len(rows) == len(grid_list)
+    assert rows[0] == client.get(url).data["results"][0]
+
+
+@pytest.mark.django_db
+def test_grid5_list_csv(client, grid_list):
+    """The csv should include a header row and one row for each of the
+    grids that match our filters."""
+
+    superior = LakeFactory(abbrev="SU", lake_name="Lake Superior")
+    Grid5Factory(grid=1001, lake=superior)
+
+    url = reverse("common_api:grid5-list")
+    response = client.get(url, {"format": "csv", "lake": "SU"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/csv")
+
+    content = b"".join(response.streaming_content).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == 1
+    assert rows[0]["slug"] == "su_1001"
+    assert list(rows[0].keys()) == ["id", "lake_abbrev", "grid", "slug", "centroid"]
+
+
+@pytest.mark.django_db
+def test_taxon_list_csv(client, taxon_list):
+    """Taxa should be streamed in path order."""
+
+    url = reverse("common_api:taxon-list")
+    response = client.get(url, {"format": "csv"})
+    assert response.status_code == status.HTTP_200_OK
+
+    content = b"".join(response.streaming_content).decode("utf-8")
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == len(taxon_list)
+    assert "path" not in rows[0]
@@ -0,0 +1,118 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_values_serializer.py
+
+ DESCRIPTION:
+
+  Our list views serialize the dictionaries returned by
+  queryset.values() with ValuesListSerializer, which skips the
+  serializer field machinery.  The results must be identical to
+  those produced by the serializers themselves.
+
+=============================================================
+
+"""
+
+import json
+
+from django.contrib.gis.geos import Point
+from rest_framework.renderers import JSONRenderer
+
+from ...api.serializers import (
+    Flen2TlenSerializer,
+    Grid5Serializer,
+    LookupTableSerializer,
+    ManagementUnitSerializer,
+    TaxonSerializer,
+    ValuesListSerializer,
+)
+
+
+def slow_representation(serializer_class, rows):
+    """Serialize each row with the serializer itself."""
+    return [serializer_class(row).data for row in rows]
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+def test_values_serializer_matches_serializer():
+    """The fast path should produce exactly the same json as our
+    serializer - including geometries, nulls and numbers stored as
+    strings."""
+
+    rows = [
+        {
+            "id": 1,
+            "lake_abbrev": "HU",
+            "grid": 1234,
+            "slug": "hu_1234",
+            "centroid": Point(-82.1, 44.2, srid=4326),
+        },
+        {
+            "id": 2,
+            "lake_abbrev": "HU",
+            "grid": "5678",
+            "slug": "hu_5678",
+            "centroid": None,
+        },
+    ]
+
+    serializer = Grid5Serializer(rows, many=True)
+    assert isinstance(serializer, ValuesListSerializer)
+    assert render(serializer.data) == render(slow_representation(Grid5Serializer, rows))
+
+
+def test_values_serializer_booleans_and_sources():
+    """Boolean fields and fields with a different source should be
+    serialized the same way too."""
+
+    rows = [
+        {
+            "id": 1,
+            "abbrev": "AT",
+            "label": "Atigamig",
+            "description": None,
+            "slug": "atigamig-at",
+            "is_active": 1,
+        }
+    ]
+    serializer = LookupTableSerializer(rows, many=True)
+    assert json.loads(render(serializer.data))[0]["is_active"] is True
+    assert render(serializer.data) == render(
+        slow_representation(LookupTableSerializer, rows)
+    )
+
+    rows = [{"spc": "081", "flen2tlen_alpha": 1, "flen2tlen_beta": "1.05"}]
+    serializer = Flen2TlenSerializer(rows, many=True)
+    assert serializer.data == [{"spc": "081", "intercept": 1.0, "slope": 1.05}]
+
+
+def test_values_serializer_missing_keys():
+    """Rows that are missing one of the fields should fall back to the
+    serializer, which omits the missing field."""
+
+    rows = [
+        {"taxon": "1234", "itiscode": "1234", "taxon_name": "Salvelinus"},
+    ]
+    fast = TaxonSerializer(rows, many=True).data
+    assert render(fast) == render(slow_representation(TaxonSerializer, rows))
+    assert "taxon_label" not in fast[0]
+
+
+def test_values_serializer_field_order():
+    """The keys of each row should be in the order the fields are
+    declared."""
+
+    row = {
+        "slug": "hu_stat_dist_oh-3",
+        "label": "OH-3",
+        "id": 1,
+        "envelope": None,
+        "centroid": None,
+        "mu_type_slug": "stat_dist",
+        "mu_type": "Statistical District",
+        "lake_abbrev": "HU",
+    }
+    data = ManagementUnitSerializer([row], many=True).data
+    assert list(data[0].keys()) == list(ManagementUnitSerializer().fields.keys())
@@ -0,0 +1,163 @@
+"""=============================================================
+~/uglmu_common/common/tests/api/test_vector_tiles.py
+
+ DESCRIPTION:
+
+  Tests for the mapbox vector tile endpoint for our grid5,
+  management unit and lake layers.
+
+=============================================================
+
+"""
+
+import math
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from ...api.tiles import tile_geom_column
+from ..common_factories import Grid5Factory, LakeFactory, ManagementUnitFactory
+
+
+@pytest.fixture()
+def polygonA():
+    """A polygon somewhere in Lake Huron."""
+
+    wkt = (
+        "MULTIPOLYGON(((-82.0 44.0,"
+        + "-82.5 44.0,"
+        + "-82.5 44.5,"
+        + "-82.0 44.5,"
+        + "-82.0 44.0)))"
+    )
+    return GEOSGeometry(wkt.replace("\n", ""), srid=4326)
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def tile_for_point(pt, z):
+    """Return the x, y coordinates of the web mercator tile containing
+    a lon-lat point at zoom level z."""
+    n = 2**z
+    x = int((pt.x + 180.0) / 360.0 * n)
+    lat = math.radians(pt.y)
+    y = int((1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n)
+    return x, y
+
+
+def tile_url(layer, z, x, y):
+    return reverse("common_api:vector-tile", kwargs=dict(layer=layer, z=z, x=x, y=y))
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("layer", ["grid5", "management_unit", "lake"])
+def test_vector_tile(client, polygonA, layer):
+    """A tile that covers one of our features should return a non-empty
+    vector tile, and a tile on the other side of the world should be
+    empty."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+    Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+    ManagementUnitFactory(label="OH-1", lake=huron, geom=polygonA)
+
+    x, y = tile_for_point(polygonA.centroid, 6)
+    response = client.get(tile_url(layer, 6, x, y))
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "application/vnd.mapbox-vector-tile"
+    assert len(response.content) > 0
+
+    response = client.get(tile_url(layer, 6, 0, 0))
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_vector_tile_mu_type_filter(client, polygonA):
+    """Management unit tiles should only include units of the requested
+    mu_type."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+    ManagementUnitFactory(label="QMA 4-5", lake=huron, geom=polygonA)
+
+    x, y = tile_for_point(polygonA.centroid, 6)
+    url = tile_url("management_unit", 6, x, y)
+
+    response = client.get(url + "?mu_type=qma")
+    assert len(response.content) > 0
+
+    response = client.get(url + "?mu_type=ltrz")
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_vector_tile_cached(client, django_assert_num_queries, polygonA):
+    """Once a tile has been rendered, it should be served from the cache
+    (without any queries) until the layer changes."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+    grid = Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+
+    x, y = tile_for_point(polygonA.centroid, 6)
+    url = tile_url("grid5", 6, x, y)
+
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert first.content == second.content
+
+    grid.delete()
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.content == b""
+
+
+@pytest.mark.django_db
+def test_vector_tile_related_model_changes(client, polygonA):
+    """Management unit tiles include the lake abbreviation - they should
+    be rendered again when the lake changes."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron", geom=polygonA)
+    ManagementUnitFactory(label="OH-1", lake=huron, geom=polygonA)
+
+    x, y = tile_for_point(polygonA.centroid, 6)
+    url = tile_url("management_unit", 6, x, y)
+
+    first = client.get(url)
+    assert b"HU" in first.content
+
+    huron.abbrev = "ON"
+    huron.save()
+    response = client.get(url)
+    assert response.content != first.content
+    assert b"ON" in response.content
+
+
+@pytest.mark.django_db
+def test_vector_tile_404(client):
+    """Unknown layers and tiles outside of the zoom level should return
+    404."""
+
+    response = client.get(tile_url("foobar", 6, 1, 1))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get(tile_url("grid5", 2, 4, 1))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_tile_geom_column():
+    """Low zoom levels should use our simplified geometries - the full
+    resolution geometry should only be used once a tile coordinate is
+    smaller than our finest simplification."""
+
+    assert tile_geom_column(0) == "COALESCE(t.geom_low, t.geom)"
+    assert tile_geom_column(4) == "COALESCE(t.geom_medium, t.geom)"
+    assert tile_geom_column(7) == "COALESCE(t.geom_high, t.geom)"
+    assert tile_geom_column(14) == "t.geom"
@@ -0,0 +1,196 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_biodata.py
+
+ DESCRIPTION:
+
+  Tests for the vectorized validation of biological data against the
+  FN012 limits of each species.
+
+=============================================================
+
+"""
+
+import numpy as np
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from ..biodata import condition_factor, convert_lengths, validate_biodata
+from ..species_cache import SpeciesLimits
+from .common_factories import SpeciesFactory
+
+# spc, flen_min, flen_max, tlen_min, tlen_max, rwt_min, rwt_max,
+# k_min_error, k_min_warn, k_max_error, k_max_warn, alpha, beta
+LIMITS = [
+    ("081", 100, 1000, 110, 1100, 10, 15000, 0.5, 0.6, 2.0, 1.8, 5.0, 1.1),
+    ("334", None, None, 50, 900, None, None, None, None, None, None, None, None),
+]
+
+
+@pytest.fixture()
+def limits():
+    return SpeciesLimits(LIMITS)
+
+
+def test_condition_factor():
+    """K should be 100000 * rwt / len^3 and nan if either value is
+    missing."""
+
+    k = condition_factor(np.array([1000.0, np.nan, 10.0]), np.array([500, 500, 0]))
+    assert k[0] == pytest.approx(0.8)
+    assert np.isnan(k[1])
+    assert np.isnan(k[2])
+
+
+def test_validate_biodata_ranges(limits):
+    """Values outside of the limits of their species should be flagged,
+    missing values and limits should not be."""
+
+    flags = validate_biodata(
+        ["081", "081", 81, "334", "334"],
+        flen=[50, 1200, None, 10, None],
+        tlen=[500, 1300, 100, 1000, None],
+        rwt=[None, None, 5, None, 20000],
+        limits=limits,
+    )
+
+    assert flags["flen_low"].tolist() == [True, False, False, False, False]
+    assert flags["flen_high"].tolist() == [False, True, False, False, False]
+    assert flags["tlen_low"].tolist() == [False, False, True, False, False]
+    assert flags["tlen_high"].tolist() == [False, True, False, True, False]
+    assert flags["rwt_low"].tolist() == [False, False, True, False, False]
+    assert not flags["rwt_high"].any()
+    assert not flags["unknown_spc"].any()
+
+
+def test_validate_biodata_condition(limits):
+    """Low condition factors should be calculated with tlen, and high
+    condition factors with flen."""
+
+    flags = validate_biodata(
+        ["081", "081", "081", "081"],
+        # K (flen) = 0.8, 1.9, 2.1, nan
+        flen=[500, 500, 500, None],
+        # K (tlen) = 0.57, 1.79, 1.98, 0.46
+        tlen=[560, 510, 510, 600],
+        rwt=[1000, 2375, 2625, 1000],
+        limits=limits,
+    )
+
+    assert flags["k_low_warn"].tolist() == [True, False, False, True]
+    assert flags["k_low_error"].tolist() == [False, False, False, True]
+    assert flags["k_high_warn"].tolist() == [False, True, True, False]
+    assert flags["k_high_error"].tolist() == [False, False, True, False]
+    assert flags["k_flen"][0] == pytest.approx(0.8)
+
+
+def test_validate_biodata_unknown_species(limits):
+    """Species codes that are not in our table should be flagged."""
+
+    flags = validate_biodata(
+        ["081", "999", None], flen=[5000, 5000, 5000], limits=limits
+    )
+    assert flags["unknown_spc"].tolist() == [False, True, True]
+    assert flags["flen_high"].tolist() == [True, False, False]
+
+
+def test_validate_biodata_invalid(limits):
+    """Columns that are not numbers or not the same length as spc should
+    raise a ValueError."""
+
+    with pytest.raises(ValueError):
+        validate_biodata(["081"], flen=["long"], limits=limits)
+
+    with pytest.raises(ValueError):
+        validate_biodata(["081"], flen=[100, 200], limits=limits)
+
+
+def test_convert_lengths(limits):
+    """Lengths should be converted with the regression of their species
+    in either direction - species without coefficients and missing
+    lengths should be nan."""
+
+    tlen = convert_lengths(
+        ["081", "081", "334", "999"], [100, None, 100, 100], limits=limits
+    )
+    assert tlen[0] == pytest.approx(115.0)
+    assert np.isnan(tlen[1:]).all()
+
+    flen = convert_lengths(["081", "334"], [115, 115], "tlen2flen", limits=limits)
+    assert flen[0] == pytest.approx(100.0)
+    assert np.isnan(flen[1])
+
+    with pytest.raises(ValueError):
+        convert_lengths(["081"], [100], "flen2rwt", limits=limits)
+
+
+@pytest.mark.parametrize("conversion", ["flen2tlen", "tlen2flen"])
+def test_convert_lengths_not_finite(limits, conversion):
+    """Lengths that are not finite should be converted to nan in either
+    direction - inf can't be rendered as json."""
+
+    converted = convert_lengths(
+        ["081", "081"], [np.inf, -np.inf], conversion, limits=limits
+    )
+    assert np.isnan(converted).all()
+
+
+@pytest.mark.django_db
+def test_validate_biodata_endpoint(client):
+    """The endpoint should return the ids of the fish that fail each
+    check."""
+
+    SpeciesFactory(spc="081", flen_min=100, flen_max=1000)
+
+    url = reverse("common_api:api-validate-biodata")
+    data = {"id": ["a", "b", "c"], "spc": ["081", "081", "999"], "flen": [50, 500, 50]}
+    response = client.post(url, data, content_type="application/json")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data == {
+        "count": 3,
+        "flags": {"flen_low": ["a"], "unknown_spc": ["c"]},
+    }
+
+
+@pytest.mark.django_db
+def test_validate_biodata_endpoint_400(client):
+    """Requests without an array of species or with invalid values should
+    return a 400."""
+
+    url = reverse("common_api:api-validate-biodata")
+    response = client.post(url, {"flen": [1]}, content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    data = {"spc": ["081"], "flen": ["long"]}
+    response = client.post(url, data, content_type="application/json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_convert_lengths_endpoint(client):
+    """The endpoint should convert fork lengths to total lengths (and
+    back) and return null for species without coefficients."""
+
+    SpeciesFactory(spc="081", flen2tlen_alpha=5.0, flen2tlen_beta=1.1)
+
+    url = reverse("common_api:flen2tlen-convert")
+    data = {"spc": ["081", "081", "999"], "flen": [100, None, 100]}
+    response = client.post(url, data, content_type="application/json")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["tlen"][0] == pytest.approx(115.0)
+    assert response.data["tlen"][1:] == [None, None]
+
+    data = {"spc": ["081"], "tlen": [115]}
+    response = client.post(url, data, content_type="application/json")
+    assert response.data["flen"][0] == pytest.approx(100.0)
+
+
+@pytest.mark.django_db
+def test_convert_lengths_endpoint_400(client):
+    """Requests must include either flen or tlen, but not both."""
+
+    url = reverse("common_api:flen2tlen-convert")
+    for data in [{"spc": ["081"]}, {"spc": ["081"], "flen": [1], "tlen": [1]}]:
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
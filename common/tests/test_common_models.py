@@ -6,7 +6,9 @@ species, ect.
 
 
 import pytest
-from common.models import LakeManagementUnitType
+from common.models import LakeManagementUnitType, LakeSubdivision
+from django.contrib.gis.db.models import Union
+from django.contrib.gis.geos import MultiPolygon, Point
 from django.db.utils import IntegrityError
 from django.template.defaultfilters import slugify
 
@@ -206,3 +208,52 @@ def test_lake_management_unit_type_save_primary_false():
     LakeManagementUnitTypeFactory(
         lake=lake, management_unit_type=mu_type, primary=False
     )
+
+
+@pytest.mark.django_db
+def test_lake_subdivisions_created_on_save():
+    """When a lake with a geometry is saved, it should be split into
+    subdivided pieces that together cover the original lake geometry,
+    and each piece should have a limited number of vertices.
+
+    """
+
+    # a circle with lots of vertices:
+    circle = Point(-82.0, 44.0, srid=4326).buffer(0.5, quadsegs=256)
+    geom = MultiPolygon(circle, srid=4326)
+
+    lake = LakeFactory(lake_name="Huron", abbrev="HU", geom=geom)
+
+    pieces = LakeSubdivision.objects.filter(lake=lake)
+    assert pieces.count() > 1
+    for piece in pieces:
+        assert piece.geom.num_coords <= 256
+
+    union = pieces.aggregate(union=Union("geom"))["union"]
+    assert abs(union.area - geom.area) < 1e-9
+
+
+@pytest.mark.django_db
+def test_lake_subdivisions_replaced_on_save():
+    """If the lake geometry changes, the old pieces should be replaced
+    by pieces of the new geometry."""
+
+    pt = Point(-82.0, 44.0, srid=4326)
+    geom = MultiPolygon(pt.buffer(0.5, quadsegs=256), srid=4326)
+    lake = LakeFactory(lake_name="Huron", abbrev="HU", geom=geom)
+
+    other = Point(-87.0, 48.0, srid=4326)
+    lake.geom = MultiPolygon(other.buffer(0.1), srid=4326)
+    lake.save()
+
+    pieces = LakeSubdivision.objects.filter(lake=lake)
+    assert pieces.filter(geom__contains=other).exists()
+    assert not pieces.filter(geom__contains=pt).exists()
+
+
+@pytest.mark.django_db
+def test_lake_without_geom_has_no_subdivisions():
+    """A lake without a geometry should not have any subdivisions."""
+
+    lake = LakeFactory(lake_name="Huron", abbrev="HU")
+    assert LakeSubdivision.objects.filter(lake=lake).count() == 0
@@ -0,0 +1,160 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_grid5_index.py
+
+ DESCRIPTION:
+
+  Tests for the in-memory grid5 spatial index - the packed R-tree
+  itself, and the spatial lookup views when the index is enabled
+  with the COMMON_GRID5_LOOKUP setting.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry, Point
+from django.urls import reverse
+from rest_framework import status
+
+from ..cache_utils import bump_model_version
+from ..grid5_index import (
+    STRtree,
+    get_grid5_from_pt,
+    get_grid5_index,
+    invalidate_grid5_index,
+)
+from ..models import Grid5
+from .common_factories import Grid5Factory, LakeFactory
+
+
+@pytest.fixture()
+def polygonA():
+    """A polygon somewhere in Lake Huron."""
+
+    wkt = (
+        "MULTIPOLYGON(((-82.0 44.0,"
+        + "-82.5 44.0,"
+        + "-82.5 44.5,"
+        + "-82.0 44.5,"
+        + "-82.0 44.0)))"
+    )
+    return GEOSGeometry(wkt.replace("\n", ""), srid=4326)
+
+
+@pytest.fixture()
+def polygonB():
+    """A polygon somewhere in Lake Superior"""
+    wkt = (
+        "MULTIPOLYGON(((-87.0 48.0,"
+        + "-87.5 48.0,"
+        + "-87.5 48.5,"
+        + "-87.0 48.5,"
+        + "-87.0 48.0)))"
+    )
+    return GEOSGeometry(wkt.replace("\n", ""), srid=4326)
+
+
+@pytest.fixture()
+def grid5_index_setting(settings):
+    """Enable the in-memory index and make sure we start with a fresh
+    copy of it."""
+    settings.COMMON_GRID5_LOOKUP = "index"
+    invalidate_grid5_index()
+    yield
+    invalidate_grid5_index()
+
+
+def test_strtree_query():
+    """A packed R-tree should return every item whose bounding box
+    contains the query point, and nothing else."""
+
+    items = []
+    for i in range(20):
+        for j in range(20):
+            items.append(((i, j, i + 1, j + 1), (i, j)))
+    tree = STRtree(items, node_capacity=4)
+
+    assert tree.size == 400
+    assert tree.query(5.5, 7.5) == [(5, 7)]
+    assert sorted(tree.query(5.0, 7.5)) == [(4, 7), (5, 7)]
+    assert tree.query(-1, -1) == []
+
+
+def test_strtree_empty():
+    """An empty tree should not return any matches."""
+    tree = STRtree([])
+    assert tree.query(0, 0) == []
+
+
+@pytest.mark.django_db
+def test_index_matches_db_lookup(settings, grid5_index_setting, polygonA, polygonB):
+    """The grid5 attributes returned from the index should be the same
+    as those returned by the database query."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+    Grid5Factory(grid=5678, lake=huron, geom=polygonB)
+
+    pt = polygonA.centroid
+    from_index = get_grid5_from_pt(pt)
+
+    settings.COMMON_GRID5_LOOKUP = "db"
+    from_db = get_grid5_from_pt(pt)
+
+    assert from_index is not None
+    assert from_index == from_db
+    assert from_index["slug"] == "hu_1234"
+
+    outside = Point(-70.0, 40.0, srid=4326)
+    assert get_grid5_index().lookup(outside) is None
+
+
+@pytest.mark.django_db
+def test_index_rebuilt_on_save(grid5_index_setting, polygonA, polygonB):
+    """If a grid is saved, our index should be rebuilt to reflect the
+    change."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    grid = Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+
+    pt = polygonB.centroid
+    assert get_grid5_from_pt(pt) is None
+
+    grid.geom = polygonB
+    grid.save()
+
+    assert get_grid5_from_pt(pt)["slug"] == "hu_1234"
+
+
+@pytest.mark.django_db
+def test_index_rebuilt_by_other_processes(grid5_index_setting, polygonA):
+    """Processes that did not save the grid are not sent a signal -
+    they should rebuild their index when the grid version changes."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+
+    index = get_grid5_index()
+    assert get_grid5_index() is index
+
+    # a grid saved by another process:
+    bump_model_version(Grid5)
+    assert get_grid5_index() is not index
+
+
+@pytest.mark.django_db
+def test_grid5_view_uses_index(client, grid5_index_setting, polygonA):
+    """Our grid5 lookup view should return the same response when the
+    index is enabled."""
+
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    Grid5Factory(grid=1234, lake=huron, geom=polygonA)
+
+    url = reverse("common_api:api-lookup-grid5-from-pt")
+    response = client.post(url, {"point": polygonA.centroid.wkt})
+    assert response.status_code == status.HTTP_200_OK
+
+    assert response.data.get("slug") == "hu_1234"
+    assert response.data.get("lake") == dict(
+        lake_name="Lake Huron", lake_id=huron.id, lake_abbrev="HU"
+    )
@@ -0,0 +1,196 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_grid5_lattice.py
+
+ DESCRIPTION:
+
+  Tests for the 5-minute grid lattices - calculating grid numbers
+  from coordinates, flagging grids that have been clipped by the
+  shoreline, and resolving points to grids with the lattice lookup.
+
+=============================================================
+
+"""
+
+import pytest
+from django.contrib.gis.geos import GEOSGeometry, MultiPolygon, Point
+from django.core.management import call_command
+
+from ..grid5_index import get_grid5s_from_pts, invalidate_grid5_index
+from ..models import Grid5, Grid5Lattice
+from .common_factories import LakeFactory
+
+FIVE_MINUTES = 5 / 60
+
+
+@pytest.fixture()
+def lattice():
+    """A 10x10 lattice with its north-west corner at 45N 83W, numbered
+    from 101 with 100 grids per row."""
+    return Grid5Lattice(
+        origin_lon=-83.0,
+        origin_lat=45.0,
+        cell_size=FIVE_MINUTES,
+        nrows=10,
+        ncols=10,
+        first_grid=101,
+        row_step=100,
+        col_step=1,
+    )
+
+
+@pytest.fixture()
+def lattice_grids(lattice):
+    """Create a lake with a lattice and two grids - one complete cell
+    (grid 101) and one cell clipped in half (grid 102)."""
+
+    invalidate_grid5_index()
+    huron = LakeFactory(abbrev="HU", lake_name="Lake Huron")
+    lattice.lake = huron
+    lattice.save()
+
+    full = MultiPolygon(lattice.cell_polygon(0, 0), srid=4326)
+    Grid5(lake=huron, grid="101", geom=full).save()
+
+    cell = lattice.cell_polygon(0, 1)
+    xmin, ymin, xmax, ymax = cell.extent
+    half = GEOSGeometry(
+        "MULTIPOLYGON((({0} {1},{0} {3},{2} {3},{2} {1},{0} {1})))".format(
+            xmin, ymin, (xmin + xmax) / 2, ymax
+        ),
+        srid=4326,
+    )
+    Grid5(lake=huron, grid="102", geom=half).save()
+
+    yield lattice
+    invalidate_grid5_index()
+
+
+def test_lattice_grid_number(lattice):
+    """Grid numbers should be calculated from the row and column of the
+    lattice cell containing the point."""
+
+    half = FIVE_MINUTES / 2
+
+    assert lattice.cell_index(-83.0 + half, 45.0 - half) == (0, 0)
+    assert lattice.grid_number(-83.0 + half, 45.0 - half) == 101
+    assert lattice.grid_number(-83.0 + 3 * FIVE_MINUTES + half, 45.0 - half) == 104
+    assert lattice.grid_number(-83.0 + half, 45.0 - 2 * FIVE_MINUTES - half) == 301
+
+
+def test_lattice_grid_number_outside(lattice):
+    """Points outside of the lattice should not have a grid number."""
+
+    assert lattice.grid_number(-84.0, 44.9) is None
+    assert lattice.grid_number(-82.9, 45.1) is None
+    assert lattice.grid_number(-82.9, 44.0) is None
+
+
+def test_lattice_south_to_north(lattice):
+    """If the rows are numbered from the south, the origin is the south
+    west corner of the first cell."""
+
+    lattice.row_order = "s2n"
+    lattice.origin_lat = 44.0
+    half = FIVE_MINUTES / 2
+
+    assert lattice.grid_number(-83.0 + half, 44.0 + half) == 101
+    assert lattice.grid_number(-83.0 + half, 44.0 + FIVE_MINUTES + half) == 201
+
+
+@pytest.mark.django_db
+def test_grid5_clipped_flag(lattice_grids):
+    """Grids that fill their lattice cell should not be flagged as
+    clipped, grids that only fill part of it should be."""
+
+    assert Grid5.objects.get(grid="101").clipped is False
+    assert Grid5.objects.get(grid="102").clipped is True
+
+
+@pytest.mark.django_db
+def test_lattice_lookup(settings, lattice_grids):
+    """The lattice lookup should return the same grids as our database
+    query - including the clipped grid."""
+
+    half = FIVE_MINUTES / 2
+    points = [
+        # in grid 101:
+        Point(-83.0 + half, 45.0 - half, srid=4326),
+        # in the water half of grid 102:
+        Point(-83.0 + FIVE_MINUTES + half / 2, 45.0 - half, srid=4326),
+        # in the land half of grid 102:
+        Point(-83.0 + 2 * FIVE_MINUTES - half / 2, 45.0 - half, srid=4326),
+        # outside of the lattice
+        Point(-70.0, 40.0, srid=4326),
+    ]
+
+    settings.COMMON_GRID5_LOOKUP = "lattice"
+    from_lattice = get_grid5s_from_pts(points)
+
+    settings.COMMON_GRID5_LOOKUP = "db"
+    from_db = get_grid5s_from_pts(points)
+
+    assert from_lattice == from_db
+    assert [x["grid"] if x else None for x in from_lattice] == [
+        "101",
+        "102",
+        None,
+        None,
+    ]
+
+
+@pytest.mark.django_db
+def test_lattice_lookup_lake_without_lattice(settings, lattice_grids):
+    """Points in grids of lakes that do not have a lattice should be
+    found with a containment query rather than returned as None."""
+
+    superior = LakeFactory(abbrev="SU", lake_name="Lake Superior")
+    polygon = GEOSGeometry(
+        "MULTIPOLYGON(((-88 47,-88 47.1,-87.9 47.1,-87.9 47,-88 47)))", srid=4326
+    )
+    Grid5(lake=superior, grid="1234", geom=polygon).save()
+    points = [Point(-87.95, 47.05, srid=4326)]
+
+    settings.COMMON_GRID5_LOOKUP = "lattice"
+    from_lattice = get_grid5s_from_pts(points)
+
+    settings.COMMON_GRID5_LOOKUP = "db"
+    from_db = get_grid5s_from_pts(points)
+
+    assert from_lattice == from_db
+    assert from_lattice[0]["grid"] == "1234"
+
+
+@pytest.mark.django_db
+def test_flag_clipped_grids_command(lattice_grids):
+    """The flag_clipped_grids command should update the clipped flag of
+    the grids of each lake with a lattice."""
+
+    Grid5.objects.update(clipped=True)
+
+    call_command("flag_clipped_grids", "--lake", "HU")
+
+    assert Grid5.objects.get(grid="101").clipped is False
+    assert Grid5.objects.get(grid="102").clipped is True
+
+
+@pytest.mark.django_db
+def test_lattice_edit_updates_clipped_flags(settings, lattice_grids):
+    """Editing a lattice should recalculate the clipped flags of its
+    grids - the lattice lookup should not return a grid that was only
+    unclipped in the old lattice."""
+
+    # move the lattice one cell east - the cell that was grid 102 is
+    # now numbered 101
+    lattice_grids.origin_lon = -83.0 + FIVE_MINUTES
+    lattice_grids.save()
+    assert Grid5.objects.get(grid="101").clipped is True
+
+    half = FIVE_MINUTES / 2
+    points = [Point(-83.0 + FIVE_MINUTES + half / 2, 45.0 - half, srid=4326)]
+
+    settings.COMMON_GRID5_LOOKUP = "lattice"
+    from_lattice = get_grid5s_from_pts(points)
+
+    settings.COMMON_GRID5_LOOKUP = "db"
+    assert from_lattice == get_grid5s_from_pts(points)
+    assert from_lattice[0]["grid"] == "102"
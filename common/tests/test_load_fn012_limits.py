@@ -0,0 +1,108 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_load_fn012_limits.py
+
+ DESCRIPTION:
+
+  Tests for the load_fn012_limits management command - the FN012
+  limits in our text files should be merged and only the species
+  that have changed should be updated.
+
+=============================================================
+
+"""
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from ..cache_utils import model_version
+from ..management.commands.load_fn012_limits import merge_fn012_files
+from ..models import Species
+from .common_factories import SpeciesFactory
+
+
+@pytest.fixture()
+def fn012_dir(tmp_path):
+    (tmp_path / "spc_flen_tlen_rwt.txt").write_text(
+        "spc,min_flen,max_flen,min_tlen,max_tlen,min_rwt,max_rwt\n"
+        '"081","100","1000","110","1100","10","15000"\n'
+        '"091","","","100","700","20","4000"\n'
+    )
+    (tmp_path / "spc_alpha_beta.txt").write_text(
+        '"SPC","alpha","beta"\n"081",0.9,1.08\n"999",1,1\n'
+    )
+    return tmp_path
+
+
+def test_merge_fn012_files(fn012_dir):
+    """The values of each species should be merged from every file -
+    with empty values as None."""
+
+    merged = merge_fn012_files(str(fn012_dir))
+    assert merged["081"]["flen_max"] == 1000
+    assert merged["081"]["flen2tlen_beta"] == 1.08
+    assert merged["091"]["flen_min"] is None
+    assert "flen2tlen_alpha" not in merged["091"]
+    assert set(merged) == {"081", "091", "999"}
+
+
+def test_merge_fn012_files_invalid(tmp_path):
+    """Values that are not numbers or a directory without any of our
+    files should raise an error."""
+
+    with pytest.raises(CommandError):
+        merge_fn012_files(str(tmp_path))
+
+    (tmp_path / "spc_alpha_beta.txt").write_text('spc,alpha,beta\n"081",big,1\n')
+    with pytest.raises(CommandError):
+        merge_fn012_files(str(tmp_path))
+
+    (tmp_path / "spc_alpha_beta.txt").write_text('spc,alpha,beta\n"081",1\n')
+    with pytest.raises(CommandError, match="line 2"):
+        merge_fn012_files(str(tmp_path))
+
+
+@pytest.mark.django_db
+def test_load_fn012_limits(fn012_dir, django_assert_num_queries):
+    """Changed species should be updated and the species version
+    replaced - species that are not in the files should not change.
+    The species are read in one query and updated with a single
+    bulk update (in a savepoint)."""
+
+    SpeciesFactory(spc="081", abbrev="LAT", flen_max=900, flen2tlen_alpha=None)
+    SpeciesFactory(spc="091", abbrev="LWF", flen_min=50)
+    SpeciesFactory(spc="334", abbrev="WAL", flen_max=800)
+    version = model_version(Species)
+
+    stdout = StringIO()
+    # select, savepoint, update, release savepoint:
+    with django_assert_num_queries(4):
+        call_command("load_fn012_limits", str(fn012_dir), stdout=stdout)
+
+    laker = Species.objects.get(spc="081")
+    assert laker.flen_max == 1000
+    assert laker.flen2tlen_alpha == 0.9
+    assert Species.objects.get(spc="091").flen_min is None
+    assert Species.objects.get(spc="334").flen_max == 800
+
+    assert model_version(Species) != version
+    assert "Unknown species: 999" in stdout.getvalue()
+    assert "2 species updated." in stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_load_fn012_limits_dry_run(fn012_dir, django_assert_num_queries):
+    """A dry run should report the changes without saving them - the
+    species are only read."""
+
+    SpeciesFactory(spc="081", abbrev="LAT", flen_max=900)
+
+    stdout = StringIO()
+    with django_assert_num_queries(1):
+        call_command("load_fn012_limits", str(fn012_dir), dry_run=True, stdout=stdout)
+
+    assert Species.objects.get(spc="081").flen_max == 900
+    assert "flen_max: 900.0 -> 1000.0" in stdout.getvalue()
+    assert "1 species would be updated" in stdout.getvalue()
@@ -0,0 +1,74 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_species_cache.py
+
+ DESCRIPTION:
+
+  Tests for the in-process snapshot of our species table - it should
+  be read-only, only query the database when a species has changed,
+  and be rebuilt after a species is saved or deleted.
+
+=============================================================
+
+"""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from ..species_cache import (
+    FN012_FIELDS,
+    SpeciesSnapshot,
+    get_species,
+    get_species_snapshot,
+)
+from .common_factories import SpeciesFactory
+
+
+@pytest.fixture()
+def snapshot():
+    records = [
+        dict(spc="081", abbrev="LAT", spc_nmco="Lake Trout"),
+        dict(spc="091", abbrev="LWF", spc_nmco="Lake Whitefish"),
+    ]
+    for record in records:
+        record.update({field: None for field in FN012_FIELDS})
+    return SpeciesSnapshot(records)
+
+
+def test_snapshot_maps(snapshot):
+    """Species should be available by species code and abbreviation."""
+
+    assert len(snapshot) == 2
+    assert snapshot.by_spc["081"]["spc_nmco"] == "Lake Trout"
+    assert snapshot.by_abbrev["LWF"]["spc"] == "091"
+    assert snapshot.limits.codes == ["081", "091"]
+
+
+def test_snapshot_is_read_only(snapshot):
+    """The records, maps and arrays should not be modifiable."""
+
+    with pytest.raises(TypeError):
+        snapshot.by_spc["081"]["spc_nmco"] = "Laker"
+    with pytest.raises(TypeError):
+        snapshot.by_spc["334"] = {}
+    with pytest.raises(ValueError):
+        snapshot.limits.values[0, 0] = 1
+
+
+@pytest.mark.django_db
+def test_species_snapshot_cached():
+    """The snapshot should only be rebuilt after a species changes."""
+
+    species = SpeciesFactory(spc="081", abbrev="LAT", flen_max=1000)
+    assert get_species("081")["flen_max"] == 1000
+
+    with CaptureQueriesContext(connection) as ctx:
+        get_species_snapshot()
+    assert len(ctx.captured_queries) == 0
+
+    species.flen_max = 1200
+    species.save()
+    assert get_species("081")["flen_max"] == 1200
+
+    species.delete()
+    assert get_species("081") is None
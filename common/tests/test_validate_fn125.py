@@ -0,0 +1,111 @@
+"""=============================================================
+~/uglmu_common/common/tests/test_validate_fn125.py
+
+ DESCRIPTION:
+
+  Tests for the validate_fn125 management command - rows of large
+  csv or parquet files that fail any of our FN012 checks are written
+  to a csv file with the names of the checks.
+
+=============================================================
+
+"""
+
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from ..species_cache import SpeciesLimits
+from ..management.commands.validate_fn125 import validate_chunk
+from .common_factories import SpeciesFactory
+
+COLUMNS = dict(spc=0, flen=1, tlen=None, rwt=2)
+
+
+@pytest.fixture()
+def limits():
+    return SpeciesLimits(
+        [("081", 100, 1000, None, None, 10, 15000, None, None, None, None, None, None)]
+    )
+
+
+def test_validate_chunk(limits):
+    """Only rows that fail a check should be returned - with the names
+    of the checks appended.  Values that are not numbers should be
+    flagged as invalid."""
+
+    rows = [
+        ["081", "500", "1000"],
+        ["081", "50", ""],
+        ["081", "500", "heavy"],
+        ["999", "", ""],
+    ]
+    flagged = validate_chunk(rows, COLUMNS, limits)
+    assert flagged == [
+        ["081", "50", "", "flen_low"],
+        ["081", "500", "heavy", "invalid_rwt"],
+        ["999", "", "", "unknown_spc"],
+    ]
+
+
+@pytest.fixture()
+def fn125_csv(tmp_path):
+    path = tmp_path / "fn125.csv"
+    with open(path, "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["PRJ_CD", "FISH", "SPC", "FLEN", "RWT"])
+        for fish in range(1, 26):
+            flen = 50 if fish % 5 == 0 else 500
+            writer.writerow(["LHA_IA21_001", fish, "081", flen, 1000])
+    return path
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_fn125_command(fn125_csv, tmp_path, workers):
+    """The flagged rows of every chunk should be written to the output
+    file in the same order as the input file - whether the chunks are
+    validated in this process or by a pool of workers."""
+
+    SpeciesFactory(spc="081", flen_min=100, flen_max=1000)
+
+    output = tmp_path / "flagged.csv"
+    stdout = StringIO()
+    call_command(
+        "validate_fn125",
+        str(fn125_csv),
+        output=str(output),
+        chunksize=4,
+        workers=workers,
+        stdout=stdout,
+    )
+
+    with open(output, newline="") as csvfile:
+        rows = list(csv.reader(csvfile))
+    assert rows[0] == ["PRJ_CD", "FISH", "SPC", "FLEN", "RWT", "FLAGS"]
+    assert [x[1] for x in rows[1:]] == ["5", "10", "15", "20", "25"]
+    assert {x[-1] for x in rows[1:]} == {"flen_low"}
+    assert "Validated 25 rows" in stdout.getvalue()
+
+
+@pytest.mark.django_db
+def test_validate_fn125_missing_spc_column(tmp_path):
+    """Files without a species column should raise an error."""
+
+    path = tmp_path / "fn125.csv"
+    path.write_text("PRJ_CD,FISH,FLEN\nLHA_IA21_001,1,500\n")
+    with pytest.raises(CommandError):
+        call_command("validate_fn125", str(path), workers=1)
+
+
+@pytest.mark.django_db
+def test_validate_fn125_empty_file(tmp_path):
+    """Empty files should raise an error."""
+
+    path = tmp_path / "fn125.csv"
+    path.write_text("")
+    with pytest.raises(CommandError, match="is empty"):
+        call_command("validate_fn125", str(path), workers=1)